@@ -1,12 +1,18 @@
 """Agent orchestrator for coordinating agent collaboration."""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Tuple
+import asyncio
+import json
 import time
 from datetime import datetime
 from app.agents.router import RouterAgent
 from app.agents.retrieval import RetrievalAgent
+from app.agents.scheduler import Stage, StageError, StageScheduler
 from app.agents.synthesis import SynthesisAgent
 from app.agents.validation import ValidationAgent
-from app.models import AgentMessage
+from app.models import AgentMessage, QueryFilters
+from app.services.response_cache import get_response_cache
+from app.services.semantic_cache import get_semantic_cache
+from app.utils.embeddings import generate_query_embedding_async
 from app.utils.logger import get_logger
 from app.config import get_settings
 
@@ -37,161 +43,552 @@ class AgentOrchestrator:
         query: str,
         language: str = "en",
         top_k: int = 5,
-        include_validation: bool = True
+        include_validation: bool = True,
+        filters: Optional[QueryFilters] = None,
+        session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process a query through the agent pipeline.
         
         Args:
             query: User query
-            language: Query language
+            language: Query language (detected by the router if None)
             top_k: Number of documents to retrieve
             include_validation: Whether to include validation agent
+            filters: Optional restrictions on the documents searched
+            session_id: Conversation the query continues, if any
             
         Returns:
-            Final response with agent states
+            Final response with agent states and per-stage timings
         """
         start_time = time.time()
-        agent_states = {}
+        agent_states: Dict[str, Any] = {}
+        cache_request = self._cache_request(query, language, top_k, include_validation, filters)
+        values = self._initial_values(
+            query, language, top_k, include_validation, filters, session_id, cache_request
+        )
         
         try:
             logger.info(f"Processing query: {query[:100]}...")
             
-            # Step 1: Router Agent
-            logger.debug("Step 1: Router Agent")
-            router_message = AgentMessage(
-                sender="user",
-                receiver="router",
-                message_type="query",
-                content={
-                    "query": query,
-                    "language": language,
-                    "top_k": top_k
-                }
-            )
+            stages = await self._pipeline(agent_states).run(values, stop=self._cache_hit)
             
-            router_result = await self.router.process(router_message)
-            agent_states["router"] = self.router.get_status()
+            cached = self._cache_hit(values)
+            if cached is not None:
+                cached["cached"] = True
+                cached["processing_time_ms"] = (time.time() - start_time) * 1000
+                cached["stages"] = stages
+                return cached
             
-            if not router_result.get("success"):
-                logger.error("Router agent failed")
-                return {
-                    "success": False,
-                    "error": router_result.get("error"),
-                    "agent_states": agent_states
-                }
+            synthesis_data = values.get("synthesis_result") or {}
+            processing_time_ms = (time.time() - start_time) * 1000
             
-            routing_decision = router_result.get("routing_decision", {})
+            logger.info(f"Query processed successfully in {processing_time_ms:.2f}ms")
             
-            # Step 2: Retrieval Agent
-            logger.debug("Step 2: Retrieval Agent")
-            retrieval_message = AgentMessage(
-                sender="router",
-                receiver="retrieval",
-                message_type="retrieve",
-                content={
-                    "query": query,
-                    "language": language,
-                    "top_k": top_k
-                }
+            result = {
+                "success": True,
+                "response": synthesis_data.get("response", ""),
+                "sources": synthesis_data.get("sources", []),
+                "confidence": synthesis_data.get("confidence", 0.0),
+                "validation": values.get("validation") or {},
+                "processing_time_ms": processing_time_ms,
+                "agent_states": agent_states,
+                "stages": stages,
+                "language": values["language"],
+                "session_id": session_id,
+                "cached": False,
+                "cache_type": None
+            }
+            await asyncio.to_thread(
+                self._cache_store, values.get("generation"), result, cache_request, values.get("query_embedding")
             )
+            return result
             
-            retrieval_result = await self.retrieval.process(retrieval_message)
-            agent_states["retrieval"] = self.retrieval.get_status()
-            
-            if not retrieval_result.get("success"):
-                logger.error("Retrieval agent failed")
-                return {
-                    "success": False,
-                    "error": retrieval_result.get("error"),
-                    "agent_states": agent_states
-                }
-            
-            retrieval_data = retrieval_result.get("retrieval_result", {})
-            documents = retrieval_data.get("documents", [])
-            
-            # Convert documents to dict format for synthesis
-            documents_dict = [
-                {
-                    "id": doc.get("id"),
-                    "content": doc.get("content"),
-                    "metadata": doc.get("metadata", {})
-                }
-                for doc in documents
-            ]
+        except StageError as e:
+            logger.error(f"Stage {e.stage} failed: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "agent_states": agent_states
+            }
+        except Exception as e:
+            logger.error(f"Error in orchestrator: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "agent_states": agent_states
+            }
+    
+    async def process_query_stream(
+        self,
+        query: str,
+        language: str = "en",
+        top_k: int = 5,
+        include_validation: bool = True,
+        filters: Optional[QueryFilters] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a query through the agent pipeline, streaming the response.
+        
+        Emits a "sources" event once the context is packed, one "token" event per
+        generated fragment, a "validation" event after the stream completes
+        (when validation applies) and a final "done" or "error" event.
+        
+        Args:
+            query: User query
+            language: Query language (detected by the router if None)
+            top_k: Number of documents to retrieve
+            include_validation: Whether to include validation agent
+            filters: Optional restrictions on the documents searched
+            session_id: Conversation the query continues, if any
             
-            # Step 3: Synthesis Agent
-            logger.debug("Step 3: Synthesis Agent")
-            synthesis_message = AgentMessage(
-                sender="retrieval",
-                receiver="synthesis",
-                message_type="synthesize",
-                content={
-                    "query": query,
-                    "language": language,
-                    "documents": documents_dict
-                }
-            )
+        Yields:
+            Stream events
+        """
+        start_time = time.time()
+        agent_states: Dict[str, Any] = {}
+        cache_request = self._cache_request(query, language, top_k, include_validation, filters)
+        values = self._initial_values(
+            query, language, top_k, include_validation, filters, session_id, cache_request
+        )
+        
+        # Stages put their events on the queue while the pipeline runs; None
+        # marks the end of the run
+        events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        run = asyncio.create_task(self._pipeline(agent_states, events).run(values, stop=self._cache_hit))
+        run.add_done_callback(lambda _: events.put_nowait(None))
+        
+        try:
+            logger.info(f"Streaming query: {query[:100]}...")
             
-            synthesis_result = await self.synthesis.process(synthesis_message)
-            agent_states["synthesis"] = self.synthesis.get_status()
+            while (event := await events.get()) is not None:
+                yield event
+            stages = run.result()
             
-            if not synthesis_result.get("success"):
-                logger.error("Synthesis agent failed")
-                return {
-                    "success": False,
-                    "error": synthesis_result.get("error"),
-                    "agent_states": agent_states
+            cached = self._cache_hit(values)
+            if cached is not None:
+                yield {"event": "sources", "language": cached["language"], "sources": cached["sources"]}
+                yield {"event": "token", "content": cached["response"]}
+                if cached.get("validation"):
+                    yield {"event": "validation", "validation": cached["validation"]}
+                yield {
+                    "event": "done",
+                    "confidence": cached["confidence"],
+                    "processing_time_ms": (time.time() - start_time) * 1000,
+                    "agent_states": cached["agent_states"],
+                    "stages": stages,
+                    "cached": True,
+                    "cache_type": cached["cache_type"]
                 }
+                return
             
-            synthesis_data = synthesis_result.get("synthesis_result", {})
-            response = synthesis_data.get("response", "")
-            sources = synthesis_data.get("sources", [])
-            confidence = synthesis_data.get("confidence", 0.0)
-            
-            # Step 4: Validation Agent (optional)
-            validation_data = {}
-            if include_validation and routing_decision.get("requires_validation"):
-                logger.debug("Step 4: Validation Agent")
-                validation_message = AgentMessage(
-                    sender="synthesis",
-                    receiver="validation",
-                    message_type="validate",
-                    content={
-                        "query": query,
-                        "response": response,
-                        "documents": documents_dict
-                    }
-                )
-                
-                validation_result = await self.validation.process(validation_message)
-                agent_states["validation"] = self.validation.get_status()
-                
-                if validation_result.get("success"):
-                    validation_data = validation_result.get("validation_result", {})
-            
+            synthesis_data = values.get("synthesis_result") or {}
+            validation_data = values.get("validation") or {}
             processing_time_ms = (time.time() - start_time) * 1000
             
-            logger.info(f"Query processed successfully in {processing_time_ms:.2f}ms")
+            logger.info(f"Query streamed successfully in {processing_time_ms:.2f}ms")
             
-            return {
+            yield {
+                "event": "done",
+                "confidence": synthesis_data.get("confidence", 0.0),
+                "processing_time_ms": processing_time_ms,
+                "agent_states": agent_states,
+                "stages": stages,
+                "session_id": session_id,
+                "cached": False,
+                "cache_type": None
+            }
+            
+            await asyncio.to_thread(self._cache_store, values.get("generation"), {
                 "success": True,
-                "response": response,
-                "sources": sources,
-                "confidence": confidence,
+                "response": synthesis_data.get("response", ""),
+                "sources": synthesis_data.get("sources", []),
+                "confidence": synthesis_data.get("confidence", 0.0),
                 "validation": validation_data,
                 "processing_time_ms": processing_time_ms,
                 "agent_states": agent_states,
-                "language": language
-            }
+                "language": values["language"]
+            }, cache_request, values.get("query_embedding"))
             
+        except StageError as e:
+            logger.error(f"Stage {e.stage} failed: {e}")
+            yield {"event": "error", "error": str(e)}
         except Exception as e:
-            logger.error(f"Error in orchestrator: {e}")
+            logger.error(f"Error in orchestrator stream: {e}")
+            yield {"event": "error", "error": str(e)}
+        finally:
+            # The client may disconnect mid-stream
+            run.cancel()
+    
+    def _initial_values(
+        self,
+        query: str,
+        language: Optional[str],
+        top_k: int,
+        include_validation: bool,
+        filters: Optional[QueryFilters],
+        session_id: Optional[str],
+        cache_request: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Get the request values the pipeline stages start from."""
+        return {
+            "query": query,
+            "requested_language": language,
+            "top_k": top_k,
+            "include_validation": include_validation,
+            "filters": filters,
+            "session_id": session_id,
+            "cache_request": cache_request,
+        }
+    
+    def _pipeline(
+        self,
+        agent_states: Dict[str, Any],
+        events: Optional["asyncio.Queue[Optional[Dict[str, Any]]]"] = None
+    ) -> StageScheduler:
+        """
+        Build the stages of a query as a DAG.
+        
+        The exact cache lookup, query embedding and routing start at once;
+        the semantic cache lookup and retrieval wait for both the embedding
+        and the routing decision, which resolves the query language. The router's
+        target_agents prune retrieval, synthesis and validation. A cache hit
+        stops the run. With an events queue, retrieval, synthesis and
+        validation stream their results to it as they go.
+        
+        Args:
+            agent_states: Filled with each agent's status as its stage completes
+            events: Queue for stream events, or None to synthesize in one call
+        """
+        settings = get_settings()
+        
+        # Cache backends such as Redis block, so lookups run in a worker
+        # thread while the embedding and routing stages proceed
+        async def exact_cache(cache_request, session_id):
+            generation, cached = await asyncio.to_thread(self._exact_cache_lookup, cache_request, session_id)
+            return {"generation": generation, "exact_hit": cached}
+        
+        async def embed(query):
+            return {"query_embedding": await generate_query_embedding_async(query)}
+        
+        async def semantic_cache(cache_request, generation, query_embedding, language):
             return {
-                "success": False,
-                "error": str(e),
-                "agent_states": agent_states
+                "semantic_hit": self._semantic_cache_lookup(cache_request, generation, query_embedding, language)
+            }
+        
+        async def route(query, requested_language, top_k):
+            router_result = await self._route(query, requested_language, top_k)
+            agent_states["router"] = self.router.get_status()
+            self._check("router", router_result)
+            routing_decision = router_result["routing_decision"]
+            return {"routing_decision": routing_decision, "language": routing_decision["language"]}
+        
+        async def retrieve(query, language, top_k, query_embedding, filters, routing_decision):
+            retrieval_result = await self._retrieve(query, language, top_k, query_embedding, filters)
+            agent_states["retrieval"] = self._retrieval_state(retrieval_result)
+            self._check("retrieval", retrieval_result)
+            return {"documents": self._documents_for_synthesis(retrieval_result)}
+        
+        async def synthesize(query, language, documents, session_id, routing_decision):
+            synthesis_message = self._synthesis_message(query, language, documents, session_id)
+            if events is None:
+                synthesis_result = await self.synthesis.process(synthesis_message)
+            else:
+                synthesis_result = {}
+                async for event in self.synthesis.stream(synthesis_message):
+                    if event["type"] == "token":
+                        await events.put({"event": "token", "content": event["content"]})
+                    elif event["type"] == "sources":
+                        await events.put({"event": "sources", "language": language, "sources": event["sources"]})
+                    else:
+                        synthesis_result = event
+            agent_states["synthesis"] = self._synthesis_state(synthesis_result)
+            self._check("synthesis", synthesis_result)
+            return {"synthesis_result": synthesis_result.get("synthesis_result", {})}
+        
+        async def validate(query, synthesis_result, documents, include_validation, routing_decision):
+            validation_data = await self._validate(query, synthesis_result.get("response", ""), documents)
+            agent_states["validation"] = self.validation.get_status()
+            if events is not None:
+                await events.put({"event": "validation", "validation": validation_data})
+            return {"validation": validation_data}
+        
+        def targets(agent: str):
+            return lambda routing_decision, **_: agent in routing_decision.get("target_agents", [])
+        
+        return StageScheduler([
+            Stage("exact_cache", exact_cache,
+                  inputs=("cache_request", "session_id"),
+                  outputs=("generation", "exact_hit")),
+            Stage("embed", embed,
+                  inputs=("query",),
+                  outputs=("query_embedding",)),
+            Stage("semantic_cache", semantic_cache,
+                  inputs=("cache_request", "generation", "query_embedding", "language"),
+                  outputs=("semantic_hit",),
+                  when=lambda generation, **_: generation is not None and settings.enable_semantic_cache),
+            Stage("route", route,
+                  inputs=("query", "requested_language", "top_k"),
+                  outputs=("routing_decision", "language")),
+            Stage("retrieve", retrieve,
+                  inputs=("query", "language", "top_k", "query_embedding", "filters", "routing_decision"),
+                  outputs=("documents",),
+                  when=targets("retrieval")),
+            Stage("synthesize", synthesize,
+                  inputs=("query", "language", "documents", "session_id", "routing_decision"),
+                  outputs=("synthesis_result",),
+                  when=targets("synthesis")),
+            Stage("validate", validate,
+                  inputs=("query", "synthesis_result", "documents", "include_validation", "routing_decision"),
+                  outputs=("validation",),
+                  when=lambda include_validation, routing_decision, **_: (
+                      include_validation and targets("validation")(routing_decision)
+                  )),
+        ])
+    
+    def _check(self, stage: str, agent_result: Dict[str, Any]) -> None:
+        """Stop the pipeline if an agent failed."""
+        if not agent_result.get("success"):
+            logger.error(f"{stage.capitalize()} agent failed")
+            raise StageError(stage, agent_result.get("error") or f"{stage} agent failed")
+    
+    def _cache_hit(self, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the cached response the cache stages found, if any."""
+        return values.get("exact_hit") or values.get("semantic_hit")
+
+    def _cache_request(
+        self,
+        query: str,
+        language: Optional[str],
+        top_k: int,
+        include_validation: bool,
+        filters: Optional[QueryFilters] = None
+    ) -> Dict[str, Any]:
+        """Build the request fields that identify a cached response."""
+        return {
+            "query": query,
+            "language": language,
+            "top_k": top_k,
+            "include_validation": include_validation,
+            "filters": filters.model_dump(mode="json", exclude_none=True) if filters else None
+        }
+    
+    def _exact_cache_lookup(
+        self,
+        cache_request: Dict[str, Any],
+        session_id: Optional[str] = None
+    ) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """
+        Look up a cached response for an identical request.
+        
+        Queries within a session are never cached: their answers depend on
+        the conversation so far.
+        
+        Returns:
+            Tuple of (corpus generation, cached response). The generation is
+            None when caching is disabled, unavailable or bypassed.
+        """
+        settings = get_settings()
+        if not settings.enable_caching or session_id:
+            return None, None
+        
+        try:
+            cache = get_response_cache()
+            generation = cache.get_generation()
+            cached = cache.get(generation, **cache_request)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None, None
+        
+        if cached is not None:
+            logger.info("Serving query from response cache")
+            cached["cache_type"] = "exact"
+        return generation, cached
+    
+    def _semantic_cache_lookup(
+        self,
+        cache_request: Dict[str, Any],
+        generation: int,
+        query_embedding: List[float],
+        language: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached answer to a paraphrase of the query.
+        
+        Matches are scoped by the resolved language, detected when the
+        request gave none, so a translation of a cached question is not
+        served an answer in the wrong language.
+        """
+        hit = get_semantic_cache().lookup(
+            query_embedding, language, generation, self._cache_scope(cache_request)
+        )
+        if hit is None:
+            return None
+        
+        cached, similarity, matched_query = hit
+        logger.info(
+            f"Serving query from semantic cache (similarity {similarity:.3f}, "
+            f"matched: {matched_query[:100]})"
+        )
+        cached["cache_type"] = "semantic"
+        cached["cache_similarity"] = similarity
+        return cached
+    
+    def _cache_store(
+        self,
+        generation: Optional[int],
+        result: Dict[str, Any],
+        cache_request: Dict[str, Any],
+        query_embedding: Optional[List[float]] = None
+    ) -> None:
+        """Store a successful response in the exact and semantic caches."""
+        if generation is None:
+            return
+        
+        response = {
+            k: v for k, v in result.items() if k not in ("cached", "cache_type", "stages")
+        }
+        
+        try:
+            get_response_cache().set(generation, response, **cache_request)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+        
+        if query_embedding is not None and get_settings().enable_semantic_cache:
+            get_semantic_cache().add(
+                query_embedding,
+                result["language"],
+                generation,
+                cache_request["query"],
+                response,
+                self._cache_scope(cache_request)
+            )
+    
+    def _cache_scope(self, cache_request: Dict[str, Any]) -> str:
+        """
+        Get the semantic cache scope of a request: every option the exact
+        cache keys on besides the query and language, so a paraphrase is
+        only served an answer with the same sources and validation.
+        """
+        return json.dumps({
+            "filters": cache_request.get("filters") or None,
+            "top_k": cache_request["top_k"],
+            "include_validation": cache_request["include_validation"]
+        }, sort_keys=True)
+    
+    async def _route(self, query: str, language: str, top_k: int) -> Dict[str, Any]:
+        """Run the router agent."""
+        router_message = AgentMessage(
+            sender="user",
+            receiver="router",
+            message_type="query",
+            content={
+                "query": query,
+                "language": language,
+                "top_k": top_k
+            }
+        )
+        return await self.router.process(router_message)
+    
+    async def _retrieve(
+        self,
+        query: str,
+        language: str,
+        top_k: int,
+        query_embedding: Optional[List[float]] = None,
+        filters: Optional[QueryFilters] = None
+    ) -> Dict[str, Any]:
+        """Run the retrieval agent, reusing the query embedding if known."""
+        retrieval_message = AgentMessage(
+            sender="router",
+            receiver="retrieval",
+            message_type="retrieve",
+            content={
+                "query": query,
+                "language": language,
+                "top_k": top_k,
+                "query_embedding": query_embedding,
+                "filters": filters
+            }
+        )
+        return await self.retrieval.process(retrieval_message)
+    
+    async def _validate(
+        self,
+        query: str,
+        response: str,
+        documents: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Run the validation agent and return its result, or {} on failure."""
+        validation_message = AgentMessage(
+            sender="synthesis",
+            receiver="validation",
+            message_type="validate",
+            content={
+                "query": query,
+                "response": response,
+                "documents": documents
+            }
+        )
+        
+        validation_result = await self.validation.process(validation_message)
+        
+        if validation_result.get("success"):
+            return validation_result.get("validation_result", {})
+        return {}
+    
+    def _retrieval_state(self, retrieval_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the retrieval agent's status with this query's stage timings and searches."""
+        return {
+            **self.retrieval.get_status(),
+            "timings_ms": retrieval_result.get("timings_ms", {}),
+            "rerank": retrieval_result.get("rerank"),
+            "fan_out": retrieval_result.get("fan_out"),
+        }
+    
+    def _synthesis_state(self, synthesis_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the synthesis agent's status with this query's context packing and prefill stats."""
+        synthesis_data = synthesis_result.get("synthesis_result", {})
+        return {
+            **self.synthesis.get_status(),
+            "context": synthesis_data.get("context", {}),
+            "generation": synthesis_data.get("generation", {}),
+        }
+    
+    def _synthesis_message(
+        self,
+        query: str,
+        language: str,
+        documents: List[Dict[str, Any]],
+        session_id: Optional[str] = None
+    ) -> AgentMessage:
+        """Build the message handed from retrieval to synthesis."""
+        return AgentMessage(
+            sender="retrieval",
+            receiver="synthesis",
+            message_type="synthesize",
+            content={
+                "query": query,
+                "language": language,
+                "documents": documents,
+                "session_id": session_id
+            }
+        )
+    
+    def _documents_for_synthesis(self, retrieval_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convert retrieved documents to the dict format used by synthesis."""
+        retrieval_data = retrieval_result.get("retrieval_result", {})
+        documents = retrieval_data.get("documents", [])
+        
+        return [
+            {
+                "id": doc.get("id"),
+                "content": doc.get("content"),
+                "metadata": doc.get("metadata", {})
             }
+            for doc in documents
+        ]
     
     def get_agents_status(self) -> List[Dict[str, Any]]:
         """Get status of all agents."""
@@ -1,14 +1,32 @@
 """Retrieval agent for document retrieval."""
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import re
 import time
 from app.agents.base import BaseAgent
-from app.models import AgentMessage, RetrievalResult
+from app.config import get_settings
+from app.models import AgentMessage, QueryFilters, RetrievalResult
 from app.utils.logger import get_logger
-from app.utils.embeddings import generate_embedding
-from app.services.vector_db import search_documents
+from app.utils.embeddings import generate_query_embedding_async
+from app.utils.fusion import normalized_score_fusion, reciprocal_rank_fusion
+from app.utils.reranker import rerank_async
+from app.services.llm import generate_text_async
+from app.services.vector_db import (
+    search_batch_async, search_documents_async, search_sparse_documents_async
+)
 
 logger = get_logger(__name__)
 
+REWRITE_PROMPT = (
+    "Write {count} alternative search queries for the question below, to find documents "
+    "that answer it. Vary the wording and include translations into other languages. "
+    "Write one query per line, without numbering or explanations.\n\n"
+    "Question: {query}\n\nQueries:"
+)
+
+# Bullets or numbering the LLM puts before rewritten queries despite the prompt
+_LIST_MARKER = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
+
 
 class RetrievalAgent(BaseAgent):
     """Retrieves relevant documents from the knowledge base."""
@@ -34,18 +52,65 @@ class RetrievalAgent(BaseAgent):
             query = message.content.get("query", "")
             language = message.content.get("language", "en")
             top_k = message.content.get("top_k", 5)
+            filters = message.content.get("filters")
             
             logger.info(f"Retrieving documents for query: {query[:100]}...")
             
-            # Generate embedding for query
-            query_embedding = generate_embedding(query)
+            settings = get_settings()
+            timings: Dict[str, float] = {}
+            
+            # Over-fetch candidates for the cross-encoder to choose from
+            limit = max(top_k, settings.reranker_candidates) if settings.enable_reranking else top_k
+            
+            # Generate embedding for query unless the orchestrator already has it
+            stage_start = time.time()
+            query_embedding = message.content.get("query_embedding")
+            if query_embedding is None:
+                query_embedding = await generate_query_embedding_async(query)
+            timings["embedding_ms"] = (time.time() - stage_start) * 1000
             
             # Search documents
-            search_results = search_documents(
-                query_embedding=query_embedding,
-                top_k=top_k,
-                language_filter=language
-            )
+            stage_start = time.time()
+            fan_out = None
+            if settings.enable_multi_query_retrieval:
+                search_results, fan_out = await self._fan_out_search(
+                    query, language, query_embedding, filters, limit, timings
+                )
+            elif settings.enable_hybrid_search:
+                # Query the dense and sparse indexes concurrently and fuse the rankings
+                candidates = max(limit, settings.hybrid_search_candidates)
+                dense_results, sparse_results = await asyncio.gather(
+                    search_documents_async(
+                        query_embedding=query_embedding,
+                        top_k=candidates,
+                        language_filter=language,
+                        filters=filters
+                    ),
+                    search_sparse_documents_async(
+                        query=query,
+                        top_k=candidates,
+                        language_filter=language,
+                        filters=filters
+                    )
+                )
+                search_results = reciprocal_rank_fusion(
+                    [dense_results, sparse_results], k=settings.hybrid_rrf_k, limit=limit
+                )
+            else:
+                search_results = await search_documents_async(
+                    query_embedding=query_embedding,
+                    top_k=limit,
+                    language_filter=language,
+                    filters=filters
+                )
+            timings["search_ms"] = (time.time() - stage_start) * 1000
+            
+            # Rerank candidates and keep the best top_k
+            rerank_outcome = None
+            if settings.enable_reranking and search_results:
+                stage_start = time.time()
+                search_results, rerank_outcome = await rerank_async(query, search_results, top_k)
+                timings["rerank_ms"] = (time.time() - stage_start) * 1000
             
             # Format results
             documents = []
@@ -72,6 +137,7 @@ class RetrievalAgent(BaseAgent):
                 documents.append(doc)
             
             retrieval_time_ms = (time.time() - start_time) * 1000
+            timings["total_ms"] = retrieval_time_ms
             
             retrieval_result = RetrievalResult(
                 documents=documents,
@@ -88,6 +154,9 @@ class RetrievalAgent(BaseAgent):
             
             return {
                 "retrieval_result": retrieval_result.model_dump(),
+                "timings_ms": timings,
+                "rerank": rerank_outcome,
+                "fan_out": fan_out,
                 "success": True
             }
             
@@ -99,4 +168,97 @@ class RetrievalAgent(BaseAgent):
                 "success": False,
                 "error": str(e)
             }
-
+    
+    async def _fan_out_search(
+        self,
+        query: str,
+        language: str,
+        query_embedding: List[float],
+        filters: Optional[QueryFilters],
+        limit: int,
+        timings: Dict[str, float]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Search the whole corpus and each language in it with every phrasing of the query.
+        
+        The unfiltered search finds documents in any language, while the
+        per-language searches keep each language's best matches from being
+        crowded out by documents in the query's own language. All searches go
+        to Qdrant in one batch; each index's results are merged by chunk on
+        normalized scores, and with hybrid search the two indexes are fused.
+        
+        Returns:
+            Tuple of (results, description of the searches run)
+        """
+        settings = get_settings()
+        
+        queries = [query]
+        embeddings = [query_embedding]
+        if settings.multi_query_rewrites:
+            stage_start = time.time()
+            rewrites = await self._rewrite_query(query, settings.multi_query_rewrites)
+            queries += rewrites
+            embeddings += await asyncio.gather(*[
+                generate_query_embedding_async(rewrite) for rewrite in rewrites
+            ])
+            timings["rewrite_ms"] = (time.time() - stage_start) * 1000
+        
+        languages = settings.multi_query_languages or settings.supported_languages
+        language_filters = [None] + list(dict.fromkeys([language, *languages]))
+        
+        candidates = max(limit, settings.hybrid_search_candidates) if settings.enable_hybrid_search else limit
+        dense_lists, sparse_lists = await search_batch_async(
+            query_embeddings=embeddings,
+            sparse_queries=queries if settings.enable_hybrid_search else [],
+            top_k=candidates,
+            language_filters=language_filters,
+            filters=filters
+        )
+        
+        # Searches come back per query phrasing, the unfiltered one first
+        group = len(language_filters)
+        dense_results = normalized_score_fusion(
+            [dense_lists[i:i + group] for i in range(0, len(dense_lists), group)], limit=candidates
+        )
+        if sparse_lists:
+            sparse_results = normalized_score_fusion(
+                [sparse_lists[i:i + group] for i in range(0, len(sparse_lists), group)], limit=candidates
+            )
+            search_results = reciprocal_rank_fusion(
+                [dense_results, sparse_results],
+                k=settings.hybrid_rrf_k,
+                limit=limit
+            )
+        else:
+            search_results = dense_results[:limit]
+        
+        fan_out = {
+            "queries": queries,
+            "language_filters": language_filters,
+            "searches": len(dense_lists) + len(sparse_lists),
+        }
+        return search_results, fan_out
+    
+    async def _rewrite_query(self, query: str, count: int) -> List[str]:
+        """
+        Ask the LLM for alternative phrasings of the query.
+        
+        Returns:
+            Up to count rewrites differing from the query; none if the LLM fails
+        """
+        try:
+            text = await generate_text_async(
+                REWRITE_PROMPT.format(count=count, query=query), max_tokens=48 * count
+            )
+        except Exception as e:
+            logger.warning(f"Query rewriting failed, searching the original query only: {e}")
+            return []
+        
+        seen = {query.strip().casefold()}
+        rewrites = []
+        for line in text.splitlines():
+            rewrite = _LIST_MARKER.sub("", line).strip()
+            if rewrite and rewrite.casefold() not in seen:
+                seen.add(rewrite.casefold())
+                rewrites.append(rewrite)
+        return rewrites[:count]
@@ -1,5 +1,6 @@
 """Router agent for query routing."""
 from typing import Dict, Any
+import asyncio
 from app.agents.base import BaseAgent
 from app.models import AgentMessage, RoutingDecision
 from app.utils.logger import get_logger
@@ -31,9 +32,11 @@ class RouterAgent(BaseAgent):
             query = message.content.get("query", "")
             language = message.content.get("language")
             
-            # Detect language if not provided
+            # Detect language if not provided, off the event loop so the
+            # stages running alongside routing are not held up
             if not language:
-                language, _ = detect_language(query)
+                loop = asyncio.get_running_loop()
+                language, _ = await loop.run_in_executor(None, detect_language, query)
             
             # Determine query type and target agents
             query_type = self._determine_query_type(query)
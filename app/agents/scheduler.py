@@ -0,0 +1,163 @@
+"""Dependency-driven scheduling of the query pipeline's stages."""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import asyncio
+import time
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    One step of the query pipeline.
+
+    run is called with the values named in inputs as keyword arguments and
+    returns the values named in outputs. when, if set, is called with the
+    same arguments first and can prune the stage; a pruned stage produces
+    no outputs, so the stages reading them are pruned too.
+    """
+    name: str
+    run: Callable[..., Awaitable[Dict[str, Any]]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    when: Optional[Callable[..., bool]] = None
+
+
+class StageError(Exception):
+    """A stage failed, so the pipeline cannot produce a response."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+class StageScheduler:
+    """
+    Runs pipeline stages concurrently, each as soon as its inputs exist.
+
+    Stages form a DAG through the values they read and produce: every
+    stage starts once the stages producing its inputs are done, so
+    independent stages overlap. A StageError or a stop condition cancels
+    the stages still running.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        """
+        Initialize scheduler.
+
+        Args:
+            stages: Pipeline stages; each value is produced by at most one stage
+
+        Raises:
+            ValueError: If two stages produce the same value
+        """
+        self.stages = list(stages)
+        self._producers: Dict[str, str] = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self._producers:
+                    raise ValueError(
+                        f"Stages {self._producers[output]} and {stage.name} both produce {output}"
+                    )
+                self._producers[output] = stage.name
+
+    async def run(
+        self,
+        values: Dict[str, Any],
+        stop: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the stages.
+
+        Args:
+            values: Initial values; stage outputs are added to it
+            stop: Checked after each stage completes; when it returns True
+                the stages still running are cancelled and the rest skipped
+
+        Returns:
+            Per stage: "status" ("completed", "pruned", "cancelled" or
+            "skipped" after a stop), and for stages that started "start_ms"
+            from the start of the run and "duration_ms"
+
+        Raises:
+            StageError: If a stage fails
+            ValueError: If a stage reads a value nothing provides
+        """
+        unknown = {
+            value for stage in self.stages for value in stage.inputs
+            if value not in values and value not in self._producers
+        }
+        if unknown:
+            raise ValueError(f"No stage produces {', '.join(sorted(unknown))}")
+
+        report: Dict[str, Dict[str, Any]] = {}
+        pending: List[Stage] = list(self.stages)
+        running: Dict["asyncio.Task[Dict[str, Any]]", Stage] = {}
+        run_start = time.perf_counter()
+
+        try:
+            while True:
+                self._start_ready(pending, running, values, report, run_start)
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    outputs = task.result()
+                    values.update({name: outputs.get(name) for name in stage.outputs})
+                    report[stage.name]["status"] = "completed"
+                    report[stage.name]["duration_ms"] = round(
+                        (time.perf_counter() - run_start) * 1000 - report[stage.name]["start_ms"], 3
+                    )
+
+                if stop is not None and stop(values):
+                    break
+        finally:
+            for task, stage in running.items():
+                task.cancel()
+                report[stage.name]["status"] = "cancelled"
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            for stage in pending:
+                report[stage.name] = {"status": "skipped"}
+
+        return report
+
+    def _start_ready(
+        self,
+        pending: List[Stage],
+        running: Dict["asyncio.Task[Dict[str, Any]]", Stage],
+        values: Dict[str, Any],
+        report: Dict[str, Dict[str, Any]],
+        run_start: float
+    ) -> None:
+        """Start every pending stage whose inputs exist, and prune those whose never will."""
+        progress = True
+        while progress:
+            progress = False
+            for stage in list(pending):
+                missing = [value for value in stage.inputs if value not in values]
+                if any(report.get(self._producers[value], {}).get("status") == "pruned" for value in missing):
+                    pending.remove(stage)
+                    report[stage.name] = {"status": "pruned"}
+                    progress = True
+                    continue
+                if missing:
+                    continue
+
+                pending.remove(stage)
+                arguments = {value: values[value] for value in stage.inputs}
+                if stage.when is not None and not stage.when(**arguments):
+                    report[stage.name] = {"status": "pruned"}
+                    progress = True
+                    continue
+
+                report[stage.name] = {
+                    "status": "running",
+                    "start_ms": round((time.perf_counter() - run_start) * 1000, 3)
+                }
+                running[asyncio.create_task(stage.run(**arguments))] = stage
+                logger.debug(f"Started stage {stage.name}")
@@ -1,13 +1,28 @@
 """Synthesis agent for response generation."""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Tuple
 import time
 from app.agents.base import BaseAgent
+from app.config import get_settings
 from app.models import AgentMessage, SynthesisResult
 from app.utils.logger import get_logger
-from app.services.llm import generate_text
+from app.services.llm import generate_result_async, generation_stats, stream_chunks_async
+from app.services.session_store import ConversationSession, get_session_store
+from app.utils.context_packing import PackedContext, pack_context
 
 logger = get_logger(__name__)
 
+# Identical at the start of every prompt, so Ollama can reuse its KV cache
+# for this prefix across requests; everything request-specific follows it
+SYSTEM_PROMPT = "You are a helpful assistant. Answer the following question based on the provided context."
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "zh": "Chinese",
+    "ar": "Arabic"
+}
+
 
 class SynthesisAgent(BaseAgent):
     """Synthesizes responses from retrieved documents."""
@@ -33,21 +48,30 @@ class SynthesisAgent(BaseAgent):
             query = message.content.get("query", "")
             language = message.content.get("language", "en")
             documents = message.content.get("documents", [])
+            session_id = message.content.get("session_id")
             
             logger.info(f"Synthesizing response for query: {query[:100]}...")
             
-            # Build context from documents
-            context = self._build_context(documents)
+            packed = self._pack(query, documents)
             
-            # Generate response
-            prompt = self._build_prompt(query, context, language)
-            response = generate_text(prompt)
+            if session_id:
+                result = await self._generate_in_session(session_id, query, packed.documents, language)
+            else:
+                # Build context from documents
+                context = self._build_context(packed.documents)
+                
+                # Generate response
+                prompt = self._build_prompt(query, context, language)
+                result = await generate_result_async(prompt)
             
-            # Extract sources
-            sources = self._extract_sources(documents)
+            response = result.get("response", "").strip()
+            stats = generation_stats(result)
+            
+            # Cite and score only the documents that made it into the prompt
+            sources = self._extract_sources(packed.documents)
             
             # Calculate confidence
-            confidence = self._calculate_confidence(documents)
+            confidence = self._calculate_confidence(packed.documents)
             
             synthesis_time_ms = (time.time() - start_time) * 1000
             
@@ -55,13 +79,18 @@ class SynthesisAgent(BaseAgent):
                 response=response,
                 sources=sources,
                 confidence=confidence,
-                synthesis_time_ms=synthesis_time_ms
+                synthesis_time_ms=synthesis_time_ms,
+                context=packed.get_stats(),
+                generation=stats
             )
             
             self.update_status("idle")
             self.increment_processed_queries()
             
-            logger.info(f"Generated response in {synthesis_time_ms:.2f}ms")
+            logger.info(
+                f"Generated response in {synthesis_time_ms:.2f}ms "
+                f"({stats['prompt_tokens']} prompt tokens prefilled in {stats['prefill_ms']:.0f}ms)"
+            )
             
             return {
                 "synthesis_result": synthesis_result.model_dump(),
@@ -77,35 +106,215 @@ class SynthesisAgent(BaseAgent):
                 "error": str(e)
             }
     
-    def _build_context(self, documents: List[Dict[str, Any]]) -> str:
-        """Build context from documents."""
+    async def stream(self, message: AgentMessage) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a response token by token.
+        
+        Args:
+            message: Input message containing query and documents
+            
+        Yields:
+            {"type": "sources", "sources": ...} once the documents are packed,
+            {"type": "token", "content": ...} events while generating, then a
+            single {"type": "result", ...} event shaped like process() output
+        """
+        self.update_status("processing", "streaming_response")
+        start_time = time.time()
+        
+        try:
+            query = message.content.get("query", "")
+            language = message.content.get("language", "en")
+            documents = message.content.get("documents", [])
+            session_id = message.content.get("session_id")
+            
+            logger.info(f"Streaming response for query: {query[:100]}...")
+            
+            packed = self._pack(query, documents)
+            sources = self._extract_sources(packed.documents)
+            yield {"type": "sources", "sources": sources}
+            
+            if session_id:
+                chunks = self._stream_in_session(session_id, query, packed.documents, language)
+            else:
+                context = self._build_context(packed.documents)
+                chunks = stream_chunks_async(self._build_prompt(query, context, language))
+            
+            response_parts = []
+            final_chunk: Dict[str, Any] = {}
+            async for chunk in chunks:
+                token = chunk.get("response", "")
+                if token:
+                    response_parts.append(token)
+                    yield {"type": "token", "content": token}
+                if chunk.get("done"):
+                    final_chunk = chunk
+            
+            synthesis_time_ms = (time.time() - start_time) * 1000
+            
+            synthesis_result = SynthesisResult(
+                response="".join(response_parts).strip(),
+                sources=sources,
+                confidence=self._calculate_confidence(packed.documents),
+                synthesis_time_ms=synthesis_time_ms,
+                context=packed.get_stats(),
+                generation=generation_stats(final_chunk)
+            )
+            
+            self.update_status("idle")
+            self.increment_processed_queries()
+            
+            logger.info(f"Streamed response in {synthesis_time_ms:.2f}ms")
+            
+            yield {
+                "type": "result",
+                "synthesis_result": synthesis_result.model_dump(),
+                "success": True
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in synthesis agent: {e}")
+            self.increment_error_count()
+            self.update_status("error")
+            yield {
+                "type": "result",
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _pack(self, query: str, documents: List[Dict[str, Any]]) -> PackedContext:
+        """Pack the retrieved documents into the prompt's token budget."""
+        settings = get_settings()
+        packed = pack_context(
+            query,
+            documents,
+            max_tokens=settings.context_max_tokens,
+            dedup_threshold=settings.context_dedup_threshold,
+            trim_sentences=settings.context_trim_sentences
+        )
+        if len(packed.documents) < len(documents):
+            logger.debug(
+                f"Packed {len(packed.documents)} of {len(documents)} documents into "
+                f"{packed.tokens} tokens ({packed.duplicates_dropped} near-duplicates, "
+                f"{packed.over_budget_dropped} over budget)"
+            )
+        return packed
+    
+    async def _generate_in_session(
+        self,
+        session_id: str,
+        query: str,
+        documents: List[Dict[str, Any]],
+        language: str
+    ) -> Dict[str, Any]:
+        """Generate a conversation turn, continuing from the session's model context."""
+        session = get_session_store().get_or_create(session_id)
+        async with session.lock:
+            prompt, context, document_ids = self._session_prompt(session, query, documents, language)
+            result = await generate_result_async(prompt, context)
+            self._end_turn(session, result.get("context"), document_ids)
+        return result
+    
+    async def _stream_in_session(
+        self,
+        session_id: str,
+        query: str,
+        documents: List[Dict[str, Any]],
+        language: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a conversation turn, continuing from the session's model context."""
+        session = get_session_store().get_or_create(session_id)
+        async with session.lock:
+            prompt, context, document_ids = self._session_prompt(session, query, documents, language)
+            next_context = None
+            async for chunk in stream_chunks_async(prompt, context):
+                if chunk.get("done"):
+                    next_context = chunk.get("context")
+                yield chunk
+            self._end_turn(session, next_context, document_ids)
+    
+    def _session_prompt(
+        self,
+        session: ConversationSession,
+        query: str,
+        documents: List[Dict[str, Any]],
+        language: str
+    ) -> Tuple[str, Optional[List[int]], List[str]]:
+        """
+        Build the prompt of a conversation turn.
+        
+        The first turn gets the full prompt. Follow-ups continue from the
+        model context of the previous turn and add only the documents that
+        context does not hold yet, numbered after the earlier ones.
+        
+        Returns:
+            Tuple of (prompt, model context to continue or None, ids of the
+            documents in context once the turn is done)
+        """
+        if not session.context:
+            prompt = self._build_prompt(query, self._build_context(documents), language)
+            return prompt, None, [doc.get("id") for doc in documents]
+        
+        new_documents = [doc for doc in documents if doc.get("id") not in session.document_ids]
+        context = self._build_context(new_documents, start=len(session.document_ids) + 1)
+        return (
+            self._build_followup_prompt(query, context, language),
+            session.context,
+            session.document_ids + [doc.get("id") for doc in new_documents]
+        )
+    
+    def _end_turn(
+        self,
+        session: ConversationSession,
+        context: Optional[List[int]],
+        document_ids: List[str]
+    ) -> None:
+        """Keep a finished turn's model context for the session's next turn."""
+        session.turns += 1
+        max_tokens = get_settings().session_max_context_tokens
+        if context and len(context) <= max_tokens:
+            session.context = context
+            session.document_ids = document_ids
+            return
+        
+        if context:
+            logger.info(
+                f"Session {session.session_id} context reached {len(context)} tokens "
+                f"(limit {max_tokens}), starting the next turn from a fresh prompt"
+            )
+        session.reset()
+    
+    def _build_context(self, documents: List[Dict[str, Any]], start: int = 1) -> str:
+        """Build context from documents, numbering them from start."""
         context_parts = []
-        for i, doc in enumerate(documents, 1):
+        for i, doc in enumerate(documents, start):
             context_parts.append(f"[Document {i}]\n{doc.get('content', '')}")
         return "\n\n".join(context_parts)
     
     def _build_prompt(self, query: str, context: str, language: str) -> str:
-        """Build prompt for LLM."""
-        language_names = {
-            "en": "English",
-            "es": "Spanish",
-            "fr": "French",
-            "zh": "Chinese",
-            "ar": "Arabic"
-        }
-        lang_name = language_names.get(language, "English")
+        """Build prompt for LLM, from the shared instructions to the request-specific parts."""
+        lang_name = LANGUAGE_NAMES.get(language, "English")
         
-        prompt = f"""You are a helpful assistant. Answer the following question based on the provided context.
-Answer in {lang_name}.
+        prompt = f"""{SYSTEM_PROMPT}
 
 Context:
 {context}
 
 Question: {query}
+Answer in {lang_name}.
 
 Answer:"""
         return prompt
     
+    def _build_followup_prompt(self, query: str, context: str, language: str) -> str:
+        """Build the prompt of a follow-up turn, appended to the conversation so far."""
+        lang_name = LANGUAGE_NAMES.get(language, "English")
+        additional_context = f"Additional context:\n{context}\n\n" if context else ""
+        
+        return f"""{additional_context}Question: {query}
+Answer in {lang_name}.
+
+Answer:"""
+    
     def _extract_sources(self, documents: List[Dict[str, Any]]) -> List[str]:
         """Extract source information from documents."""
         sources = []
@@ -1,26 +1,108 @@
 """API routes for the RAG system."""
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-import uuid
+import json
 import time
 
 from app.models import (
     QueryRequest, QueryResponse, IngestionRequest, IngestionResponse,
-    DocumentListResponse, DocumentInfo, HealthCheckResponse, AgentsStatusResponse
+    IngestionJobResponse, IngestionJobFile, DocumentListResponse, DocumentInfo, HealthCheckResponse, AgentsStatusResponse
 )
-from app.services.document_processor import process_document
-from app.services.vector_db import add_documents, get_collection_info
+from app.services.ingestion_pipeline import ingest_document_async
+from app.services.ingestion_jobs import get_job_manager
+from app.services.document_store import (
+    register_document, list_documents as list_stored_documents, remove_document
+)
+from app.services.vector_db import get_collection_info
 from app.agents.orchestrator import get_orchestrator
 from app.services.llm import get_ollama_client
+from app.services.response_cache import get_response_cache, invalidate_response_cache
+from app.services.semantic_cache import get_semantic_cache
+from app.services.session_store import get_session_store
+from app.utils.embeddings import get_embedding_metrics
 from app.utils.logger import get_logger
 from app.config import get_settings
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/api/v1", tags=["RAG"])
 
-# In-memory document store (in production, use a database)
-_documents_store = {}
+
+
+async def _read_upload(file: UploadFile) -> Tuple[str, bytes]:
+    """Validate an uploaded file and return its type and content."""
+    settings = get_settings()
+    
+    # Validate file type
+    file_ext = file.filename.split(".")[-1].lower()
+    if file_ext not in settings.supported_file_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type: {file_ext}"
+        )
+    
+    # Read file content
+    content = await file.read()
+    
+    # Validate file size
+    file_size_mb = len(content) / (1024 * 1024)
+    if file_size_mb > settings.max_file_size_mb:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Max size: {settings.max_file_size_mb}MB"
+        )
+    
+    logger.info(f"Received file: {file.filename} ({file_size_mb:.2f}MB)")
+    return file_ext, content
+
+
+def _job_response(job: dict) -> IngestionJobResponse:
+    """Build a job response with per-file and overall throughput."""
+    files = []
+    points_upserted = 0
+    busy_time_s = 0.0
+    
+    for file in job["files"]:
+        progress = file.get("progress") or {}
+        elapsed_s = progress.get("total_time_ms", 0.0) / 1000
+        if not elapsed_s and progress:
+            # Still running: throughput so far across completed stages
+            elapsed_s = (
+                progress.get("extraction_time_ms", 0.0)
+                + progress.get("embedding_time_ms", 0.0)
+                + progress.get("upsert_time_ms", 0.0)
+            ) / 1000
+        
+        points = progress.get("points_upserted", 0)
+        points_upserted += points
+        busy_time_s += elapsed_s
+        
+        files.append(IngestionJobFile(
+            file_name=file["file_name"],
+            file_type=file["file_type"],
+            file_size_bytes=file["file_size_bytes"],
+            status=file["status"],
+            document_id=file.get("document_id"),
+            error=file.get("error"),
+            progress=progress or None,
+            chunks_per_second=points / elapsed_s if elapsed_s else 0.0,
+            bytes_per_second=(
+                file["file_size_bytes"] / elapsed_s
+                if elapsed_s and file["status"] == "completed" else 0.0
+            )
+        ))
+    
+    return IngestionJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        files=files,
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        points_upserted=points_upserted,
+        chunks_per_second=points_upserted / busy_time_s if busy_time_s else 0.0
+    )
 
 
 @router.post("/ingest", response_model=IngestionResponse)
@@ -31,57 +113,38 @@ async def ingest_document(file: UploadFile = File(...)):
     Supported formats: PDF, TXT, MD, JSON, CSV
     """
     try:
-        settings = get_settings()
+        file_ext, content = await _read_upload(file)
         
-        # Validate file type
-        file_ext = file.filename.split(".")[-1].lower()
-        if file_ext not in settings.supported_file_types:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {file_ext}"
-            )
-        
-        # Read file content
-        content = await file.read()
-        
-        # Validate file size
-        file_size_mb = len(content) / (1024 * 1024)
-        if file_size_mb > settings.max_file_size_mb:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Max size: {settings.max_file_size_mb}MB"
-            )
-        
-        logger.info(f"Processing file: {file.filename} ({file_size_mb:.2f}MB)")
-        
-        # Process document
-        document_chunks = process_document(
+        # Stream the document through extraction, embedding and upsert
+        progress = await ingest_document_async(
             file_name=file.filename,
             file_type=file_ext,
             file_content=content
         )
+        invalidate_response_cache()
         
-        # Add to vector database
-        add_documents(document_chunks)
+        chunks_stored = progress.points_upserted + progress.chunks_unchanged
+        language = progress.language if chunks_stored else "unknown"
         
         # Store document info
-        document_id = str(uuid.uuid4())
-        _documents_store[document_id] = {
-            "file_name": file.filename,
-            "file_type": file_ext,
-            "chunks_count": len(document_chunks),
-            "language": document_chunks[0].metadata.language if document_chunks else "unknown",
-            "ingestion_date": datetime.utcnow(),
-            "file_size_bytes": len(content)
-        }
+        document_id = register_document(
+            file_name=file.filename,
+            file_type=file_ext,
+            chunks_count=chunks_stored,
+            language=language,
+            file_size_bytes=len(content)
+        )
         
         return IngestionResponse(
             document_id=document_id,
             file_name=file.filename,
-            chunks_created=len(document_chunks),
-            language=document_chunks[0].metadata.language if document_chunks else "unknown",
+            chunks_created=chunks_stored,
+            language=language,
             status="success",
-            message=f"Successfully ingested {len(document_chunks)} chunks"
+            message=(
+                f"Successfully ingested {chunks_stored} chunks "
+                f"({progress.chunks_unchanged} unchanged)"
+            )
         )
         
     except HTTPException:
@@ -91,6 +154,47 @@ async def ingest_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/ingest/jobs", response_model=IngestionJobResponse, status_code=202)
+async def create_ingestion_job(files: List[UploadFile] = File(...)):
+    """
+    Queue one or more documents for background ingestion.
+    
+    Returns immediately with a job ID; poll GET /ingest/jobs/{job_id}
+    for progress.
+    """
+    try:
+        uploads = []
+        for file in files:
+            file_ext, content = await _read_upload(file)
+            uploads.append((file.filename, file_ext, content))
+        
+        job = await get_job_manager().submit(uploads)
+        return _job_response(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating ingestion job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: str):
+    """Get the status, per-stage progress and throughput of an ingestion job."""
+    try:
+        job = get_job_manager().get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        return _job_response(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting ingestion job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     """
@@ -109,7 +213,9 @@ async def query(request: QueryRequest):
             query=request.query,
             language=request.language,
             top_k=request.top_k,
-            include_validation=True
+            include_validation=True,
+            filters=request.filters,
+            session_id=request.session_id
         )
         
         if not result.get("success"):
@@ -143,7 +249,11 @@ async def query(request: QueryRequest):
             reasoning=reasoning,
             confidence=result.get("confidence", 0.0),
             processing_time_ms=processing_time_ms,
-            agent_states=result.get("agent_states")
+            agent_states=result.get("agent_states"),
+            stages=result.get("stages"),
+            session_id=result.get("session_id"),
+            cached=result.get("cached", False),
+            cache_type=result.get("cache_type")
         )
         
     except HTTPException:
@@ -153,6 +263,50 @@ async def query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Submit a query and stream the RAG response as newline-delimited JSON.
+    
+    Events, one JSON object per line: "sources" once retrieval completes,
+    "token" for each generated fragment, "validation" after generation and
+    a final "done" (or "error") event.
+    """
+    logger.info(f"Streaming query: {request.query[:100]}...")
+    
+    orchestrator = get_orchestrator()
+    
+    async def event_stream():
+        async for event in orchestrator.process_query_stream(
+            query=request.query,
+            language=request.language,
+            top_k=request.top_k,
+            include_validation=True,
+            filters=request.filters,
+            session_id=request.session_id
+        ):
+            if event["event"] == "sources":
+                event["sources"] = [
+                    {"source": source, "type": "document"}
+                    for source in event["sources"]
+                ] if request.include_sources else []
+            yield json.dumps(event, default=str) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """End a conversation session and discard its model context."""
+    if not get_session_store().delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        "status": "success",
+        "message": f"Session {session_id} ended"
+    }
+
+
 @router.get("/documents", response_model=DocumentListResponse)
 async def list_documents():
     """List all ingested documents."""
@@ -167,7 +321,7 @@ async def list_documents():
                 ingestion_date=doc_info["ingestion_date"],
                 file_size_bytes=doc_info["file_size_bytes"]
             )
-            for doc_id, doc_info in _documents_store.items()
+            for doc_id, doc_info in list_stored_documents().items()
         ]
         
         return DocumentListResponse(
@@ -184,10 +338,10 @@ async def list_documents():
 async def delete_document(document_id: str):
     """Delete a document."""
     try:
-        if document_id not in _documents_store:
+        if remove_document(document_id) is None:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        del _documents_store[document_id]
+        invalidate_response_cache()
         
         return {
             "status": "success",
@@ -209,11 +363,11 @@ async def health_check():
         ollama_client = get_ollama_client()
         
         # Check Ollama
-        ollama_healthy = ollama_client.check_health()
+        ollama_healthy = await ollama_client.check_health_async()
         
         # Check Qdrant
         try:
-            collection_info = get_collection_info()
+            collection_info = await run_in_threadpool(get_collection_info)
             qdrant_healthy = True
         except:
             qdrant_healthy = False
@@ -244,6 +398,24 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics")
+async def metrics():
+    """Get performance metrics for tuning the query pipeline."""
+    try:
+        return {
+            "embeddings": get_embedding_metrics(),
+            "ollama": get_ollama_client().get_stats(),
+            "response_cache": get_response_cache().get_stats(),
+            "semantic_cache": get_semantic_cache().get_stats(),
+            "sessions": get_session_store().get_stats(),
+            "timestamp": datetime.utcnow()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/agents/status")
 async def agents_status():
     """Get status of all agents."""
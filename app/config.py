@@ -46,7 +46,11 @@ class Settings(BaseSettings):
     ollama_max_tokens: int = 2048
     ollama_timeout: int = 120
     ollama_retry_attempts: int = 3
-    ollama_retry_delay: int = 2
+    ollama_retry_delay: float = 2.0
+    ollama_max_connections: int = 10
+    ollama_max_parallel_requests: int = 4
+    ollama_queue_timeout: float = 30.0
+    ollama_keep_alive: str = "30m"
 
     # Qdrant
     qdrant_host: str = "qdrant"
@@ -56,11 +60,53 @@ class Settings(BaseSettings):
     qdrant_collection_name: str = "documents"
     qdrant_vector_size: int = 1024
     qdrant_distance_metric: str = "Cosine"
+    qdrant_location: str = ""
+    qdrant_quantization: str = "none"
+    qdrant_on_disk_vectors: bool = False
+    qdrant_hnsw_m: int = 16
+    qdrant_hnsw_ef_construct: int = 100
+    qdrant_search_hnsw_ef: int = 0
+    qdrant_search_oversampling: float = 2.0
+    qdrant_search_rescore: bool = True
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    qdrant_upload_batch_size: int = 256
+    qdrant_upload_parallel: int = 2
+    qdrant_upload_retries: int = 3
+    qdrant_upload_retry_delay: float = 0.5
+    qdrant_upload_wait: bool = True
+
+    # Retrieval
+    enable_hybrid_search: bool = False
+    hybrid_search_candidates: int = 20
+    hybrid_rrf_k: int = 60
+    enable_reranking: bool = False
+    reranker_model: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    reranker_candidates: int = 20
+    reranker_batch_size: int = 32
+    reranker_max_length: int = 512
+    reranker_timeout_ms: float = 500.0
+    enable_multi_query_retrieval: bool = False
+    multi_query_languages: List[str] = []
+    multi_query_rewrites: int = 0
+
+    # Synthesis context
+    context_max_tokens: int = 2048
+    context_dedup_threshold: float = 0.8
+    context_trim_sentences: bool = False
 
     # Embeddings
     embedding_model: str = "intfloat/multilingual-e5-large"
     embedding_batch_size: int = 32
     embedding_device: str = "cpu"
+    embedding_max_workers: int = 2
+    embedding_batching_enabled: bool = True
+    embedding_batch_max_wait_ms: float = 5.0
+    embedding_query_prefix: str = ""
+    embedding_cache_size: int = 10000
+    embedding_cache_dir: str = ""
+    embedding_projection_dim: int = 0
+    embedding_projection_path: str = ""
 
     # Languages
     supported_languages: List[str] = ["en", "es", "fr", "zh", "ar"]
@@ -69,9 +115,25 @@ class Settings(BaseSettings):
 
     # Document Processing
     max_file_size_mb: int = 50
+    chunking_strategy: str = "tokens"
+    chunk_max_tokens: int = 500
+    chunk_overlap_tokens: int = 50
     chunk_size: int = 512
     chunk_overlap: int = 51
     supported_file_types: List[str] = ["pdf", "txt", "md", "json", "csv"]
+    language_detection_sample_chars: int = 5000
+
+    # Ingestion pipeline
+    ingestion_batch_size: int = 64
+    ingestion_queue_size: int = 2
+    ingestion_process_workers: int = 2
+    pdf_pages_per_task: int = 8
+
+    # Ingestion jobs
+    ingestion_job_concurrency: int = 2
+    ingestion_job_db_path: str = "./data/ingestion_jobs.db"
+    ingestion_job_lease_seconds: float = 30.0
+    ingestion_upload_dir: str = "./data/uploads"
 
     # Agents
     agent_timeout: int = 30
@@ -85,6 +147,21 @@ class Settings(BaseSettings):
     enable_caching: bool = True
     cache_ttl_seconds: int = 3600
 
+    # Response cache
+    response_cache_backend: str = "memory"
+    response_cache_size: int = 1000
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Semantic cache
+    enable_semantic_cache: bool = False
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_size: int = 1000
+
+    # Conversation sessions
+    session_ttl_seconds: int = 1800
+    session_max_count: int = 1000
+    session_max_context_tokens: int = 3072
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -117,3 +194,143 @@ def validate_settings() -> None:
     if settings.chunk_overlap >= settings.chunk_size:
         raise ValueError("CHUNK_OVERLAP must be less than CHUNK_SIZE")
 
+    if settings.chunking_strategy not in ("tokens", "characters"):
+        raise ValueError("CHUNKING_STRATEGY must be 'tokens' or 'characters'")
+
+    if settings.chunk_max_tokens <= 0:
+        raise ValueError("CHUNK_MAX_TOKENS must be positive")
+
+    if settings.chunk_overlap_tokens >= settings.chunk_max_tokens:
+        raise ValueError("CHUNK_OVERLAP_TOKENS must be less than CHUNK_MAX_TOKENS")
+
+    # Validate ingestion pipeline configuration
+    if settings.ingestion_batch_size <= 0:
+        raise ValueError("INGESTION_BATCH_SIZE must be positive")
+
+    if settings.ingestion_queue_size <= 0:
+        raise ValueError("INGESTION_QUEUE_SIZE must be positive")
+
+    if settings.ingestion_process_workers <= 0:
+        raise ValueError("INGESTION_PROCESS_WORKERS must be positive")
+
+    if settings.pdf_pages_per_task <= 0:
+        raise ValueError("PDF_PAGES_PER_TASK must be positive")
+
+    if settings.ingestion_job_concurrency <= 0:
+        raise ValueError("INGESTION_JOB_CONCURRENCY must be positive")
+
+    if settings.ingestion_job_lease_seconds <= 0:
+        raise ValueError("INGESTION_JOB_LEASE_SECONDS must be positive")
+
+    # Validate concurrency configuration
+    if settings.embedding_max_workers <= 0:
+        raise ValueError("EMBEDDING_MAX_WORKERS must be positive")
+
+    if settings.embedding_batch_size <= 0:
+        raise ValueError("EMBEDDING_BATCH_SIZE must be positive")
+
+    if settings.embedding_batch_max_wait_ms < 0:
+        raise ValueError("EMBEDDING_BATCH_MAX_WAIT_MS must not be negative")
+
+    if settings.ollama_max_connections <= 0:
+        raise ValueError("OLLAMA_MAX_CONNECTIONS must be positive")
+
+    if settings.ollama_retry_attempts <= 0:
+        raise ValueError("OLLAMA_RETRY_ATTEMPTS must be positive")
+
+    if settings.ollama_retry_delay < 0:
+        raise ValueError("OLLAMA_RETRY_DELAY must not be negative")
+
+    if settings.ollama_max_parallel_requests <= 0:
+        raise ValueError("OLLAMA_MAX_PARALLEL_REQUESTS must be positive")
+
+    if settings.ollama_queue_timeout <= 0:
+        raise ValueError("OLLAMA_QUEUE_TIMEOUT must be positive")
+
+    # Validate embedding projection configuration
+    if settings.embedding_projection_dim < 0:
+        raise ValueError("EMBEDDING_PROJECTION_DIM must not be negative")
+
+    if settings.embedding_projection_dim and settings.embedding_projection_dim != settings.qdrant_vector_size:
+        raise ValueError("QDRANT_VECTOR_SIZE must equal EMBEDDING_PROJECTION_DIM when projecting embeddings")
+
+    if settings.embedding_projection_dim and not settings.embedding_projection_path:
+        raise ValueError("EMBEDDING_PROJECTION_PATH must be set when EMBEDDING_PROJECTION_DIM is")
+
+    # Validate vector storage configuration
+    if settings.qdrant_distance_metric not in ("Cosine", "Dot", "Euclid", "Manhattan"):
+        raise ValueError("QDRANT_DISTANCE_METRIC must be 'Cosine', 'Dot', 'Euclid' or 'Manhattan'")
+
+    if settings.qdrant_quantization not in ("none", "scalar", "binary"):
+        raise ValueError("QDRANT_QUANTIZATION must be 'none', 'scalar' or 'binary'")
+
+    if settings.qdrant_hnsw_m <= 0:
+        raise ValueError("QDRANT_HNSW_M must be positive")
+
+    if settings.qdrant_hnsw_ef_construct <= 0:
+        raise ValueError("QDRANT_HNSW_EF_CONSTRUCT must be positive")
+
+    if settings.qdrant_search_hnsw_ef < 0:
+        raise ValueError("QDRANT_SEARCH_HNSW_EF must not be negative")
+
+    if settings.qdrant_search_oversampling < 1.0:
+        raise ValueError("QDRANT_SEARCH_OVERSAMPLING must be at least 1")
+
+    if settings.qdrant_upload_batch_size <= 0:
+        raise ValueError("QDRANT_UPLOAD_BATCH_SIZE must be positive")
+
+    if settings.qdrant_upload_parallel <= 0:
+        raise ValueError("QDRANT_UPLOAD_PARALLEL must be positive")
+
+    if settings.qdrant_upload_retries < 0:
+        raise ValueError("QDRANT_UPLOAD_RETRIES must not be negative")
+
+    # Validate retrieval configuration
+    if settings.hybrid_search_candidates <= 0:
+        raise ValueError("HYBRID_SEARCH_CANDIDATES must be positive")
+
+    if settings.hybrid_rrf_k <= 0:
+        raise ValueError("HYBRID_RRF_K must be positive")
+
+    if settings.reranker_candidates <= 0:
+        raise ValueError("RERANKER_CANDIDATES must be positive")
+
+    if settings.reranker_batch_size <= 0:
+        raise ValueError("RERANKER_BATCH_SIZE must be positive")
+
+    if settings.reranker_timeout_ms <= 0:
+        raise ValueError("RERANKER_TIMEOUT_MS must be positive")
+
+    unsupported = set(settings.multi_query_languages) - set(settings.supported_languages)
+    if unsupported:
+        raise ValueError(
+            f"MULTI_QUERY_LANGUAGES contains unsupported languages: {', '.join(sorted(unsupported))}"
+        )
+
+    if settings.multi_query_rewrites < 0:
+        raise ValueError("MULTI_QUERY_REWRITES must not be negative")
+
+    # Validate synthesis context configuration
+    if settings.context_max_tokens <= 0:
+        raise ValueError("CONTEXT_MAX_TOKENS must be positive")
+
+    if not 0.0 < settings.context_dedup_threshold <= 1.0:
+        raise ValueError("CONTEXT_DEDUP_THRESHOLD must be in (0, 1]")
+
+    # Validate cache configuration
+    if settings.response_cache_backend not in ("memory", "redis"):
+        raise ValueError("RESPONSE_CACHE_BACKEND must be 'memory' or 'redis'")
+
+    if not 0.0 < settings.semantic_cache_threshold <= 1.0:
+        raise ValueError("SEMANTIC_CACHE_THRESHOLD must be in (0, 1]")
+
+    # Validate session configuration
+    if settings.session_ttl_seconds <= 0:
+        raise ValueError("SESSION_TTL_SECONDS must be positive")
+
+    if settings.session_max_count <= 0:
+        raise ValueError("SESSION_MAX_COUNT must be positive")
+
+    if settings.session_max_context_tokens <= 0:
+        raise ValueError("SESSION_MAX_CONTEXT_TOKENS must be positive")
+
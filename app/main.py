@@ -11,8 +11,15 @@ import sys
 from app.config import get_settings, validate_settings
 from app.utils.logger import setup_logging, get_logger
 from app.api.routes import router
-from app.services.vector_db import ensure_collection_exists
-from app.services.llm import get_ollama_client
+from app.services.vector_db import (
+    ensure_collection_exists, validate_collection_schema, close_async_qdrant_client
+)
+from app.services.llm import get_ollama_client, close_ollama_client
+from app.services.document_processor import shutdown_extraction_pool
+from app.services.ingestion_jobs import start_job_manager, stop_job_manager
+from app.utils.embeddings import shutdown_embedding_executor, close_embedding_batcher
+from app.utils.projection import get_embedding_projection
+from app.utils.reranker import get_reranker_model
 
 logger = get_logger(__name__)
 
@@ -28,8 +35,17 @@ async def lifespan(app: FastAPI):
         validate_settings()
         logger.info("Settings validated")
         
+        # Load the embedding projection so a mismatch fails startup
+        get_embedding_projection()
+        
+        # Load the reranker now so the first queries do not spend their
+        # latency budget loading it
+        if get_settings().enable_reranking:
+            get_reranker_model()
+        
         # Initialize vector database
         ensure_collection_exists()
+        validate_collection_schema()
         logger.info("Vector database initialized")
         
         # Check Ollama connection
@@ -39,6 +55,9 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning("Ollama connection failed - LLM features may not work")
         
+        # Start background ingestion workers
+        await start_job_manager()
+        
         logger.info("Application startup complete")
         
     except Exception as e:
@@ -49,6 +68,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down application...")
+    await stop_job_manager()
+    await close_ollama_client()
+    await close_async_qdrant_client()
+    await close_embedding_batcher()
+    shutdown_embedding_executor()
+    shutdown_extraction_pool()
     logger.info("Application shutdown complete")
 
 
@@ -1,6 +1,8 @@
 """Data models for the RAG system."""
 from typing import Optional, List, Dict, Any
+from dataclasses import dataclass, field
 from datetime import datetime
+import numpy as np
 from pydantic import BaseModel, Field
 
 
@@ -8,11 +10,23 @@ from pydantic import BaseModel, Field
 # Request/Response Models
 # ============================================================================
 
+class QueryFilters(BaseModel):
+    """Restrictions on the documents a query searches, applied by Qdrant."""
+    sources: Optional[List[str]] = Field(None, min_length=1, description="Only these source files")
+    file_types: Optional[List[str]] = Field(None, min_length=1, description="Only these file types, e.g. pdf")
+    ingested_after: Optional[datetime] = Field(None, description="Only chunks ingested at or after this time (UTC if naive)")
+    ingested_before: Optional[datetime] = Field(None, description="Only chunks ingested before this time (UTC if naive)")
+
+
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
     query: str = Field(..., min_length=1, max_length=5000, description="User query")
     language: Optional[str] = Field(None, description="Query language (auto-detected if not provided)")
     top_k: int = Field(5, ge=1, le=50, description="Number of documents to retrieve")
+    filters: Optional[QueryFilters] = Field(None, description="Restrict the documents searched")
+    session_id: Optional[str] = Field(
+        None, min_length=1, max_length=128, description="Continue this conversation (started if new)"
+    )
     include_sources: bool = Field(True, description="Include source documents in response")
     include_reasoning: bool = Field(False, description="Include agent reasoning in response")
 
@@ -27,6 +41,10 @@ class QueryResponse(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0)
     processing_time_ms: float
     agent_states: Optional[Dict[str, Any]] = None
+    stages: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+    cached: bool = False
+    cache_type: Optional[str] = None
 
 
 class DocumentMetadata(BaseModel):
@@ -39,6 +57,7 @@ class DocumentMetadata(BaseModel):
     page_number: Optional[int] = None
     timestamp: datetime
     original_filename: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 class DocumentChunk(BaseModel):
@@ -47,6 +66,7 @@ class DocumentChunk(BaseModel):
     content: str
     metadata: DocumentMetadata
     embedding: Optional[List[float]] = None
+    sparse_vector: Optional[Dict[int, float]] = None
 
 
 class IngestionRequest(BaseModel):
@@ -68,6 +88,45 @@ class IngestionResponse(BaseModel):
     message: str
 
 
+class IngestionProgress(BaseModel):
+    """Per-stage progress of a document moving through the ingestion pipeline."""
+    file_name: str
+    language: Optional[str] = None
+    pages_extracted: int = 0
+    chunks_created: int = 0
+    chunks_unchanged: int = 0
+    chunks_embedded: int = 0
+    points_upserted: int = 0
+    extraction_time_ms: float = 0.0
+    embedding_time_ms: float = 0.0
+    upsert_time_ms: float = 0.0
+    total_time_ms: float = 0.0
+
+
+class IngestionJobFile(BaseModel):
+    """Status of one file in an ingestion job."""
+    file_name: str
+    file_type: str
+    file_size_bytes: int
+    status: str  # queued, running, completed, failed
+    document_id: Optional[str] = None
+    error: Optional[str] = None
+    progress: Optional[IngestionProgress] = None
+    chunks_per_second: float = 0.0
+    bytes_per_second: float = 0.0
+
+
+class IngestionJobResponse(BaseModel):
+    """Response model for ingestion job endpoints."""
+    job_id: str
+    status: str  # queued, running, completed, completed_with_errors, failed
+    files: List[IngestionJobFile]
+    created_at: datetime
+    updated_at: datetime
+    points_upserted: int = 0
+    chunks_per_second: float = 0.0
+
+
 class DocumentInfo(BaseModel):
     """Information about an ingested document."""
     document_id: str
@@ -146,6 +205,8 @@ class SynthesisResult(BaseModel):
     sources: List[str]
     confidence: float
     synthesis_time_ms: float
+    context: Dict[str, Any] = {}
+    generation: Dict[str, Any] = {}
 
 
 class ValidationResult(BaseModel):
@@ -166,3 +227,26 @@ class RoutingDecision(BaseModel):
     requires_validation: bool
     language: str
 
+
+@dataclass
+class ChunkBatch:
+    """
+    Embedded chunks of one document on their way to the vector database.
+    
+    A plain dataclass rather than a pydantic model: embeddings stay one
+    contiguous float32 array and are not validated float by float. Chunks
+    are stored column-wise; row i of every list belongs to the same chunk.
+    """
+    source: str
+    file_type: str
+    language: str
+    timestamp: datetime
+    chunk_indices: List[int]
+    contents: List[str]
+    embeddings: np.ndarray  # float32, shape (len(contents), dimension)
+    page_numbers: List[Optional[int]] = field(default_factory=list)
+    content_hashes: List[str] = field(default_factory=list)
+    sparse_vectors: List[Dict[int, float]] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.contents)
@@ -1,77 +1,222 @@
 """Document processing service."""
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Any, Optional, Iterator, Tuple, Union
+from concurrent.futures import Executor, ProcessPoolExecutor
+from collections import deque
 import json
 import csv
-from io import StringIO
+import mmap
+import os
+import tempfile
+from io import BytesIO, StringIO
 import PyPDF2
 import pdfplumber
 from app.config import get_settings
 from app.utils.logger import get_logger
-from app.utils.language import detect_language
-from app.utils.embeddings import generate_embeddings
-from app.models import DocumentChunk, DocumentMetadata
+from app.utils.chunking import iter_token_chunks
 
 logger = get_logger(__name__)
 
+# Process pool for CPU-bound extraction (PDF parsing holds the GIL)
+_extraction_pool: ProcessPoolExecutor | None = None
 
-def chunk_text(
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Get or initialize the process pool used for document extraction."""
+    global _extraction_pool
+    
+    if _extraction_pool is None:
+        settings = get_settings()
+        _extraction_pool = ProcessPoolExecutor(max_workers=settings.ingestion_process_workers)
+    
+    return _extraction_pool
+
+
+def shutdown_extraction_pool() -> None:
+    """Shut down the extraction process pool."""
+    global _extraction_pool
+    
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=True)
+        _extraction_pool = None
+
+
+def iter_chunks(
     text: str,
     chunk_size: Optional[int] = None,
     chunk_overlap: Optional[int] = None
-) -> List[str]:
+) -> Iterator[str]:
     """
-    Split text into chunks.
+    Lazily split text into chunks.
+    
+    With CHUNKING_STRATEGY=tokens, chunks are whole sentences packed up to a
+    token budget of the embedding model's tokenizer; otherwise they are
+    fixed character windows.
     
     Args:
         text: Text to chunk
-        chunk_size: Size of each chunk in characters
-        chunk_overlap: Overlap between chunks
+        chunk_size: Size of each chunk (tokens or characters, per strategy)
+        chunk_overlap: Overlap between chunks (same unit)
         
-    Returns:
-        List of text chunks
+    Yields:
+        Text chunks
     """
     settings = get_settings()
+    
+    if settings.chunking_strategy == "tokens":
+        yield from iter_token_chunks(text, chunk_size, chunk_overlap)
+        return
+    
     chunk_size = chunk_size or settings.chunk_size
     chunk_overlap = chunk_overlap or settings.chunk_overlap
     
     if len(text) <= chunk_size:
-        return [text]
+        yield text
+        return
     
-    chunks = []
     start = 0
-    
     while start < len(text):
         end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
+        yield text[start:end]
         start = end - chunk_overlap
+
+
+def chunk_text(
+    text: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None
+) -> List[str]:
+    """
+    Split text into chunks.
     
-    return chunks
+    Args:
+        text: Text to chunk
+        chunk_size: Size of each chunk (tokens or characters, per strategy)
+        chunk_overlap: Overlap between chunks (same unit)
+        
+    Returns:
+        List of text chunks
+    """
+    return list(iter_chunks(text, chunk_size, chunk_overlap))
+
+
+def get_pdf_page_count(file_content: bytes) -> int:
+    """Get the number of pages in a PDF."""
+    return len(PyPDF2.PdfReader(BytesIO(file_content)).pages)
+
+
+def extract_pdf_pages(
+    source: Union[bytes, str],
+    start: int,
+    end: int
+) -> List[Tuple[int, str]]:
+    """
+    Extract text from a range of PDF pages.
+    
+    Runs in extraction pool workers, so a path can be passed instead of the
+    file content to avoid copying the whole PDF into every task; the file is
+    then memory-mapped. Pages pdfplumber cannot read fall back to PyPDF2
+    individually.
+    
+    Args:
+        source: PDF content, or path to a PDF file
+        start: Index of the first page (0-based)
+        end: Index after the last page
+        
+    Returns:
+        List of (page number, text) tuples, page numbers starting at 1
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _extract_pdf_page_range(mapped, start, end)
+    
+    return _extract_pdf_page_range(BytesIO(source), start, end)
+
+
+def _extract_pdf_page_range(stream: Any, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract a page range from a seekable PDF stream."""
+    fallback_reader = None
+    pages = []
+    
+    with pdfplumber.open(stream) as pdf:
+        for index in range(start, end):
+            try:
+                text = pdf.pages[index].extract_text() or ""
+            except Exception as e:
+                logger.warning(f"pdfplumber failed on page {index + 1}: {e}, trying PyPDF2")
+                if fallback_reader is None:
+                    fallback_reader = PyPDF2.PdfReader(stream)
+                text = fallback_reader.pages[index].extract_text() or ""
+            pages.append((index + 1, text))
+    
+    return pages
+
+
+def iter_pdf_pages(
+    file_content: bytes,
+    executor: Optional[Executor] = None,
+    pages_per_task: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily extract text from a PDF page by page.
+    
+    With an executor, page ranges are extracted in parallel, at most two
+    ranges per worker ahead of the consumer, and pages are still yielded in
+    order.
+    
+    Args:
+        file_content: PDF content
+        executor: Optional executor (usually the extraction process pool)
+        pages_per_task: Pages extracted per executor task
+        
+    Yields:
+        (page number, text) tuples, page numbers starting at 1
+    """
+    settings = get_settings()
+    pages_per_task = pages_per_task or settings.pdf_pages_per_task
+    page_count = get_pdf_page_count(file_content)
+    ranges = [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+    
+    if executor is None:
+        for start, end in ranges:
+            yield from extract_pdf_pages(file_content, start, end)
+        return
+    
+    # Spool to disk so workers memory-map the file instead of each
+    # receiving a pickled copy of it
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(file_content)
+        
+        max_in_flight = 2 * getattr(executor, "_max_workers", 1)
+        pending = deque()
+        remaining = iter(ranges)
+        for start, end in remaining:
+            pending.append(executor.submit(extract_pdf_pages, path, start, end))
+            if len(pending) >= max_in_flight:
+                break
+        
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(remaining, None)
+            if next_range is not None:
+                pending.append(executor.submit(extract_pdf_pages, path, *next_range))
+            yield from pages
+    finally:
+        os.remove(path)
 
 
 def extract_text_from_pdf(file_content: bytes) -> str:
     """Extract text from PDF file."""
     try:
-        # Try using pdfplumber first (better for complex PDFs)
-        with pdfplumber.open(file_content) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-            return text
+        return "\n".join(text for _, text in iter_pdf_pages(file_content))
     except Exception as e:
-        logger.warning(f"pdfplumber extraction failed: {e}, trying PyPDF2")
-        
-        # Fallback to PyPDF2
-        try:
-            pdf_reader = PyPDF2.PdfReader(file_content)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
-        except Exception as e:
-            logger.error(f"PDF extraction failed: {e}")
-            raise
+        logger.error(f"PDF extraction failed: {e}")
+        raise
 
 
 def extract_text_from_txt(file_content: bytes) -> str:
@@ -166,66 +311,26 @@ def extract_text(file_content: bytes, file_type: str) -> str:
         raise ValueError(f"Unsupported file type: {file_type}")
 
 
-def process_document(
-    file_name: str,
-    file_type: str,
+def iter_document_pages(
     file_content: bytes,
-    language: Optional[str] = None
-) -> List[DocumentChunk]:
+    file_type: str,
+    executor: Optional[Executor] = None
+) -> Iterator[Tuple[Optional[int], str]]:
     """
-    Process a document and create chunks with embeddings.
+    Lazily extract text from a file as pages.
+    
+    PDFs yield one item per page; other formats yield their whole text as a
+    single item with no page number.
     
     Args:
-        file_name: Name of the file
-        file_type: Type of file
         file_content: File content as bytes
-        language: Optional language code
+        file_type: Type of file (pdf, txt, md, json, csv)
+        executor: Optional executor for parallel PDF extraction
         
-    Returns:
-        List of document chunks
+    Yields:
+        (page number, text) tuples
     """
-    logger.info(f"Processing document: {file_name}")
-    
-    # Extract text
-    text = extract_text(file_content, file_type)
-    logger.info(f"Extracted {len(text)} characters from {file_name}")
-    
-    # Detect language if not provided
-    if not language:
-        language, confidence = detect_language(text)
-        logger.info(f"Detected language: {language} (confidence: {confidence:.2f})")
-    
-    # Chunk text
-    chunks = chunk_text(text)
-    logger.info(f"Created {len(chunks)} chunks from {file_name}")
-    
-    # Generate embeddings
-    embeddings = generate_embeddings(chunks)
-    
-    # Create document chunks
-    document_chunks = []
-    for i, (chunk_content, embedding) in enumerate(zip(chunks, embeddings)):
-        chunk_id = f"{file_name}_{i}"
-
-        metadata = DocumentMetadata(
-            source=file_name,
-            file_type=file_type,
-            language=language,
-            chunk_index=i,
-            total_chunks=len(chunks),
-            timestamp=datetime.utcnow(),
-            original_filename=file_name
-        )
-
-        doc_chunk = DocumentChunk(
-            id=chunk_id,
-            content=chunk_content,
-            metadata=metadata,
-            embedding=embedding
-        )
-
-        document_chunks.append(doc_chunk)
-    
-    logger.info(f"Created {len(document_chunks)} document chunks with embeddings")
-    return document_chunks
-
+    if file_type.lower() == "pdf":
+        yield from iter_pdf_pages(file_content, executor=executor)
+    else:
+        yield None, extract_text(file_content, file_type)
@@ -0,0 +1,54 @@
+"""Registry of ingested documents."""
+from typing import Any, Dict, Optional
+from datetime import datetime
+import uuid
+
+# In-memory document store (in production, use a database)
+_documents_store: Dict[str, Dict[str, Any]] = {}
+
+
+def register_document(
+    file_name: str,
+    file_type: str,
+    chunks_count: int,
+    language: str,
+    file_size_bytes: int
+) -> str:
+    """
+    Record an ingested document.
+
+    Args:
+        file_name: Name of the file
+        file_type: Type of file
+        chunks_count: Number of chunks stored
+        language: Document language
+        file_size_bytes: Size of the uploaded file
+
+    Returns:
+        Document ID
+    """
+    document_id = str(uuid.uuid4())
+    _documents_store[document_id] = {
+        "file_name": file_name,
+        "file_type": file_type,
+        "chunks_count": chunks_count,
+        "language": language,
+        "ingestion_date": datetime.utcnow(),
+        "file_size_bytes": file_size_bytes
+    }
+    return document_id
+
+
+def list_documents() -> Dict[str, Dict[str, Any]]:
+    """Get all ingested documents keyed by document ID."""
+    return dict(_documents_store)
+
+
+def get_document(document_id: str) -> Optional[Dict[str, Any]]:
+    """Get an ingested document, or None if unknown."""
+    return _documents_store.get(document_id)
+
+
+def remove_document(document_id: str) -> Optional[Dict[str, Any]]:
+    """Remove an ingested document and return its record, or None if unknown."""
+    return _documents_store.pop(document_id, None)
@@ -0,0 +1,465 @@
+"""Background ingestion jobs with SQLite persistence."""
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from app.config import get_settings
+from app.models import IngestionProgress
+from app.services.document_store import register_document
+from app.services.ingestion_pipeline import ingest_document_async
+from app.services.response_cache import invalidate_response_cache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class JobStore:
+    """
+    SQLite-backed store for ingestion jobs.
+
+    Each job row keeps its files as a JSON list, so a job is read and written
+    as one record. Writes read and rewrite the row inside one IMMEDIATE
+    transaction, so API workers sharing the database never interleave them.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize store.
+
+        Args:
+            path: SQLite database file path
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, files TEXT NOT NULL, "
+            "created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def create(self, job_id: str, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Insert a new queued job."""
+        now = datetime.utcnow().isoformat()
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "files": files,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, files, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, job["status"], json.dumps(files), now, now)
+            )
+            self._conn.commit()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, files, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update_file(self, job_id: str, index: int, **fields: Any) -> Dict[str, Any]:
+        """Update one file of a job and recompute the job status."""
+        def update(file: Dict[str, Any]) -> bool:
+            file.update(fields)
+            return True
+
+        return self._modify_file(job_id, index, update)
+
+    def claim_file(
+        self,
+        job_id: str,
+        index: int,
+        owner: str,
+        lease_seconds: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim a file for ingestion.
+
+        A file can be claimed while queued, or while running under an owner
+        that has not heartbeated within lease_seconds.
+
+        Returns:
+            The job with the file marked running, or None if another owner
+            holds the file or it is finished
+        """
+        def claim(file: Dict[str, Any]) -> bool:
+            if file["status"] != "queued" and not _lease_expired(file, lease_seconds):
+                return False
+            file.update(status="running", owner=owner, heartbeat_at=datetime.utcnow().isoformat())
+            return True
+
+        return self._modify_file(job_id, index, claim)
+
+    def heartbeat(self, job_id: str, index: int, owner: str, progress: Dict[str, Any]) -> bool:
+        """
+        Record the progress of a file, renewing the owner's lease.
+
+        Returns:
+            False if the file is no longer running under this owner
+        """
+        def beat(file: Dict[str, Any]) -> bool:
+            if file["status"] != "running" or file.get("owner") != owner:
+                return False
+            file.update(progress=progress, heartbeat_at=datetime.utcnow().isoformat())
+            return True
+
+        return self._modify_file(job_id, index, beat) is not None
+
+    def release(self, owner: str) -> None:
+        """Return the files an owner is running to the queue."""
+        def requeue(file: Dict[str, Any]) -> bool:
+            if file["status"] != "running" or file.get("owner") != owner:
+                return False
+            file.update(status="queued", owner=None)
+            return True
+
+        for job in self.unfinished():
+            for index, file in enumerate(job["files"]):
+                if file["status"] == "running" and file.get("owner") == owner:
+                    self._modify_file(job["job_id"], index, requeue)
+
+    def claimable(self, lease_seconds: float) -> List[Tuple[str, int]]:
+        """Get the (job id, file index) of queued files and of running files whose lease expired."""
+        return [
+            (job["job_id"], index)
+            for job in self.unfinished()
+            for index, file in enumerate(job["files"])
+            if file["status"] == "queued" or _lease_expired(file, lease_seconds)
+        ]
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Get jobs that still have queued or running files."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, files, created_at, updated_at FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def _modify_file(
+        self,
+        job_id: str,
+        index: int,
+        change: Callable[[Dict[str, Any]], bool]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Apply a change to one file of a job in a single write transaction.
+
+        change edits the file in place and returns False to leave the job
+        untouched. Returns the updated job, or None if nothing changed.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, status, files, created_at, updated_at FROM jobs WHERE id = ?",
+                    (job_id,)
+                ).fetchone()
+                job = self._row_to_job(row)
+                if not change(job["files"][index]):
+                    self._conn.rollback()
+                    return None
+                job["status"] = _job_status(job["files"])
+                job["updated_at"] = datetime.utcnow().isoformat()
+
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, files = ?, updated_at = ? WHERE id = ?",
+                    (job["status"], json.dumps(job["files"]), job["updated_at"], job_id)
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return job
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _row_to_job(self, row: Tuple) -> Dict[str, Any]:
+        job_id, status, files, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "files": json.loads(files),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+
+def _lease_expired(file: Dict[str, Any], lease_seconds: float) -> bool:
+    """Check whether a running file's owner has stopped heartbeating."""
+    if file["status"] != "running":
+        return False
+    heartbeat_at = file.get("heartbeat_at")
+    if heartbeat_at is None:
+        return True
+    return datetime.utcnow() - datetime.fromisoformat(heartbeat_at) > timedelta(seconds=lease_seconds)
+
+
+def _job_status(files: List[Dict[str, Any]]) -> str:
+    """Derive a job's status from the status of its files."""
+    statuses = {file["status"] for file in files}
+    if statuses <= {"queued"}:
+        return "queued"
+    if statuses & {"queued", "running"}:
+        return "running"
+    if statuses == {"completed"}:
+        return "completed"
+    if statuses == {"failed"}:
+        return "failed"
+    return "completed_with_errors"
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs on a pool of background workers.
+
+    Uploaded files are written to disk and the job is recorded in SQLite
+    before it is queued. Each file is a separate work item, so one large
+    file does not hold back the rest of a bulk upload.
+
+    Several API worker processes share the store: a worker claims a file in
+    SQLite before ingesting it, and heartbeats its progress there while it
+    runs, so any process reports the same progress. Every lease_seconds each
+    manager queues the files nobody holds, which picks up jobs submitted to
+    other processes, unfinished jobs after a restart, and files whose worker
+    died.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        upload_dir: str,
+        concurrency: int,
+        lease_seconds: float = 30.0,
+        progress_interval_s: float = 1.0
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            store: Job store
+            upload_dir: Directory for uploaded files awaiting ingestion
+            concurrency: Number of files ingested at once
+            lease_seconds: Time without a heartbeat after which another
+                worker may take over a running file
+            progress_interval_s: Interval between progress heartbeats
+        """
+        self.store = store
+        self.upload_dir = upload_dir
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.progress_interval_s = progress_interval_s
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: asyncio.Queue | None = None
+        self._queued: Set[Tuple[str, int]] = set()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the workers and the sweep that queues unclaimed files."""
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        self._workers.append(asyncio.create_task(self._sweep()))
+
+        logger.info(f"Ingestion job workers started (concurrency: {self.concurrency}, owner: {self.owner})")
+
+    async def stop(self) -> None:
+        """Stop the workers and release their files for any worker to resume."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await asyncio.to_thread(self.store.release, self.owner)
+
+    async def submit(self, files: List[Tuple[str, str, bytes]]) -> Dict[str, Any]:
+        """
+        Persist uploaded files and queue them for ingestion.
+
+        Args:
+            files: List of (file name, file type, content) tuples
+
+        Returns:
+            The new job
+        """
+        job = await asyncio.to_thread(self._persist, files)
+        for index in range(len(job["files"])):
+            self._enqueue(job["job_id"], index)
+
+        logger.info(f"Queued ingestion job {job['job_id']} with {len(job['files'])} files")
+        return job
+
+    def _persist(self, files: List[Tuple[str, str, bytes]]) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        job_dir = os.path.join(self.upload_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        records = []
+        for index, (file_name, file_type, content) in enumerate(files):
+            path = os.path.join(job_dir, f"{index}_{os.path.basename(file_name)}")
+            with open(path, "wb") as f:
+                f.write(content)
+            records.append({
+                "file_name": file_name,
+                "file_type": file_type,
+                "file_size_bytes": len(content),
+                "path": path,
+                "status": "queued",
+                "document_id": None,
+                "error": None,
+                "progress": None,
+                "owner": None,
+                "heartbeat_at": None,
+            })
+
+        return self.store.create(job_id, records)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job with the last recorded progress of each file."""
+        return self.store.get(job_id)
+
+    def _enqueue(self, job_id: str, index: int) -> None:
+        if (job_id, index) not in self._queued:
+            self._queued.add((job_id, index))
+            self._queue.put_nowait((job_id, index))
+
+    async def _sweep(self) -> None:
+        while True:
+            claimable = await asyncio.to_thread(self.store.claimable, self.lease_seconds)
+            for job_id, index in claimable:
+                self._enqueue(job_id, index)
+            await asyncio.sleep(self.lease_seconds)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, index = await self._queue.get()
+            self._queued.discard((job_id, index))
+            try:
+                job = await asyncio.to_thread(
+                    self.store.claim_file, job_id, index, self.owner, self.lease_seconds
+                )
+                if job is not None:
+                    await self._ingest_file(job_id, index, job["files"][index])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in ingestion job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _report_progress(self, job_id: str, index: int, progress: IngestionProgress) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval_s)
+            owned = await asyncio.to_thread(
+                self.store.heartbeat, job_id, index, self.owner, progress.model_dump()
+            )
+            if not owned:
+                logger.warning(f"Lost the lease on file {index} of ingestion job {job_id}")
+                return
+
+    async def _ingest_file(self, job_id: str, index: int, file: Dict[str, Any]) -> None:
+        progress = IngestionProgress(file_name=file["file_name"])
+        reporter = asyncio.create_task(self._report_progress(job_id, index, progress))
+
+        try:
+            with open(file["path"], "rb") as f:
+                content = f.read()
+
+            await ingest_document_async(
+                file_name=file["file_name"],
+                file_type=file["file_type"],
+                file_content=content,
+                progress=progress
+            )
+            invalidate_response_cache()
+
+            chunks_stored = progress.points_upserted + progress.chunks_unchanged
+            document_id = register_document(
+                file_name=file["file_name"],
+                file_type=file["file_type"],
+                chunks_count=chunks_stored,
+                language=progress.language if chunks_stored else "unknown",
+                file_size_bytes=file["file_size_bytes"]
+            )
+            await asyncio.to_thread(
+                self.store.update_file, job_id, index,
+                status="completed",
+                document_id=document_id,
+                progress=progress.model_dump()
+            )
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error ingesting {file['file_name']} in job {job_id}: {e}")
+            await asyncio.to_thread(
+                self.store.update_file, job_id, index,
+                status="failed",
+                error=str(e),
+                progress=progress.model_dump()
+            )
+
+        finally:
+            reporter.cancel()
+
+        # Only reached once the file is finished; cancelled files keep their upload
+        if os.path.exists(file["path"]):
+            os.remove(file["path"])
+
+
+# Global job manager instance
+_job_manager: IngestionJobManager | None = None
+
+
+def get_job_manager() -> IngestionJobManager:
+    """Get or initialize the ingestion job manager."""
+    global _job_manager
+
+    if _job_manager is None:
+        settings = get_settings()
+        _job_manager = IngestionJobManager(
+            store=JobStore(settings.ingestion_job_db_path),
+            upload_dir=settings.ingestion_upload_dir,
+            concurrency=settings.ingestion_job_concurrency,
+            lease_seconds=settings.ingestion_job_lease_seconds
+        )
+
+    return _job_manager
+
+
+async def start_job_manager() -> None:
+    """Start the ingestion job workers."""
+    await get_job_manager().start()
+
+
+async def stop_job_manager() -> None:
+    """Stop the ingestion job workers and close the job store."""
+    global _job_manager
+
+    if _job_manager is not None:
+        await _job_manager.stop()
+        _job_manager.store.close()
+        _job_manager = None
@@ -0,0 +1,210 @@
+"""Staged, streaming document ingestion pipeline."""
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import time
+from app.config import get_settings
+from app.models import ChunkBatch, IngestionProgress
+from app.services.document_processor import iter_document_pages, chunk_text, get_extraction_pool
+from app.services.vector_db import (
+    add_chunk_batch_async, update_total_chunks_async, get_chunk_hashes_async,
+    delete_stale_chunks_async, content_hash
+)
+from app.utils.embeddings import encode_embeddings_async
+from app.utils.language import detect_language
+from app.utils.sparse import sparse_vector
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Marks the end of a stage's output
+_END = object()
+
+
+async def _iter_pages_async(
+    file_content: bytes,
+    file_type: str
+) -> AsyncIterator[Tuple[Optional[int], str]]:
+    """Yield extracted pages without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    executor = get_extraction_pool() if file_type.lower() == "pdf" else None
+    pages = iter_document_pages(file_content, file_type, executor=executor)
+
+    try:
+        while (page := await loop.run_in_executor(None, next, pages, _END)) is not _END:
+            yield page
+    finally:
+        try:
+            pages.close()
+        except ValueError:
+            # Cancelled while a worker thread is still advancing the generator
+            pass
+
+
+async def ingest_document_async(
+    file_name: str,
+    file_type: str,
+    file_content: bytes,
+    language: Optional[str] = None,
+    progress: Optional[IngestionProgress] = None
+) -> IngestionProgress:
+    """
+    Ingest a document through a bounded extract -> chunk -> embed -> upsert pipeline.
+
+    Pages are extracted lazily (PDF page ranges in parallel on a process
+    pool) and chunked one page at a time, so chunks keep their page number.
+    Chunks move between stages in batches of INGESTION_BATCH_SIZE over
+    queues holding at most INGESTION_QUEUE_SIZE batches, so a slow stage
+    applies backpressure to the ones before it and peak memory is set by the
+    batch size rather than the document size.
+
+    Chunks whose content hash matches the stored chunk at the same index are
+    neither re-embedded nor re-upserted, so re-ingesting an edited document
+    only pays for the chunks that changed.
+
+    Args:
+        file_name: Name of the file
+        file_type: Type of file
+        file_content: File content as bytes
+        language: Optional language code
+        progress: Optional progress object updated in place as stages advance
+
+    Returns:
+        Final progress for the document
+    """
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    progress = progress or IngestionProgress(file_name=file_name)
+    progress.language = language
+    start_time = time.time()
+
+    logger.info(f"Ingesting document: {file_name}")
+
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ingestion_queue_size)
+    upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ingestion_queue_size)
+    timestamp = datetime.utcnow()
+    stored_hashes = await get_chunk_hashes_async(file_name)
+
+    # Stages 1 and 2: extraction and chunking
+    async def produce_chunks() -> None:
+        nonlocal language
+        batch: List[Tuple[Optional[int], str]] = []
+        # Pages held back until enough text is seen to detect the language
+        held: List[Tuple[Optional[int], str]] = []
+        held_chars = 0
+
+        async def emit(page_number: Optional[int], page_text: str) -> None:
+            nonlocal batch
+            if not page_text.strip():
+                return
+            # Tokenizing is CPU-bound, so chunk each page off the event loop
+            chunks = await loop.run_in_executor(None, chunk_text, page_text)
+            for chunk in chunks:
+                batch.append((page_number, chunk))
+                progress.chunks_created += 1
+                if len(batch) >= settings.ingestion_batch_size:
+                    await embed_queue.put(batch)
+                    batch = []
+
+        async def release_held() -> None:
+            nonlocal language
+            if not language:
+                sample = "\n".join(text for _, text in held)[:settings.language_detection_sample_chars]
+                language, confidence = await loop.run_in_executor(None, detect_language, sample)
+                logger.info(f"Detected language: {language} (confidence: {confidence:.2f})")
+                progress.language = language
+            for page in held:
+                await emit(*page)
+            held.clear()
+
+        stage_start = time.time()
+        async for page_number, page_text in _iter_pages_async(file_content, file_type):
+            progress.extraction_time_ms += (time.time() - stage_start) * 1000
+            progress.pages_extracted += 1
+
+            if language:
+                await emit(page_number, page_text)
+            else:
+                held.append((page_number, page_text))
+                held_chars += len(page_text)
+                if held_chars >= settings.language_detection_sample_chars:
+                    await release_held()
+
+            stage_start = time.time()
+
+        if held or not language:
+            await release_held()
+        if batch:
+            await embed_queue.put(batch)
+        await embed_queue.put(_END)
+
+    # Stage 3: embedding
+    async def embed_chunks() -> None:
+        chunk_index = 0
+        while (batch := await embed_queue.get()) is not _END:
+            changed = []
+            for page_number, content in batch:
+                chunk_hash = content_hash(content)
+                if stored_hashes.get(chunk_index) == chunk_hash:
+                    progress.chunks_unchanged += 1
+                else:
+                    changed.append((chunk_index, page_number, content, chunk_hash))
+                chunk_index += 1
+            if not changed:
+                continue
+
+            texts = [content for _, _, content, _ in changed]
+            stage_start = time.time()
+            embeddings, sparse_vectors = await asyncio.gather(
+                encode_embeddings_async(texts),
+                loop.run_in_executor(None, lambda: [sparse_vector(text) for text in texts])
+            )
+            progress.embedding_time_ms += (time.time() - stage_start) * 1000
+
+            chunk_batch = ChunkBatch(
+                source=file_name,
+                file_type=file_type,
+                language=language,
+                timestamp=timestamp,
+                chunk_indices=[index for index, _, _, _ in changed],
+                contents=texts,
+                embeddings=embeddings,
+                page_numbers=[page_number for _, page_number, _, _ in changed],
+                content_hashes=[chunk_hash for _, _, _, chunk_hash in changed],
+                sparse_vectors=sparse_vectors
+            )
+
+            progress.chunks_embedded += len(chunk_batch)
+            await upsert_queue.put(chunk_batch)
+        await upsert_queue.put(_END)
+
+    # Stage 4: upsert
+    async def upsert_chunks() -> None:
+        while (chunk_batch := await upsert_queue.get()) is not _END:
+            stage_start = time.time()
+            progress.points_upserted += await add_chunk_batch_async(chunk_batch)
+            progress.upsert_time_ms += (time.time() - stage_start) * 1000
+
+    stages = [
+        asyncio.create_task(produce_chunks()),
+        asyncio.create_task(embed_chunks()),
+        asyncio.create_task(upsert_chunks()),
+    ]
+    try:
+        await asyncio.gather(*stages)
+    except Exception as e:
+        logger.error(f"Error ingesting {file_name}: {e}")
+        for stage in stages:
+            stage.cancel()
+        raise
+
+    await delete_stale_chunks_async(file_name, progress.chunks_created)
+    if progress.points_upserted or progress.chunks_unchanged:
+        await update_total_chunks_async(file_name, progress.chunks_created)
+
+    progress.total_time_ms = (time.time() - start_time) * 1000
+    logger.info(
+        f"Ingested {progress.points_upserted} chunks from {file_name} "
+        f"({progress.chunks_unchanged} unchanged) in {progress.total_time_ms:.2f}ms"
+    )
+    return progress
@@ -1,26 +1,186 @@
 """LLM service using Ollama."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Iterator, List
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import json
+import threading
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+from requests.adapters import HTTPAdapter
+import httpx
+from tenacity import (
+    AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+)
 from app.config import get_settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Ollama responses worth retrying: overload and temporary unavailability
+_TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class OllamaBusyError(TimeoutError):
+    """No generation slot became free within OLLAMA_QUEUE_TIMEOUT."""
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Check whether a failed Ollama request is worth retrying."""
+    if isinstance(error, (httpx.TransportError, requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, (httpx.HTTPStatusError, requests.HTTPError)):
+        return error.response is not None and error.response.status_code in _TRANSIENT_STATUS_CODES
+    return False
+
 
 class OllamaClient:
-    """Client for interacting with Ollama."""
+    """
+    Client for interacting with Ollama.
+    
+    Sync and async calls each reuse one pool of keep-alive connections. At
+    most OLLAMA_MAX_PARALLEL_REQUESTS generations run at once, matching what
+    the server can run in parallel; further ones wait up to
+    OLLAMA_QUEUE_TIMEOUT for a slot instead of queueing inside Ollama and
+    timing out together.
+    """
     
     def __init__(self):
         """Initialize Ollama client."""
         self.settings = get_settings()
         self.base_url = self.settings.ollama_base_url
         self.model = self.settings.ollama_model
+        self._session: requests.Session | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._slots = threading.BoundedSemaphore(self.settings.ollama_max_parallel_requests)
+        self._async_slots: asyncio.Semaphore | None = None
+        
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+    
+    def _get_session(self) -> requests.Session:
+        """Get or create the pooled sync HTTP session."""
+        if self._session is None:
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.settings.ollama_max_connections
+            )
+            self._session = requests.Session()
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled async HTTP client."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.settings.ollama_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.settings.ollama_max_connections,
+                    max_keepalive_connections=self.settings.ollama_max_connections
+                )
+            )
+        return self._async_client
+    
+    def _retry_policy(self) -> Dict[str, Any]:
+        """Build tenacity arguments from OLLAMA_RETRY_ATTEMPTS and OLLAMA_RETRY_DELAY."""
+        delay = self.settings.ollama_retry_delay
+        return {
+            "stop": stop_after_attempt(self.settings.ollama_retry_attempts),
+            "wait": wait_exponential(multiplier=delay, min=delay, max=10 * delay),
+            "retry": retry_if_exception(_is_transient),
+            "before_sleep": lambda state: logger.warning(
+                f"Retrying Ollama request after error: {state.outcome.exception()}"
+            ),
+            "reraise": True,
+        }
+    
+    def _queue_timeout_error(self) -> OllamaBusyError:
+        """Count and build the error for a request that found no free slot."""
+        self.rejected += 1
+        return OllamaBusyError(
+            f"No Ollama generation slot free within {self.settings.ollama_queue_timeout}s "
+            f"({self.settings.ollama_max_parallel_requests} in flight)"
+        )
+    
+    @contextmanager
+    def _generation_slot(self) -> Iterator[None]:
+        """Hold one of the generation slots, waiting up to the queue timeout."""
+        self.queued += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.settings.ollama_queue_timeout)
+        finally:
+            self.queued -= 1
+        if not acquired:
+            raise self._queue_timeout_error()
+        
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+    
+    @asynccontextmanager
+    async def _generation_slot_async(self) -> AsyncIterator[None]:
+        """Hold one of the generation slots without blocking the event loop."""
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.settings.ollama_max_parallel_requests)
+        slots = self._async_slots
+        
+        self.queued += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.settings.ollama_queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._queue_timeout_error() from None
+        finally:
+            self.queued -= 1
+        
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            slots.release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get generation concurrency statistics."""
+        return {
+            "max_parallel_requests": self.settings.ollama_max_parallel_requests,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+    
+    def _build_generate_payload(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        context: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the request body for the /api/generate endpoint.
+        
+        keep_alive keeps the model and its KV cache loaded between requests.
+        A context returned by an earlier generation continues that
+        conversation, so only the new prompt's tokens are prefilled.
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "temperature": temperature or self.settings.ollama_temperature,
+            "top_p": top_p or self.settings.ollama_top_p,
+            "num_predict": max_tokens or self.settings.ollama_max_tokens,
+            "stream": stream,
+            "keep_alive": self.settings.ollama_keep_alive,
+        }
+        if context:
+            payload["context"] = context
+        return payload
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
     def generate(
         self,
         prompt: str,
@@ -39,28 +199,25 @@ class OllamaClient:
             
         Returns:
             Generated text
+            
+        Raises:
+            OllamaBusyError: If no generation slot frees up in time
         """
-        temperature = temperature or self.settings.ollama_temperature
-        top_p = top_p or self.settings.ollama_top_p
-        max_tokens = max_tokens or self.settings.ollama_max_tokens
+        session = self._get_session()
+        payload = self._build_generate_payload(prompt, temperature, top_p, max_tokens)
         
         try:
             logger.debug(f"Generating text with model: {self.model}")
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "num_predict": max_tokens,
-                    "stream": False,
-                },
-                timeout=self.settings.ollama_timeout
-            )
+            for attempt in Retrying(**self._retry_policy()):
+                with attempt, self._generation_slot():
+                    response = session.post(
+                        f"{self.base_url}/api/generate",
+                        json=payload,
+                        timeout=self.settings.ollama_timeout
+                    )
+                    response.raise_for_status()
             
-            response.raise_for_status()
             result = response.json()
             
             generated_text = result.get("response", "").strip()
@@ -75,10 +232,137 @@ class OllamaClient:
             logger.error(f"Unexpected error in LLM generation: {e}")
             raise
     
+    async def generate_async(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Generate text using Ollama without blocking the event loop.
+        
+        Args:
+            prompt: Input prompt
+            temperature: Sampling temperature
+            top_p: Top-p sampling parameter
+            max_tokens: Maximum tokens to generate
+            
+        Returns:
+            Generated text
+            
+        Raises:
+            OllamaBusyError: If no generation slot frees up in time
+        """
+        result = await self.generate_result_async(prompt, temperature, top_p, max_tokens)
+        return result.get("response", "").strip()
+    
+    async def generate_result_async(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        context: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate text using Ollama and return its full response body.
+        
+        Args:
+            prompt: Input prompt
+            temperature: Sampling temperature
+            top_p: Top-p sampling parameter
+            max_tokens: Maximum tokens to generate
+            context: Context of an earlier generation to continue
+            
+        Returns:
+            Ollama response with the "response" text, the "context" to
+            continue from and the prompt and generation token counts
+            
+        Raises:
+            OllamaBusyError: If no generation slot frees up in time
+        """
+        client = self._get_async_client()
+        payload = self._build_generate_payload(
+            prompt, temperature, top_p, max_tokens, context=context
+        )
+        
+        try:
+            logger.debug(f"Generating text with model: {self.model}")
+            
+            async for attempt in AsyncRetrying(**self._retry_policy()):
+                with attempt:
+                    async with self._generation_slot_async():
+                        response = await client.post("/api/generate", json=payload)
+                        response.raise_for_status()
+            
+            result = response.json()
+            logger.debug(f"Generated {len(result.get('response', ''))} characters")
+            
+            return result
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Error calling Ollama: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in LLM generation: {e}")
+            raise
+    
+    async def generate_stream_async(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        context: Optional[List[int]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a generation from Ollama as it is produced.
+        
+        Args:
+            prompt: Input prompt
+            temperature: Sampling temperature
+            top_p: Top-p sampling parameter
+            max_tokens: Maximum tokens to generate
+            context: Context of an earlier generation to continue
+            
+        Yields:
+            Ollama stream chunks; each has a "response" token and the last
+            one has "done" set to True and the "context" to continue from
+            
+        Raises:
+            OllamaBusyError: If no generation slot frees up in time
+        """
+        client = self._get_async_client()
+        payload = self._build_generate_payload(
+            prompt, temperature, top_p, max_tokens, stream=True, context=context
+        )
+        
+        try:
+            logger.debug(f"Streaming text with model: {self.model}")
+            
+            # Not retried: tokens may already have reached the caller
+            async with self._generation_slot_async(), \
+                    client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    yield chunk
+                    if chunk.get("done"):
+                        break
+                        
+        except httpx.HTTPError as e:
+            logger.error(f"Error streaming from Ollama: {e}")
+            raise
+    
     def check_health(self) -> bool:
         """Check if Ollama is running and accessible."""
         try:
-            response = requests.get(
+            response = self._get_session().get(
                 f"{self.base_url}/api/tags",
                 timeout=5
             )
@@ -87,10 +371,19 @@ class OllamaClient:
             logger.warning(f"Ollama health check failed: {e}")
             return False
     
+    async def check_health_async(self) -> bool:
+        """Check if Ollama is running and accessible without blocking."""
+        try:
+            response = await self._get_async_client().get("/api/tags", timeout=5)
+            return response.status_code == 200
+        except Exception as e:
+            logger.warning(f"Ollama health check failed: {e}")
+            return False
+    
     def list_models(self) -> list:
         """List available models in Ollama."""
         try:
-            response = requests.get(
+            response = self._get_session().get(
                 f"{self.base_url}/api/tags",
                 timeout=5
             )
@@ -100,6 +393,17 @@ class OllamaClient:
         except Exception as e:
             logger.error(f"Error listing models: {e}")
             return []
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP clients."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        # The semaphore belongs to the closing event loop
+        self._async_slots = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
 
 # Global Ollama client instance
@@ -116,6 +420,12 @@ def get_ollama_client() -> OllamaClient:
     return _ollama_client
 
 
+async def close_ollama_client() -> None:
+    """Close the global Ollama client's pooled connections."""
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+
+
 def generate_text(
     prompt: str,
     temperature: Optional[float] = None,
@@ -142,3 +452,94 @@ def generate_text(
         max_tokens=max_tokens
     )
 
+
+async def generate_text_async(
+    prompt: str,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Generate text using the LLM without blocking the event loop.
+    
+    Args:
+        prompt: Input prompt
+        temperature: Sampling temperature
+        top_p: Top-p sampling parameter
+        max_tokens: Maximum tokens to generate
+        
+    Returns:
+        Generated text
+    """
+    client = get_ollama_client()
+    return await client.generate_async(
+        prompt=prompt,
+        temperature=temperature,
+        top_p=top_p,
+        max_tokens=max_tokens
+    )
+
+
+def generation_stats(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the token counts and timings of a finished Ollama generation.
+    
+    Ollama leaves out zero counts, e.g. prompt_eval_count when the whole
+    prompt was already in its KV cache.
+    
+    Args:
+        result: Response body, or the final stream chunk
+        
+    Returns:
+        Prompt and generated token counts, and prefill, generation and model
+        load times in milliseconds
+    """
+    def milliseconds(field: str) -> float:
+        return round(result.get(field, 0) / 1e6, 3)
+    
+    return {
+        "prompt_tokens": result.get("prompt_eval_count", 0),
+        "prefill_ms": milliseconds("prompt_eval_duration"),
+        "generated_tokens": result.get("eval_count", 0),
+        "generation_ms": milliseconds("eval_duration"),
+        "load_ms": milliseconds("load_duration"),
+    }
+
+
+async def generate_result_async(
+    prompt: str,
+    context: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Generate text using the LLM, returning Ollama's full response.
+    
+    Args:
+        prompt: Input prompt
+        context: Context returned by an earlier generation to continue, if any
+        
+    Returns:
+        Ollama response with the "response" text, the "context" to continue
+        from and the token counts and timings read by generation_stats
+    """
+    client = get_ollama_client()
+    return await client.generate_result_async(prompt=prompt, context=context)
+
+
+async def stream_chunks_async(
+    prompt: str,
+    context: Optional[List[int]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream Ollama's chunks for a generation as they are produced.
+    
+    Args:
+        prompt: Input prompt
+        context: Context returned by an earlier generation to continue, if any
+        
+    Yields:
+        Ollama stream chunks; the last one carries the "context" to continue
+        from and the token counts and timings read by generation_stats
+    """
+    client = get_ollama_client()
+    async for chunk in client.generate_stream_async(prompt=prompt, context=context):
+        yield chunk
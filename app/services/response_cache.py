@@ -0,0 +1,238 @@
+"""Response cache for the agent orchestrator."""
+from typing import Any, Dict, Optional
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import threading
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.embeddings import normalize_query
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheBackend(ABC):
+    """Key/value store used by the response cache."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if missing or expired."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """Store a value with an expiry."""
+        pass
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Atomically increment a counter and return its new value."""
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend statistics."""
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU backend."""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        """
+        Initialize backend.
+
+        Args:
+            max_size: Maximum number of cached responses
+            ttl_seconds: Default entry lifetime in seconds
+        """
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if missing or expired."""
+        if key in self._counters:
+            return str(self._counters[key])
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """Store a value with an expiry."""
+        self._cache.set(key, value, ttl_seconds=ttl_seconds)
+
+    def incr(self, key: str) -> int:
+        """Atomically increment a counter and return its new value."""
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend statistics."""
+        return self._cache.get_stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend for any client exposing the Redis get/set/incr commands.
+
+    Entries are shared between API workers, so one worker's invalidation
+    applies to all of them.
+    """
+
+    def __init__(self, client: Any):
+        """
+        Initialize backend.
+
+        Args:
+            client: Redis-compatible client (redis.Redis or a local fake)
+        """
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        """Create a backend connected to a Redis server."""
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(
+                "RESPONSE_CACHE_BACKEND=redis requires the 'redis' package"
+            ) from e
+        return cls(redis.Redis.from_url(url, decode_responses=True))
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if missing or expired."""
+        value = self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """Store a value with an expiry."""
+        self.client.set(key, value, ex=ttl_seconds or None)
+
+    def incr(self, key: str) -> int:
+        """Atomically increment a counter and return its new value."""
+        return int(self.client.incr(key))
+
+
+class ResponseCache:
+    """
+    Caches final orchestrator responses.
+
+    Keys combine the normalized query, language, top_k and validation flag
+    with the current corpus generation. Bumping the generation on ingest or
+    delete makes every earlier entry unreachable; they then age out by TTL
+    or LRU eviction.
+    """
+
+    GENERATION_KEY = "generation"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int, namespace: str = "rag:response"):
+        """
+        Initialize cache.
+
+        Args:
+            backend: Storage backend
+            ttl_seconds: Entry lifetime in seconds
+            namespace: Prefix for all keys written to the backend
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def get_generation(self) -> int:
+        """Get the current corpus generation."""
+        value = self.backend.get(f"{self.namespace}:{self.GENERATION_KEY}")
+        return int(value) if value else 0
+
+    def invalidate(self) -> int:
+        """Invalidate all cached responses by bumping the corpus generation."""
+        generation = self.backend.incr(f"{self.namespace}:{self.GENERATION_KEY}")
+        logger.info(f"Response cache invalidated (generation {generation})")
+        return generation
+
+    def make_key(self, generation: int, **request: Any) -> str:
+        """Build the backend key for a request."""
+        if "query" in request:
+            request["query"] = normalize_query(request["query"]).casefold()
+        digest = hashlib.sha256(
+            json.dumps(request, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{self.namespace}:{generation}:{digest}"
+
+    def get(self, generation: int, **request: Any) -> Optional[Dict[str, Any]]:
+        """Get a cached response for a request at a corpus generation."""
+        value = self.backend.get(self.make_key(generation, **request))
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, generation: int, response: Dict[str, Any], **request: Any) -> None:
+        """
+        Cache a response for a request.
+
+        Pass the generation read before the request was processed, so a
+        response computed while the corpus changed is never stored under
+        the new generation.
+        """
+        self.backend.set(
+            self.make_key(generation, **request),
+            json.dumps(response, default=str),
+            self.ttl_seconds
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "generation": self.get_generation(),
+            "backend": self.backend.get_stats(),
+        }
+
+
+# Global response cache instance
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or initialize the response cache."""
+    global _response_cache
+
+    if _response_cache is None:
+        settings = get_settings()
+
+        if settings.response_cache_backend == "redis":
+            logger.info(f"Using Redis response cache at {settings.redis_url}")
+            backend: CacheBackend = RedisCacheBackend.from_url(settings.redis_url)
+        elif settings.response_cache_backend == "memory":
+            backend = InMemoryCacheBackend(
+                max_size=settings.response_cache_size,
+                ttl_seconds=settings.cache_ttl_seconds
+            )
+        else:
+            raise ValueError(
+                f"Unsupported response cache backend: {settings.response_cache_backend}"
+            )
+
+        _response_cache = ResponseCache(backend=backend, ttl_seconds=settings.cache_ttl_seconds)
+
+    return _response_cache
+
+
+def invalidate_response_cache() -> None:
+    """Invalidate cached responses after the corpus changes."""
+    if not get_settings().enable_caching:
+        return
+
+    try:
+        get_response_cache().invalidate()
+    except Exception as e:
+        logger.error(f"Error invalidating response cache: {e}")
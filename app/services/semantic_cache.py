@@ -0,0 +1,192 @@
+"""Semantic answer cache for paraphrased queries."""
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+import numpy as np
+from app.config import get_settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SemanticCache:
+    """
+    Reuses answers for queries whose embeddings are close to a past query.
+
+    Past query embeddings are kept L2-normalized in a fixed-capacity matrix,
+    so a lookup is one matrix-vector product over the live slots. Entries
+    are scoped by response language and request options, and tagged with
+    the corpus generation they were answered at; entries from an older
+    generation never match.
+    Dead, stale and expired slots are reused first, then the least recently
+    used one.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, threshold: float):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of cached answers
+            ttl_seconds: Entry lifetime in seconds (0 disables expiry)
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        self._vectors: Optional[np.ndarray] = None
+        self._live = np.zeros(max_size, dtype=bool)
+        self._expires_at = np.zeros(max_size, dtype=np.float64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._generations = np.zeros(max_size, dtype=np.int64)
+        self._languages: List[Optional[str]] = [None] * max_size
+        self._scopes: List[Optional[str]] = [None] * max_size
+        self._queries: List[Optional[str]] = [None] * max_size
+        self._responses: List[Optional[Dict[str, Any]]] = [None] * max_size
+
+        self.lookups = 0
+        self.hits = 0
+        self.total_hit_similarity = 0.0
+
+    def lookup(
+        self,
+        embedding: List[float],
+        language: Optional[str],
+        generation: int,
+        scope: Optional[str] = None
+    ) -> Optional[Tuple[Dict[str, Any], float, str]]:
+        """
+        Find a cached answer for a paraphrase of the query.
+
+        Args:
+            embedding: Query embedding
+            language: Requested response language
+            generation: Current corpus generation
+            scope: Request options (filters, top_k, validation) the answer
+                must have been computed with
+
+        Returns:
+            Tuple of (response, similarity, matched query), or None on miss
+        """
+        with self._lock:
+            self.lookups += 1
+            if self._vectors is None:
+                return None
+
+            now = time.monotonic()
+            candidates = self._live & (self._generations == generation)
+            if self.ttl_seconds:
+                candidates &= self._expires_at >= now
+            candidates &= np.array([
+                lang == language and slot_scope == scope
+                for lang, slot_scope in zip(self._languages, self._scopes)
+            ])
+
+            slots = np.flatnonzero(candidates)
+            if slots.size == 0:
+                return None
+
+            similarities = self._vectors[slots] @ self._normalize(embedding)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+
+            slot = slots[best]
+            self._last_used[slot] = now
+            self.hits += 1
+            self.total_hit_similarity += similarity
+            return dict(self._responses[slot]), similarity, self._queries[slot]
+
+    def add(
+        self,
+        embedding: List[float],
+        language: Optional[str],
+        generation: int,
+        query: str,
+        response: Dict[str, Any],
+        scope: Optional[str] = None
+    ) -> None:
+        """
+        Cache the answer to a query.
+
+        Args:
+            embedding: Query embedding
+            language: Requested response language
+            generation: Corpus generation the answer was computed at
+            query: Query text
+            response: Orchestrator response to reuse
+            scope: Request options the answer was computed with
+        """
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+
+            slot = self._free_slot(generation)
+            now = time.monotonic()
+            self._vectors[slot] = vector
+            self._live[slot] = True
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+            self._generations[slot] = generation
+            self._languages[slot] = language
+            self._scopes[slot] = scope
+            self._queries[slot] = query
+            self._responses[slot] = response
+
+    def clear(self) -> None:
+        """Remove all cached answers."""
+        with self._lock:
+            self._live[:] = False
+            self._responses = [None] * self.max_size
+
+    def _free_slot(self, generation: int) -> int:
+        """Pick a dead, stale or expired slot, else evict the least recently used."""
+        reusable = ~self._live | (self._generations != generation)
+        if self.ttl_seconds:
+            reusable |= self._expires_at < time.monotonic()
+        free = np.flatnonzero(reusable)
+        if free.size:
+            return int(free[0])
+        return int(np.argmin(self._last_used))
+
+    def _normalize(self, embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "size": int(self._live.sum()),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "avg_hit_similarity": self.total_hit_similarity / self.hits if self.hits else 0.0,
+        }
+
+
+# Global semantic cache instance
+_semantic_cache: SemanticCache | None = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or initialize the semantic cache."""
+    global _semantic_cache
+
+    if _semantic_cache is None:
+        settings = get_settings()
+        _semantic_cache = SemanticCache(
+            max_size=settings.semantic_cache_size,
+            ttl_seconds=settings.cache_ttl_seconds,
+            threshold=settings.semantic_cache_threshold
+        )
+
+    return _semantic_cache
@@ -0,0 +1,102 @@
+"""Server-side conversation state for multi-turn queries."""
+from typing import Any, Dict, List
+from dataclasses import dataclass, field
+import asyncio
+import threading
+from app.config import get_settings
+from app.utils.cache import TTLCache
+
+
+@dataclass
+class ConversationSession:
+    """
+    State carried from one turn of a conversation to the next.
+
+    context is the Ollama token context returned by the previous turn.
+    Sending it back continues the conversation from the model's KV cache,
+    so a follow-up only prefills its own new tokens. document_ids lists the
+    documents already in that context, in the order they were numbered.
+    """
+    session_id: str
+    context: List[int] = field(default_factory=list)
+    document_ids: List[str] = field(default_factory=list)
+    turns: int = 0
+    # Turns of one session run one at a time, each continuing the last
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def reset(self) -> None:
+        """Forget the model context so the next turn starts a fresh prompt."""
+        self.context = []
+        self.document_ids = []
+
+
+class SessionStore:
+    """Conversation sessions, dropped after an idle timeout or when least recently used."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Initialize store.
+
+        Args:
+            max_size: Maximum number of sessions kept
+            ttl_seconds: Idle time after which a session expires
+        """
+        self._sessions = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def get_or_create(self, session_id: str) -> ConversationSession:
+        """Get a session, starting a new one if it is unknown or expired."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ConversationSession(session_id)
+                self.created += 1
+            # Storing it again restarts its idle timeout
+            self._sessions.set(session_id, session)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """
+        End a session.
+
+        Returns:
+            Whether the session existed
+        """
+        with self._lock:
+            existed = self._sessions.get(session_id) is not None
+            self._sessions.delete(session_id)
+            return existed
+
+    def clear(self) -> None:
+        """End all sessions."""
+        self._sessions.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session statistics."""
+        stats = self._sessions.get_stats()
+        return {
+            "active": stats["size"],
+            "max_size": stats["max_size"],
+            "created": self.created,
+            "evictions": stats["evictions"],
+            "expirations": stats["expirations"],
+        }
+
+
+# Global session store instance
+_session_store: SessionStore | None = None
+
+
+def get_session_store() -> SessionStore:
+    """Get or initialize the session store."""
+    global _session_store
+
+    if _session_store is None:
+        settings = get_settings()
+        _session_store = SessionStore(
+            max_size=settings.session_max_count,
+            ttl_seconds=settings.session_ttl_seconds
+        )
+
+    return _session_store
@@ -1,67 +1,399 @@
 """Vector database service using Qdrant."""
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union, Callable, Awaitable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import uuid
+import grpc
+from tenacity import (
+    AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+)
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, ScoredPoint,
+    Range, DatetimeRange, PayloadSchemaType, IsEmptyCondition, PayloadField, SparseVectorParams, SparseVector, Modifier,
+    CollectionInfo, Batch, HnswConfigDiff, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, QueryRequest
+)
 from app.config import get_settings
 from app.utils.logger import get_logger
-from app.models import DocumentChunk, DocumentMetadata
+from app.models import ChunkBatch, DocumentChunk, DocumentMetadata, QueryFilters
+from app.utils.sparse import sparse_vector, query_sparse_vector
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+# Namespace for point ids derived from a chunk's source and index
+_POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "multilingual-agentic-rag/chunks")
+
+# Name of the BM25 sparse vector stored next to the unnamed dense vector
+SPARSE_VECTOR_NAME = "bm25"
+
+# Payload fields searches filter on, indexed so filtered HNSW search stays fast
+_PAYLOAD_INDEXES = {
+    "language": PayloadSchemaType.KEYWORD,
+    "source": PayloadSchemaType.KEYWORD,
+    "file_type": PayloadSchemaType.KEYWORD,
+    "original_filename": PayloadSchemaType.KEYWORD,
+    "timestamp": PayloadSchemaType.DATETIME,
+}
+
+# Whether the collection has the sparse vector (None until checked);
+# collections created before hybrid search was added do not
+_sparse_vectors_enabled: Optional[bool] = None
+
+# Whether each client has confirmed the collection exists. Cleared when the
+# collection is deleted or found missing; embedded Qdrant gives the sync and
+# async clients separate data, so they are tracked apart
+_collection_ready = False
+_async_collection_ready = False
+
+# Upload failures worth retrying: overload and temporary unavailability
+_TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+_TRANSIENT_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED, grpc.StatusCode.RESOURCE_EXHAUSTED
+}
+
 # Global Qdrant client instance
 _qdrant_client: QdrantClient | None = None
 
+# Global async Qdrant client instance used on the query path
+_async_qdrant_client: AsyncQdrantClient | None = None
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    """Build connection arguments shared by the sync and async clients."""
+    settings = get_settings()
+    
+    if settings.qdrant_location == ":memory:":
+        return {"location": ":memory:"}
+    if settings.qdrant_location:
+        return {"path": settings.qdrant_location}
+    
+    return {
+        "host": settings.qdrant_host,
+        "port": settings.qdrant_port,
+        "api_key": settings.qdrant_api_key if settings.qdrant_api_key else None,
+        "timeout": settings.qdrant_timeout,
+        "prefer_grpc": settings.qdrant_prefer_grpc,
+        "grpc_port": settings.qdrant_grpc_port
+    }
+
+
+def _describe_location() -> str:
+    """Describe where the clients connect, for logging."""
+    settings = get_settings()
+    if settings.qdrant_location:
+        return settings.qdrant_location
+    if settings.qdrant_prefer_grpc:
+        return f"{settings.qdrant_host}:{settings.qdrant_grpc_port} (gRPC)"
+    return f"{settings.qdrant_host}:{settings.qdrant_port}"
+
 
 def get_qdrant_client() -> QdrantClient:
     """Get or initialize the Qdrant client."""
     global _qdrant_client
     
     if _qdrant_client is None:
-        settings = get_settings()
-        logger.info(f"Connecting to Qdrant at {settings.qdrant_host}:{settings.qdrant_port}")
-        
-        _qdrant_client = QdrantClient(
-            host=settings.qdrant_host,
-            port=settings.qdrant_port,
-            api_key=settings.qdrant_api_key if settings.qdrant_api_key else None,
-            timeout=settings.qdrant_timeout
-        )
+        logger.info(f"Connecting to Qdrant at {_describe_location()}")
+        
+        _qdrant_client = QdrantClient(**_client_kwargs())
         
         logger.info("Connected to Qdrant successfully")
     
     return _qdrant_client
 
 
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Get or initialize the async Qdrant client."""
+    global _async_qdrant_client
+    
+    if _async_qdrant_client is None:
+        logger.info(f"Connecting async client to Qdrant at {_describe_location()}")
+        
+        _async_qdrant_client = AsyncQdrantClient(**_client_kwargs())
+    
+    return _async_qdrant_client
+
+
+async def close_async_qdrant_client() -> None:
+    """Close the async Qdrant client."""
+    global _async_qdrant_client, _async_collection_ready
+    
+    if _async_qdrant_client is not None:
+        await _async_qdrant_client.close()
+        _async_qdrant_client = None
+        _async_collection_ready = False
+
+
+def chunk_point_id(source: str, chunk_index: int) -> str:
+    """
+    Get the Qdrant point id of a document chunk.
+    
+    The id is a UUIDv5 of the source and chunk index, so it is the same in
+    every process and re-ingesting a document overwrites its points.
+    
+    Args:
+        source: Document source name
+        chunk_index: Index of the chunk within the document
+        
+    Returns:
+        Point id as a UUID string
+    """
+    return str(uuid.uuid5(_POINT_ID_NAMESPACE, f"{source}\x00{chunk_index}"))
+
+
+def content_hash(content: str) -> str:
+    """Get the hash stored with a chunk to detect changed content on re-ingestion."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _source_filter(source: str) -> Filter:
+    """Build a Qdrant filter matching every point of a source."""
+    return Filter(
+        must=[FieldCondition(key="source", match=MatchValue(value=source))]
+    )
+
+
+def _vectors_config() -> VectorParams:
+    """Build the vector configuration for the documents collection."""
+    settings = get_settings()
+    return VectorParams(
+        size=settings.qdrant_vector_size,
+        distance=Distance(settings.qdrant_distance_metric),
+        on_disk=settings.qdrant_on_disk_vectors
+    )
+
+
+def _quantization_config() -> ScalarQuantization | BinaryQuantization | None:
+    """
+    Build the quantization configuration for the dense vectors.
+    
+    Scalar (int8) quantization keeps a 4x smaller copy of each vector in RAM
+    and binary quantization a 32x smaller one; searches run on the quantized
+    copy and rescore the best candidates with the original vectors.
+    """
+    settings = get_settings()
+    
+    if settings.qdrant_quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    if settings.qdrant_quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _collection_config() -> Dict[str, Any]:
+    """Build the create_collection arguments for the documents collection."""
+    settings = get_settings()
+    return {
+        "vectors_config": _vectors_config(),
+        "sparse_vectors_config": _sparse_vectors_config(),
+        "hnsw_config": HnswConfigDiff(
+            m=settings.qdrant_hnsw_m,
+            ef_construct=settings.qdrant_hnsw_ef_construct
+        ),
+        "quantization_config": _quantization_config(),
+    }
+
+
+def _sparse_vectors_config() -> Dict[str, SparseVectorParams]:
+    """Build the sparse vector configuration; Qdrant applies IDF at query time."""
+    return {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def _missing_payload_indexes(collection_info: Optional[CollectionInfo]) -> Dict[str, PayloadSchemaType]:
+    """Get the payload indexes a collection lacks; embedded Qdrant has none."""
+    if get_settings().qdrant_location:
+        return {}
+    existing = collection_info.payload_schema if collection_info else {}
+    return {key: schema for key, schema in _PAYLOAD_INDEXES.items() if key not in existing}
+
+
+def _record_sparse_support(collection_info: CollectionInfo) -> None:
+    """Remember whether an existing collection can store sparse vectors."""
+    global _sparse_vectors_enabled
+    
+    sparse_vectors = collection_info.config.params.sparse_vectors or {}
+    _sparse_vectors_enabled = SPARSE_VECTOR_NAME in sparse_vectors
+    if not _sparse_vectors_enabled:
+        logger.warning(
+            f"Collection {get_settings().qdrant_collection_name} has no sparse vectors; "
+            "hybrid search is disabled until it is re-created"
+        )
+
+
 def ensure_collection_exists() -> None:
-    """Ensure the collection exists, create if not."""
+    """
+    Ensure the collection exists, create if not.
+    
+    Only the first call talks to Qdrant; later calls return immediately
+    until the collection is deleted or found missing.
+    """
+    global _sparse_vectors_enabled, _collection_ready
+    
+    if _collection_ready:
+        return
+    
     settings = get_settings()
     client = get_qdrant_client()
     
     try:
-        # Check if collection exists
-        collections = client.get_collections()
-        collection_names = [col.name for col in collections.collections]
-        
-        if settings.qdrant_collection_name not in collection_names:
+        if not client.collection_exists(settings.qdrant_collection_name):
             logger.info(f"Creating collection: {settings.qdrant_collection_name}")
             
             client.create_collection(
                 collection_name=settings.qdrant_collection_name,
-                vectors_config=VectorParams(
-                    size=settings.qdrant_vector_size,
-                    distance=Distance.COSINE
-                )
+                **_collection_config()
             )
+            _sparse_vectors_enabled = True
+            collection_info = None
             
             logger.info(f"Collection created: {settings.qdrant_collection_name}")
         else:
             logger.info(f"Collection already exists: {settings.qdrant_collection_name}")
+            collection_info = client.get_collection(settings.qdrant_collection_name)
+            if _sparse_vectors_enabled is None:
+                _record_sparse_support(collection_info)
+        
+        for key, schema in _missing_payload_indexes(collection_info).items():
+            logger.info(f"Creating payload index: {key}")
+            client.create_payload_index(settings.qdrant_collection_name, key, schema)
+        
+        _collection_ready = True
             
     except Exception as e:
         logger.error(f"Error ensuring collection exists: {e}")
         raise
 
 
+async def ensure_collection_exists_async() -> None:
+    """
+    Ensure the collection exists using the async client, create if not.
+    
+    Cached like ensure_collection_exists, so queries do not pay a round
+    trip for it.
+    """
+    global _sparse_vectors_enabled, _async_collection_ready
+    
+    if _async_collection_ready:
+        return
+    
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    try:
+        if not await client.collection_exists(settings.qdrant_collection_name):
+            logger.info(f"Creating collection: {settings.qdrant_collection_name}")
+            
+            await client.create_collection(
+                collection_name=settings.qdrant_collection_name,
+                **_collection_config()
+            )
+            _sparse_vectors_enabled = True
+            collection_info = None
+            
+            logger.info(f"Collection created: {settings.qdrant_collection_name}")
+        else:
+            collection_info = await client.get_collection(settings.qdrant_collection_name)
+            if _sparse_vectors_enabled is None:
+                _record_sparse_support(collection_info)
+        
+        for key, schema in _missing_payload_indexes(collection_info).items():
+            logger.info(f"Creating payload index: {key}")
+            await client.create_payload_index(settings.qdrant_collection_name, key, schema)
+        
+        _async_collection_ready = True
+            
+    except Exception as e:
+        logger.error(f"Error ensuring collection exists: {e}")
+        raise
+
+
+def _forget_collection() -> None:
+    """Clear the cached collection state so the next call checks Qdrant again."""
+    global _sparse_vectors_enabled, _collection_ready, _async_collection_ready
+    
+    _collection_ready = False
+    _async_collection_ready = False
+    _sparse_vectors_enabled = None
+
+
+def _is_missing_collection(error: BaseException) -> bool:
+    """Check whether a request failed because the collection does not exist."""
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 404
+    if isinstance(error, grpc.RpcError) and hasattr(error, "code"):
+        return error.code() == grpc.StatusCode.NOT_FOUND
+    # Embedded Qdrant
+    return isinstance(error, ValueError) and str(error).endswith("not found")
+
+
+def _with_collection(operation: Callable[[], T]) -> T:
+    """
+    Run an operation on the collection, re-creating it once if it was
+    deleted behind the cache's back (e.g. by another process).
+    """
+    ensure_collection_exists()
+    try:
+        return operation()
+    except Exception as e:
+        if not _is_missing_collection(e):
+            raise
+        logger.warning(f"Collection {get_settings().qdrant_collection_name} is missing, re-creating it")
+        _forget_collection()
+        ensure_collection_exists()
+        return operation()
+
+
+async def _with_collection_async(operation: Callable[[], Awaitable[T]]) -> T:
+    """Async version of _with_collection."""
+    await ensure_collection_exists_async()
+    try:
+        return await operation()
+    except Exception as e:
+        if not _is_missing_collection(e):
+            raise
+        logger.warning(f"Collection {get_settings().qdrant_collection_name} is missing, re-creating it")
+        _forget_collection()
+        await ensure_collection_exists_async()
+        return await operation()
+
+
+def validate_collection_schema() -> None:
+    """
+    Check the collection's dense vectors against QDRANT_VECTOR_SIZE and
+    QDRANT_DISTANCE_METRIC.
+    
+    Raises:
+        ValueError: If the collection was created with other vector parameters
+    """
+    settings = get_settings()
+    client = get_qdrant_client()
+    
+    vectors = client.get_collection(settings.qdrant_collection_name).config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors.get("")
+    if vectors is None:
+        raise ValueError(f"Collection {settings.qdrant_collection_name} has no unnamed dense vector")
+    
+    expected = _vectors_config()
+    if vectors.size != expected.size or vectors.distance != expected.distance:
+        raise ValueError(
+            f"Collection {settings.qdrant_collection_name} stores {vectors.size}-dimensional "
+            f"{vectors.distance.value} vectors, but settings expect {expected.size}-dimensional "
+            f"{expected.distance.value} vectors; re-create the collection and re-ingest"
+        )
+
+
 def add_documents(documents: List[DocumentChunk]) -> None:
     """
     Add documents to the vector database.
@@ -72,24 +404,344 @@ def add_documents(documents: List[DocumentChunk]) -> None:
     if not documents:
         return
     
-    settings = get_settings()
     client = get_qdrant_client()
     
     ensure_collection_exists()
     
-    # Prepare points for insertion
+    points = _documents_to_points(documents)
+    
+    if points:
+        logger.info(f"Adding {len(points)} points to Qdrant")
+        _with_collection(lambda: _upload_points(client, points))
+        logger.info(f"Successfully added {len(points)} points")
+
+
+async def add_documents_async(documents: List[DocumentChunk]) -> int:
+    """
+    Add documents to the vector database without blocking.
+    
+    Args:
+        documents: List of document chunks to add
+        
+    Returns:
+        Number of points upserted
+    """
+    if not documents:
+        return 0
+    
+    client = get_async_qdrant_client()
+    
+    await ensure_collection_exists_async()
+    
+    points = _documents_to_points(documents)
+    
+    if points:
+        logger.debug(f"Adding {len(points)} points to Qdrant")
+        await _with_collection_async(lambda: _upload_points_async(client, points))
+    
+    return len(points)
+
+
+def add_chunk_batch(batch: ChunkBatch) -> int:
+    """
+    Add a batch of embedded chunks to the vector database.
+    
+    Args:
+        batch: Chunks with their float32 embedding array
+        
+    Returns:
+        Number of points upserted
+    """
+    if not len(batch):
+        return 0
+    
+    client = get_qdrant_client()
+    
+    ensure_collection_exists()
+    
+    points = _chunk_batch_to_points(batch)
+    _with_collection(lambda: _upload_points(client, points))
+    return len(batch)
+
+
+async def add_chunk_batch_async(batch: ChunkBatch) -> int:
+    """
+    Add a batch of embedded chunks to the vector database without blocking.
+    
+    Args:
+        batch: Chunks with their float32 embedding array
+        
+    Returns:
+        Number of points upserted
+    """
+    if not len(batch):
+        return 0
+    
+    client = get_async_qdrant_client()
+    
+    await ensure_collection_exists_async()
+    
+    logger.debug(f"Adding {len(batch)} points to Qdrant")
+    points = _chunk_batch_to_points(batch)
+    await _with_collection_async(lambda: _upload_points_async(client, points))
+    return len(batch)
+
+
+async def update_total_chunks_async(source: str, total_chunks: int) -> None:
+    """
+    Set the total_chunks payload on every point of a source.
+    
+    Streaming ingestion only knows a document's chunk count once the last
+    chunk is written, so it is back-filled here.
+    
+    Args:
+        source: Document source name
+        total_chunks: Number of chunks in the document
+    """
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    await _with_collection_async(lambda: client.set_payload(
+        collection_name=settings.qdrant_collection_name,
+        payload={"total_chunks": total_chunks},
+        points=_source_filter(source)
+    ))
+
+
+async def get_chunk_hashes_async(source: str) -> Dict[int, str]:
+    """
+    Get the content hash of every stored chunk of a source.
+    
+    Args:
+        source: Document source name
+        
+    Returns:
+        Content hashes keyed by chunk index
+    """
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    async def scroll_hashes() -> Dict[int, str]:
+        hashes: Dict[int, str] = {}
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=settings.qdrant_collection_name,
+                scroll_filter=_source_filter(source),
+                limit=1000,
+                offset=offset,
+                with_payload=["chunk_index", "content_hash"],
+                with_vectors=False
+            )
+            for point in points:
+                if point.payload.get("content_hash"):
+                    hashes[point.payload["chunk_index"]] = point.payload["content_hash"]
+            if offset is None:
+                return hashes
+    
+    return await _with_collection_async(scroll_hashes)
+
+
+async def delete_stale_chunks_async(source: str, total_chunks: int) -> None:
+    """
+    Delete the points of a source that the latest ingestion did not write.
+    
+    These are chunks past the document's new end, and points written before
+    chunks carried a content hash (whose ids were not derived from the
+    chunk index).
+    
+    Args:
+        source: Document source name
+        total_chunks: Number of chunks in the latest version of the document
+    """
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    await _with_collection_async(lambda: client.delete(
+        collection_name=settings.qdrant_collection_name,
+        points_selector=Filter(
+            must=[FieldCondition(key="source", match=MatchValue(value=source))],
+            should=[
+                FieldCondition(key="chunk_index", range=Range(gte=total_chunks)),
+                IsEmptyCondition(is_empty=PayloadField(key="content_hash")),
+            ]
+        )
+    ))
+
+
+def _split_points(
+    points: Union[List[PointStruct], Batch],
+    batch_size: int
+) -> List[Union[List[PointStruct], Batch]]:
+    """Split points into upload requests of at most batch_size points."""
+    if not isinstance(points, Batch):
+        return [points[start:start + batch_size] for start in range(0, len(points), batch_size)]
+    
+    def columns(start: int) -> Batch:
+        end = start + batch_size
+        vectors = points.vectors
+        # The columns were validated when the whole batch was built
+        return Batch.model_construct(
+            ids=points.ids[start:end],
+            vectors=(
+                {name: column[start:end] for name, column in vectors.items()}
+                if isinstance(vectors, dict) else vectors[start:end]
+            ),
+            payloads=points.payloads[start:end] if points.payloads else None
+        )
+    
+    return [columns(start) for start in range(0, len(points.ids), batch_size)]
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Check whether a failed upload is worth retrying."""
+    if isinstance(error, ResponseHandlingException):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code in _TRANSIENT_STATUS_CODES
+    if isinstance(error, grpc.RpcError) and hasattr(error, "code"):
+        return error.code() in _TRANSIENT_GRPC_CODES
+    return False
+
+
+def _retry_policy() -> Dict[str, Any]:
+    """Build tenacity arguments for retrying uploads."""
+    settings = get_settings()
+    return {
+        "stop": stop_after_attempt(settings.qdrant_upload_retries + 1),
+        "wait": wait_exponential(multiplier=settings.qdrant_upload_retry_delay, max=10),
+        "retry": retry_if_exception(_is_transient),
+        "before_sleep": lambda state: logger.warning(
+            f"Retrying Qdrant upload after error: {state.outcome.exception()}"
+        ),
+        "reraise": True,
+    }
+
+
+def _upload_points(client: QdrantClient, points: Union[List[PointStruct], Batch]) -> None:
+    """
+    Upsert points in batches, several in flight, retrying transient failures.
+    
+    Retrying is safe because point ids are stable: a repeated upsert
+    overwrites the same points.
+    """
+    settings = get_settings()
+    
+    def upload(part: Union[List[PointStruct], Batch]) -> None:
+        for attempt in Retrying(**_retry_policy()):
+            with attempt:
+                client.upsert(
+                    collection_name=settings.qdrant_collection_name,
+                    points=part,
+                    wait=settings.qdrant_upload_wait
+                )
+    
+    parts = _split_points(points, settings.qdrant_upload_batch_size)
+    # Embedded Qdrant applies writes one at a time anyway
+    parallel = 1 if settings.qdrant_location else min(settings.qdrant_upload_parallel, len(parts))
+    
+    if parallel == 1:
+        for part in parts:
+            upload(part)
+    else:
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            list(pool.map(upload, parts))
+
+
+async def _upload_points_async(
+    client: AsyncQdrantClient,
+    points: Union[List[PointStruct], Batch]
+) -> None:
+    """
+    Upsert points in batches without blocking, retrying transient failures.
+    
+    At most QDRANT_UPLOAD_PARALLEL requests are in flight at once.
+    """
+    settings = get_settings()
+    semaphore = asyncio.Semaphore(settings.qdrant_upload_parallel)
+    
+    async def upload(part: Union[List[PointStruct], Batch]) -> None:
+        async with semaphore:
+            async for attempt in AsyncRetrying(**_retry_policy()):
+                with attempt:
+                    await client.upsert(
+                        collection_name=settings.qdrant_collection_name,
+                        points=part,
+                        wait=settings.qdrant_upload_wait
+                    )
+    
+    await asyncio.gather(*(
+        upload(part) for part in _split_points(points, settings.qdrant_upload_batch_size)
+    ))
+
+
+def _sparse_to_qdrant(sparse: Dict[int, float]) -> SparseVector:
+    """Convert a term-weight dict to a Qdrant sparse vector."""
+    return SparseVector(indices=list(sparse), values=list(sparse.values()))
+
+
+def _chunk_batch_to_points(batch: ChunkBatch) -> Batch:
+    """
+    Convert a chunk batch to one column-wise Qdrant batch.
+    
+    The embedding array is converted to lists in a single call when the
+    request is built, instead of travelling through per-chunk models.
+    """
+    timestamp = batch.timestamp.isoformat()
+    page_numbers = batch.page_numbers or [None] * len(batch)
+    hashes = batch.content_hashes or [content_hash(content) for content in batch.contents]
+    
+    payloads = [
+        {
+            "id": f"{batch.source}_{chunk_index}",
+            "content": content,
+            "content_hash": chunk_hash,
+            "source": batch.source,
+            "file_type": batch.file_type,
+            "language": batch.language,
+            "chunk_index": chunk_index,
+            "total_chunks": 0,
+            "page_number": page_number,
+            "timestamp": timestamp,
+            "original_filename": batch.source,
+        }
+        for chunk_index, content, chunk_hash, page_number in zip(
+            batch.chunk_indices, batch.contents, hashes, page_numbers
+        )
+    ]
+    
+    vectors: Any = batch.embeddings.tolist()
+    if _sparse_vectors_enabled:
+        sparse_vectors = batch.sparse_vectors or [sparse_vector(content) for content in batch.contents]
+        vectors = {"": vectors, SPARSE_VECTOR_NAME: [_sparse_to_qdrant(s) for s in sparse_vectors]}
+    
+    return Batch(
+        ids=[chunk_point_id(batch.source, chunk_index) for chunk_index in batch.chunk_indices],
+        vectors=vectors,
+        payloads=payloads
+    )
+
+
+def _documents_to_points(documents: List[DocumentChunk]) -> List[PointStruct]:
+    """Convert document chunks with embeddings to Qdrant points."""
     points = []
-    for i, doc in enumerate(documents):
+    for doc in documents:
         if not doc.embedding:
             logger.warning(f"Document {doc.id} has no embedding, skipping")
             continue
         
+        vector: Any = doc.embedding
+        if _sparse_vectors_enabled:
+            sparse = doc.sparse_vector if doc.sparse_vector is not None else sparse_vector(doc.content)
+            vector = {"": doc.embedding, SPARSE_VECTOR_NAME: _sparse_to_qdrant(sparse)}
+        
         point = PointStruct(
-            id=hash(doc.id) % (2**31),  # Convert string ID to positive integer
-            vector=doc.embedding,
+            id=chunk_point_id(doc.metadata.source, doc.metadata.chunk_index),
+            vector=vector,
             payload={
                 "id": doc.id,
                 "content": doc.content,
+                "content_hash": doc.metadata.content_hash or content_hash(doc.content),
                 "source": doc.metadata.source,
                 "file_type": doc.metadata.file_type,
                 "language": doc.metadata.language,
@@ -101,20 +753,18 @@ def add_documents(documents: List[DocumentChunk]) -> None:
             }
         )
         points.append(point)
-    
-    if points:
-        logger.info(f"Adding {len(points)} points to Qdrant")
-        client.upsert(
-            collection_name=settings.qdrant_collection_name,
-            points=points
-        )
-        logger.info(f"Successfully added {len(points)} points")
+    return points
 
 
 def search_documents(
     query_embedding: List[float],
     top_k: int = 5,
-    language_filter: Optional[str] = None
+    language_filter: Optional[str] = None,
+    hnsw_ef: Optional[int] = None,
+    oversampling: Optional[float] = None,
+    rescore: Optional[bool] = None,
+    exact: bool = False,
+    filters: Optional[QueryFilters] = None
 ) -> List[Dict[str, Any]]:
     """
     Search for documents similar to the query embedding.
@@ -123,6 +773,13 @@ def search_documents(
         query_embedding: Query embedding vector
         top_k: Number of results to return
         language_filter: Optional language filter
+        hnsw_ef: HNSW beam width (defaults to QDRANT_SEARCH_HNSW_EF)
+        oversampling: Quantized candidates fetched per result
+            (defaults to QDRANT_SEARCH_OVERSAMPLING)
+        rescore: Rescore quantized candidates with the original vectors
+            (defaults to QDRANT_SEARCH_RESCORE)
+        exact: Skip the index and quantization for an exact search
+        filters: Optional source, file type and ingestion time restrictions
         
     Returns:
         List of search results
@@ -130,47 +787,67 @@ def search_documents(
     settings = get_settings()
     client = get_qdrant_client()
     
-    ensure_collection_exists()
-    
     try:
-        # Build query filter if language is specified
-        query_filter = None
-        if language_filter:
-            query_filter = {
-                "must": [
-                    {
-                        "key": "language",
-                        "match": {"value": language_filter}
-                    }
-                ]
-            }
-        
-        # Search
-        results = client.search(
+        results = _with_collection(lambda: client.search(
             collection_name=settings.qdrant_collection_name,
             query_vector=query_embedding,
-            query_filter=query_filter,
+            query_filter=_build_filter(language_filter, filters),
+            search_params=_search_params(hnsw_ef, oversampling, rescore, exact),
             limit=top_k,
             with_payload=True
-        )
+        ))
         
-        # Format results
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "id": result.payload.get("id"),
-                "content": result.payload.get("content"),
-                "score": result.score,
-                "metadata": {
-                    "source": result.payload.get("source"),
-                    "file_type": result.payload.get("file_type"),
-                    "language": result.payload.get("language") or language_filter or "en",
-                    "chunk_index": result.payload.get("chunk_index"),
-                    "page_number": result.payload.get("page_number"),
-                    "original_filename": result.payload.get("original_filename"),
-                }
-            })
+        formatted_results = _format_search_results(results, language_filter)
+        logger.debug(f"Found {len(formatted_results)} results")
+        return formatted_results
         
+    except Exception as e:
+        logger.error(f"Error searching documents: {e}")
+        raise
+
+
+async def search_documents_async(
+    query_embedding: List[float],
+    top_k: int = 5,
+    language_filter: Optional[str] = None,
+    hnsw_ef: Optional[int] = None,
+    oversampling: Optional[float] = None,
+    rescore: Optional[bool] = None,
+    exact: bool = False,
+    filters: Optional[QueryFilters] = None
+) -> List[Dict[str, Any]]:
+    """
+    Search for documents similar to the query embedding without blocking.
+    
+    Args:
+        query_embedding: Query embedding vector
+        top_k: Number of results to return
+        language_filter: Optional language filter
+        hnsw_ef: HNSW beam width (defaults to QDRANT_SEARCH_HNSW_EF)
+        oversampling: Quantized candidates fetched per result
+            (defaults to QDRANT_SEARCH_OVERSAMPLING)
+        rescore: Rescore quantized candidates with the original vectors
+            (defaults to QDRANT_SEARCH_RESCORE)
+        exact: Skip the index and quantization for an exact search
+        filters: Optional source, file type and ingestion time restrictions
+        
+    Returns:
+        List of search results
+    """
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    try:
+        results = await _with_collection_async(lambda: client.search(
+            collection_name=settings.qdrant_collection_name,
+            query_vector=query_embedding,
+            query_filter=_build_filter(language_filter, filters),
+            search_params=_search_params(hnsw_ef, oversampling, rescore, exact),
+            limit=top_k,
+            with_payload=True
+        ))
+        
+        formatted_results = _format_search_results(results, language_filter)
         logger.debug(f"Found {len(formatted_results)} results")
         return formatted_results
         
@@ -179,6 +856,207 @@ def search_documents(
         raise
 
 
+async def search_sparse_documents_async(
+    query: str,
+    top_k: int = 5,
+    language_filter: Optional[str] = None,
+    filters: Optional[QueryFilters] = None
+) -> List[Dict[str, Any]]:
+    """
+    Search for documents sharing terms with the query using BM25 sparse vectors.
+    
+    Finds exact identifiers, error codes and SKUs that dense search misses.
+    Returns no results when the collection has no sparse vectors.
+    
+    Args:
+        query: Query text
+        top_k: Number of results to return
+        language_filter: Optional language filter
+        filters: Optional source, file type and ingestion time restrictions
+        
+    Returns:
+        List of search results
+    """
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    await ensure_collection_exists_async()
+    
+    query_vector = query_sparse_vector(query)
+    if not _sparse_vectors_enabled or not query_vector:
+        return []
+    
+    try:
+        response = await _with_collection_async(lambda: client.query_points(
+            collection_name=settings.qdrant_collection_name,
+            query=_sparse_to_qdrant(query_vector),
+            using=SPARSE_VECTOR_NAME,
+            query_filter=_build_filter(language_filter, filters),
+            limit=top_k,
+            with_payload=True
+        ))
+        
+        formatted_results = _format_search_results(response.points, language_filter)
+        logger.debug(f"Found {len(formatted_results)} sparse results")
+        return formatted_results
+        
+    except Exception as e:
+        logger.error(f"Error searching sparse vectors: {e}")
+        raise
+
+
+async def search_batch_async(
+    query_embeddings: Sequence[List[float]],
+    sparse_queries: Sequence[str] = (),
+    top_k: int = 5,
+    language_filters: Sequence[Optional[str]] = (None,),
+    filters: Optional[QueryFilters] = None
+) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+    """
+    Run several dense and sparse searches in one Qdrant round trip.
+    
+    Every query embedding, and every sparse query text, is searched once per
+    language filter. Sparse searches are left out when the collection has no
+    sparse vectors.
+    
+    Args:
+        query_embeddings: Query embedding vectors for dense search
+        sparse_queries: Query texts for BM25 sparse search
+        top_k: Number of results per search
+        language_filters: Language of each search, None for no restriction
+        filters: Optional source, file type and ingestion time restrictions
+        
+    Returns:
+        Tuple of (dense result lists, sparse result lists), one list per
+        query and language filter, queries outermost
+    """
+    settings = get_settings()
+    client = get_async_qdrant_client()
+    
+    await ensure_collection_exists_async()
+    
+    requests = [
+        QueryRequest(
+            query=query_embedding,
+            filter=_build_filter(language_filter, filters),
+            params=_search_params(),
+            limit=top_k,
+            with_payload=True
+        )
+        for query_embedding in query_embeddings
+        for language_filter in language_filters
+    ]
+    sparse_vectors = [
+        query_sparse_vector(query) for query in sparse_queries
+    ] if _sparse_vectors_enabled else []
+    requests += [
+        QueryRequest(
+            query=_sparse_to_qdrant(query_vector),
+            using=SPARSE_VECTOR_NAME,
+            filter=_build_filter(language_filter, filters),
+            limit=top_k,
+            with_payload=True
+        )
+        for query_vector in sparse_vectors if query_vector
+        for language_filter in language_filters
+    ]
+    searched_filters = [
+        language_filter for _ in range(len(requests) // len(language_filters))
+        for language_filter in language_filters
+    ]
+    
+    try:
+        responses = await _with_collection_async(lambda: client.query_batch_points(
+            collection_name=settings.qdrant_collection_name,
+            requests=requests
+        ))
+        
+        results = [
+            _format_search_results(response.points, language_filter)
+            for response, language_filter in zip(responses, searched_filters)
+        ]
+        dense_count = len(query_embeddings) * len(language_filters)
+        logger.debug(f"Ran {len(requests)} searches in one batch")
+        return results[:dense_count], results[dense_count:]
+        
+    except Exception as e:
+        logger.error(f"Error running batched search: {e}")
+        raise
+
+
+def _search_params(
+    hnsw_ef: Optional[int] = None,
+    oversampling: Optional[float] = None,
+    rescore: Optional[bool] = None,
+    exact: bool = False
+) -> SearchParams:
+    """Build dense search parameters, falling back to the configured defaults."""
+    settings = get_settings()
+    
+    if exact:
+        return SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+    
+    return SearchParams(
+        hnsw_ef=hnsw_ef or settings.qdrant_search_hnsw_ef or None,
+        quantization=QuantizationSearchParams(
+            rescore=settings.qdrant_search_rescore if rescore is None else rescore,
+            oversampling=oversampling or settings.qdrant_search_oversampling
+        )
+    )
+
+
+def _build_filter(
+    language_filter: Optional[str],
+    filters: Optional[QueryFilters] = None
+) -> Optional[Filter]:
+    """
+    Build the Qdrant filter for a search.
+    
+    Every condition is evaluated by Qdrant against indexed payload fields,
+    so restricted searches return a full top_k without over-fetching.
+    """
+    conditions = []
+    if language_filter:
+        conditions.append(FieldCondition(key="language", match=MatchValue(value=language_filter)))
+    
+    if filters:
+        if filters.sources:
+            conditions.append(FieldCondition(key="source", match=MatchAny(any=filters.sources)))
+        if filters.file_types:
+            file_types = [file_type.lower() for file_type in filters.file_types]
+            conditions.append(FieldCondition(key="file_type", match=MatchAny(any=file_types)))
+        if filters.ingested_after or filters.ingested_before:
+            conditions.append(FieldCondition(
+                key="timestamp",
+                range=DatetimeRange(gte=filters.ingested_after, lt=filters.ingested_before)
+            ))
+    
+    return Filter(must=conditions) if conditions else None
+
+
+def _format_search_results(
+    results: List[ScoredPoint],
+    language_filter: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Convert scored Qdrant points to the result dicts used by the agents."""
+    formatted_results = []
+    for result in results:
+        formatted_results.append({
+            "id": result.payload.get("id"),
+            "content": result.payload.get("content"),
+            "score": result.score,
+            "metadata": {
+                "source": result.payload.get("source"),
+                "file_type": result.payload.get("file_type"),
+                "language": result.payload.get("language") or language_filter or "en",
+                "chunk_index": result.payload.get("chunk_index"),
+                "page_number": result.payload.get("page_number"),
+                "original_filename": result.payload.get("original_filename"),
+            }
+        })
+    return formatted_results
+
+
 def delete_collection() -> None:
     """Delete the collection (for cleanup/testing)."""
     settings = get_settings()
@@ -186,6 +1064,7 @@ def delete_collection() -> None:
     
     try:
         client.delete_collection(collection_name=settings.qdrant_collection_name)
+        _forget_collection()
         logger.info(f"Deleted collection: {settings.qdrant_collection_name}")
     except Exception as e:
         logger.error(f"Error deleting collection: {e}")
@@ -0,0 +1,187 @@
+"""Token-aware, sentence-boundary text chunking."""
+from typing import Any, Iterator, List, Optional, Tuple
+from bisect import bisect_left
+import re
+from app.config import get_settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Paragraph breaks, and sentence ends for Latin-script, CJK and Arabic text
+_BOUNDARY_PATTERN = re.compile(
+    r"[.!?…؟۔][\"'”’)\]»]*\s+|[。！？]+[」』”’)]*\s*|\n[ \t]*\n\s*"
+)
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+# Fallback tokenizer: CJK characters, word pieces of at most four characters,
+# and single punctuation marks. It over-counts relative to the model's
+# subword tokenizer, so chunks stay under the model limit.
+_CJK = "\\u3040-\\u30ff\\u3400-\\u4dbf\\u4e00-\\u9fff\\uac00-\\ud7af\\uf900-\\ufaff"
+_FALLBACK_TOKEN_PATTERN = re.compile(rf"[{_CJK}]|[^\W{_CJK}]{{1,4}}|[^\w\s]")
+
+# Global tokenizer instance (None until loaded; False when unavailable)
+_tokenizer: Any = None
+
+
+def get_chunk_tokenizer() -> Optional[Any]:
+    """
+    Get the embedding model's tokenizer, or None if it cannot be loaded.
+
+    The loaded embedding model's tokenizer is reused when available;
+    otherwise only the tokenizer files are loaded, not the model weights.
+    """
+    global _tokenizer
+
+    if _tokenizer is None:
+        from app.utils import embeddings
+
+        settings = get_settings()
+        model_tokenizer = getattr(embeddings._embedding_model, "tokenizer", None)
+        if model_tokenizer is not None and getattr(model_tokenizer, "is_fast", False):
+            _tokenizer = model_tokenizer
+        else:
+            try:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(settings.embedding_model, use_fast=True)
+            except Exception as e:
+                logger.warning(
+                    f"Could not load tokenizer for {settings.embedding_model}: {e}. "
+                    "Falling back to approximate token counts"
+                )
+                _tokenizer = False
+
+    return _tokenizer or None
+
+
+def token_offsets(text: str) -> List[Tuple[int, int]]:
+    """
+    Get the character span of every token in a text.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of (start, end) character offsets, one per token
+    """
+    tokenizer = get_chunk_tokenizer()
+    if tokenizer is None:
+        return [match.span() for match in _FALLBACK_TOKEN_PATTERN.finditer(text)]
+
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False
+    )
+    return [(start, end) for start, end in encoding["offset_mapping"] if end > start]
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink a span to exclude leading and trailing whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def iter_sentences(text: str) -> Iterator[Tuple[int, int, bool]]:
+    """
+    Lazily split text into sentences.
+
+    Args:
+        text: Text to split
+
+    Yields:
+        (start, end, ends_paragraph) tuples of character offsets
+    """
+    position = 0
+    for match in _BOUNDARY_PATTERN.finditer(text):
+        start, end = _trim(text, position, match.end())
+        if end > start:
+            yield start, end, _PARAGRAPH_BREAK.search(match.group()) is not None
+        position = match.end()
+
+    start, end = _trim(text, position, len(text))
+    if end > start:
+        yield start, end, True
+
+
+def iter_token_chunks(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Lazily split text into chunks of whole sentences that fit the model.
+
+    The text is tokenized once and sentence token counts are looked up from
+    the token offsets, so each chunk is a single slice of the original text.
+    Sentences are packed until the next one would exceed max_tokens; a
+    paragraph break ends a chunk that is at least half full. Consecutive
+    chunks within a paragraph share trailing sentences of up to
+    overlap_tokens. A sentence longer than max_tokens is split on token
+    boundaries.
+
+    Args:
+        text: Text to chunk
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Maximum tokens repeated between consecutive chunks
+
+    Yields:
+        Text chunks
+    """
+    settings = get_settings()
+    max_tokens = max_tokens or settings.chunk_max_tokens
+    overlap_tokens = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+
+    offsets = token_offsets(text)
+    starts = [start for start, _ in offsets]
+
+    # Sentences in the chunk being built, as (start, end, token count)
+    window: List[Tuple[int, int, int]] = []
+    window_tokens = 0
+
+    for start, end, ends_paragraph in iter_sentences(text):
+        first_token = bisect_left(starts, start)
+        last_token = bisect_left(starts, end)
+        sentence_tokens = last_token - first_token
+        if sentence_tokens == 0:
+            continue
+
+        if sentence_tokens > max_tokens:
+            if window:
+                yield text[window[0][0]:window[-1][1]]
+                window, window_tokens = [], 0
+            step = max(max_tokens - overlap_tokens, 1)
+            for i in range(first_token, last_token, step):
+                j = min(i + max_tokens, last_token)
+                yield text[offsets[i][0]:offsets[j - 1][1]]
+                if j == last_token:
+                    break
+            continue
+
+        if window and window_tokens + sentence_tokens > max_tokens:
+            yield text[window[0][0]:window[-1][1]]
+
+            # Carry trailing sentences over as overlap, if they fit
+            carried: List[Tuple[int, int, int]] = []
+            carried_tokens = 0
+            for sentence in reversed(window):
+                if carried_tokens + sentence[2] > overlap_tokens:
+                    break
+                carried.insert(0, sentence)
+                carried_tokens += sentence[2]
+            window, window_tokens = carried, carried_tokens
+            while window and window_tokens + sentence_tokens > max_tokens:
+                window_tokens -= window.pop(0)[2]
+
+        window.append((start, end, sentence_tokens))
+        window_tokens += sentence_tokens
+
+        if ends_paragraph and window_tokens >= max_tokens // 2:
+            yield text[window[0][0]:window[-1][1]]
+            window, window_tokens = [], 0
+
+    if window:
+        yield text[window[0][0]:window[-1][1]]
@@ -0,0 +1,123 @@
+"""Token-budgeted packing of retrieved documents into the synthesis prompt."""
+from typing import Any, Dict, List, Set
+from dataclasses import dataclass, field
+from app.utils.chunking import iter_sentences, token_offsets
+from app.utils.sparse import tokenize_terms
+
+# Tokens of the "[Document i]" header and blank line around each document
+DOCUMENT_HEADER_TOKENS = 6
+
+
+@dataclass
+class PackedContext:
+    """Documents chosen for a prompt, and what packing left out."""
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: int = 0
+    max_tokens: int = 0
+    duplicates_dropped: int = 0
+    over_budget_dropped: int = 0
+    sentences_trimmed: int = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get packing statistics."""
+        return {
+            "documents": len(self.documents),
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "duplicates_dropped": self.duplicates_dropped,
+            "over_budget_dropped": self.over_budget_dropped,
+            "sentences_trimmed": self.sentences_trimmed,
+        }
+
+
+def _sentence_key(sentence: str) -> str:
+    """Normalize a sentence for duplicate detection."""
+    return " ".join(sentence.split()).casefold()
+
+
+def _relevant_sentences(query_terms: Set[str], sentences: List[str], indices: List[int]) -> List[int]:
+    """
+    Keep the sentences sharing the most terms with the query.
+
+    Sentences sharing at least half as many query terms as the best one are
+    kept. When none shares any, e.g. for a query in another language than
+    the document, all are kept.
+    """
+    overlaps = {i: len(query_terms.intersection(tokenize_terms(sentences[i]))) for i in indices}
+    best = max(overlaps.values(), default=0)
+    if not best:
+        return indices
+    return [i for i in indices if overlaps[i] * 2 >= best]
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text after its first max_tokens tokens."""
+    offsets = token_offsets(text)
+    if len(offsets) <= max_tokens:
+        return text
+    return text[:offsets[max_tokens - 1][1]] if max_tokens > 0 else ""
+
+
+def pack_context(
+    query: str,
+    documents: List[Dict[str, Any]],
+    max_tokens: int,
+    dedup_threshold: float = 0.8,
+    trim_sentences: bool = False
+) -> PackedContext:
+    """
+    Fill a token budget with retrieved documents in relevance order.
+
+    Sentences already packed from a better-ranked document, such as the
+    overlap between neighbouring chunks, are left out; a document whose
+    text is at least dedup_threshold repeated is dropped as a near-duplicate.
+    A document that does not fit the remaining budget is skipped in favour
+    of shorter ones after it, except the first, which is truncated to fit.
+    Tokens are counted with the chunking tokenizer, approximating the LLM's.
+
+    Args:
+        query: Query text, for trimming to relevant sentences
+        documents: Retrieved documents with "content", best first
+        max_tokens: Token budget for all documents, headers included
+        dedup_threshold: Share of repeated text at which a document is dropped
+        trim_sentences: Keep only each document's query-relevant sentences
+
+    Returns:
+        Packed documents, with content trimmed where sentences were removed
+    """
+    packed = PackedContext(max_tokens=max_tokens)
+    query_terms = set(tokenize_terms(query)) if trim_sentences else set()
+    seen: Set[str] = set()
+
+    for document in documents:
+        if packed.tokens + DOCUMENT_HEADER_TOKENS >= max_tokens and packed.documents:
+            packed.over_budget_dropped += 1
+            continue
+
+        content = document.get("content") or ""
+        sentences = [content[start:end] for start, end, _ in iter_sentences(content)]
+        keys = [_sentence_key(sentence) for sentence in sentences]
+
+        novel = [i for i, key in enumerate(keys) if key not in seen]
+        repeated_chars = sum(len(sentences[i]) for i in range(len(sentences)) if keys[i] in seen)
+        if not novel or repeated_chars >= dedup_threshold * sum(map(len, sentences)):
+            packed.duplicates_dropped += 1
+            continue
+
+        kept = _relevant_sentences(query_terms, sentences, novel) if trim_sentences else novel
+        packed.sentences_trimmed += len(novel) - len(kept)
+        text = content if len(kept) == len(sentences) else " ".join(sentences[i] for i in kept)
+
+        tokens = len(token_offsets(text)) + DOCUMENT_HEADER_TOKENS
+        if packed.tokens + tokens > max_tokens:
+            if packed.documents:
+                packed.over_budget_dropped += 1
+                continue
+            text = _truncate(text, max_tokens - DOCUMENT_HEADER_TOKENS)
+            tokens = max_tokens
+
+        seen.update(keys[i] for i in kept)
+        packed.documents.append({**document, "content": text})
+        packed.tokens += tokens
+
+    return packed
@@ -1,15 +1,240 @@
 """Embedding generation utilities."""
-from typing import List
+from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import os
+import re
+import time
+import unicodedata
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from app.config import get_settings
+from app.utils.cache import TTLCache, SQLiteCache
 from app.utils.logger import get_logger
+from app.utils.projection import get_embedding_projection
 
 logger = get_logger(__name__)
 
 # Global embedding model instance
 _embedding_model: SentenceTransformer | None = None
 
+# Bounded executor for CPU-bound encoding off the event loop
+_embedding_executor: ThreadPoolExecutor | None = None
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batches.
+    
+    Callers enqueue a text and await a future. A worker task takes the first
+    waiting text, keeps collecting until the batch holds ``max_batch_size``
+    texts or ``max_wait_ms`` has passed, encodes the batch in one forward pass
+    on the embedding executor, then resolves every caller's future.
+    """
+    
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        """
+        Initialize the batcher.
+        
+        Args:
+            max_batch_size: Maximum number of texts per forward pass
+            max_wait_ms: Maximum time to wait for a batch to fill
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        
+        self.batches = 0
+        self.items = 0
+        self.total_queue_wait_ms = 0.0
+        self.max_queue_wait_ms = 0.0
+    
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Start the worker on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return self._queue
+    
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed one text as part of the next batch.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((text, future, time.perf_counter()))
+        return await future
+    
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future, float]]:
+        """Wait for the first item, then fill the batch until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_s
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self) -> None:
+        """Worker loop: collect, encode and resolve batches."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = await self._collect_batch()
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                continue
+            
+            started = time.perf_counter()
+            self._record_batch(len(batch), [(started - enqueued) * 1000 for _, _, enqueued in batch])
+            
+            texts = [text for text, _, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(
+                    get_embedding_executor(), generate_embeddings, texts
+                )
+            except Exception as e:
+                logger.error(f"Error in batched embedding: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future, _), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+    
+    def _record_batch(self, size: int, queue_waits_ms: List[float]) -> None:
+        """Update batch fill and queue wait metrics."""
+        self.batches += 1
+        self.items += size
+        self.total_queue_wait_ms += sum(queue_waits_ms)
+        self.max_queue_wait_ms = max(self.max_queue_wait_ms, max(queue_waits_ms))
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get batching metrics."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "avg_fill_ratio": (
+                self.items / (self.batches * self.max_batch_size) if self.batches else 0.0
+            ),
+            "avg_queue_wait_ms": self.total_queue_wait_ms / self.items if self.items else 0.0,
+            "max_queue_wait_ms": self.max_queue_wait_ms,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+        }
+    
+    async def close(self) -> None:
+        """Stop the worker task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+# Global embedding batcher instance
+_embedding_batcher: EmbeddingBatcher | None = None
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+    
+    Entries are keyed by model name, query prefix and normalized query text.
+    The in-memory tier is a bounded LRU with TTL; the optional SQLite tier
+    survives restarts and refills the memory tier on hit.
+    """
+    
+    def __init__(self, max_size: int, ttl_seconds: float, cache_dir: Optional[str] = None):
+        """
+        Initialize cache.
+        
+        Args:
+            max_size: Maximum number of in-memory entries
+            ttl_seconds: Entry lifetime in seconds
+            cache_dir: Directory for the on-disk tier (disabled if None)
+        """
+        self.memory = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.disk: SQLiteCache | None = None
+        if cache_dir:
+            self.disk = SQLiteCache(
+                os.path.join(cache_dir, "query_embeddings.db"), ttl_seconds=ttl_seconds
+            )
+    
+    def get(self, key: str) -> Optional[List[float]]:
+        """Get a cached embedding."""
+        embedding = self.memory.get(key)
+        if embedding is not None or self.disk is None:
+            return embedding
+        
+        blob = self.disk.get(key)
+        if blob is None:
+            return None
+        
+        embedding = np.frombuffer(blob, dtype=np.float32).tolist()
+        self.memory.set(key, embedding)
+        return embedding
+    
+    def set(self, key: str, embedding: List[float]) -> None:
+        """Store an embedding in every tier."""
+        self.memory.set(key, embedding)
+        if self.disk is not None:
+            self.disk.set(key, np.asarray(embedding, dtype=np.float32).tobytes())
+    
+    async def get_async(self, key: str) -> Optional[List[float]]:
+        """Get a cached embedding, reading the disk tier off the event loop."""
+        embedding = self.memory.get(key)
+        if embedding is not None or self.disk is None:
+            return embedding
+        return await asyncio.to_thread(self.get, key)
+    
+    async def set_async(self, key: str, embedding: List[float]) -> None:
+        """Store an embedding in every tier, writing the disk tier off the event loop."""
+        self.memory.set(key, embedding)
+        if self.disk is not None:
+            await asyncio.to_thread(
+                self.disk.set, key, np.asarray(embedding, dtype=np.float32).tobytes()
+            )
+    
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for every tier."""
+        stats = {"memory": self.memory.get_stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.get_stats()
+        return stats
+
+
+# Global query embedding cache instance
+_query_embedding_cache: QueryEmbeddingCache | None = None
+
 
 def get_embedding_model() -> SentenceTransformer:
     """Get or initialize the embedding model."""
@@ -27,20 +252,97 @@ def get_embedding_model() -> SentenceTransformer:
     return _embedding_model
 
 
-def generate_embeddings(texts: List[str]) -> List[List[float]]:
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """Get or initialize the bounded executor used for async encoding."""
+    global _embedding_executor
+    
+    if _embedding_executor is None:
+        settings = get_settings()
+        _embedding_executor = ThreadPoolExecutor(
+            max_workers=settings.embedding_max_workers,
+            thread_name_prefix="embedding"
+        )
+    
+    return _embedding_executor
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Get or initialize the embedding micro-batcher."""
+    global _embedding_batcher
+    
+    if _embedding_batcher is None:
+        settings = get_settings()
+        _embedding_batcher = EmbeddingBatcher(
+            max_batch_size=settings.embedding_batch_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms
+        )
+    
+    return _embedding_batcher
+
+
+async def close_embedding_batcher() -> None:
+    """Stop the embedding micro-batcher's worker."""
+    if _embedding_batcher is not None:
+        await _embedding_batcher.close()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get or initialize the query embedding cache."""
+    global _query_embedding_cache
+    
+    if _query_embedding_cache is None:
+        settings = get_settings()
+        _query_embedding_cache = QueryEmbeddingCache(
+            max_size=settings.embedding_cache_size,
+            ttl_seconds=settings.cache_ttl_seconds,
+            cache_dir=settings.embedding_cache_dir or None
+        )
+    
+    return _query_embedding_cache
+
+
+def get_embedding_metrics() -> Dict[str, Any]:
+    """Get embedding batching and cache metrics."""
+    settings = get_settings()
+    metrics: Dict[str, Any] = {
+        "batching_enabled": settings.embedding_batching_enabled,
+        "caching_enabled": settings.enable_caching,
+    }
+    if _embedding_batcher is not None:
+        metrics["batcher"] = _embedding_batcher.get_metrics()
+    if _query_embedding_cache is not None:
+        metrics["query_cache"] = _query_embedding_cache.get_stats()
+    return metrics
+
+
+def shutdown_embedding_executor() -> None:
+    """Shut down the embedding executor, waiting for running jobs."""
+    global _embedding_executor
+    
+    if _embedding_executor is not None:
+        _embedding_executor.shutdown(wait=True)
+        _embedding_executor = None
+
+
+def encode_embeddings(texts: List[str], project: bool = True) -> np.ndarray:
     """
-    Generate embeddings for a list of texts.
+    Generate embeddings for a list of texts as one float32 array.
+    
+    This is the array-native path used by ingestion: the vectors stay in a
+    contiguous array instead of becoming lists of Python floats.
     
     Args:
         texts: List of texts to embed
+        project: Apply the configured PCA projection, if any
         
     Returns:
-        List of embedding vectors
+        Array of shape (len(texts), dimension)
     """
+    settings = get_settings()
+    
     if not texts:
-        return []
+        return np.zeros((0, settings.qdrant_vector_size), dtype=np.float32)
     
-    settings = get_settings()
     model = get_embedding_model()
     
     logger.debug(f"Generating embeddings for {len(texts)} texts")
@@ -53,12 +355,29 @@ def generate_embeddings(texts: List[str]) -> List[List[float]]:
         show_progress_bar=False
     )
     
-    # Convert to list of lists
-    if isinstance(embeddings, np.ndarray):
-        embeddings = embeddings.tolist()
+    projection = get_embedding_projection() if project else None
+    if projection is not None:
+        embeddings = projection.project(embeddings)
     
     logger.debug(f"Generated {len(embeddings)} embeddings")
-    return embeddings
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def generate_embeddings(texts: List[str], project: bool = True) -> List[List[float]]:
+    """
+    Generate embeddings for a list of texts.
+    
+    Args:
+        texts: List of texts to embed
+        project: Apply the configured PCA projection, if any
+        
+    Returns:
+        List of embedding vectors
+    """
+    if not texts:
+        return []
+    
+    return encode_embeddings(texts, project=project).tolist()
 
 
 def generate_embedding(text: str) -> List[float]:
@@ -75,6 +394,139 @@ def generate_embedding(text: str) -> List[float]:
     return embeddings[0] if embeddings else []
 
 
+async def generate_embeddings_async(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings on the bounded executor without blocking the event loop.
+    
+    Args:
+        texts: List of texts to embed
+        
+    Returns:
+        List of embedding vectors
+    """
+    if not texts:
+        return []
+    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_embedding_executor(), generate_embeddings, texts)
+
+
+async def encode_embeddings_async(texts: List[str]) -> np.ndarray:
+    """
+    Generate a float32 embedding array on the bounded executor.
+    
+    Args:
+        texts: List of texts to embed
+        
+    Returns:
+        Array of shape (len(texts), dimension)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_embedding_executor(), encode_embeddings, texts)
+
+
+async def generate_embedding_async(text: str) -> List[float]:
+    """
+    Generate embedding for a single text without blocking the event loop.
+    
+    Concurrent callers are coalesced into batched forward passes when
+    embedding batching is enabled.
+    
+    Args:
+        text: Text to embed
+        
+    Returns:
+        Embedding vector
+    """
+    if get_settings().embedding_batching_enabled:
+        return await get_embedding_batcher().embed(text)
+    
+    embeddings = await generate_embeddings_async([text])
+    return embeddings[0] if embeddings else []
+
+
+def normalize_query(text: str) -> str:
+    """Normalize Unicode form and whitespace of a query."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+# Bump when the query cache key changes meaning
+_QUERY_CACHE_KEY_VERSION = "2"
+
+
+def _query_cache_key(normalized_query: str) -> str:
+    """
+    Build the cache key for a normalized query.
+    
+    The key keeps the query's case: the embedding model is case-sensitive,
+    so queries differing only in case have different embeddings. The
+    version discards disk entries from when keys were case-folded.
+    """
+    settings = get_settings()
+    projection = get_embedding_projection()
+    raw = "\x00".join([
+        _QUERY_CACHE_KEY_VERSION,
+        settings.embedding_model,
+        settings.embedding_query_prefix,
+        projection.fingerprint if projection is not None else "",
+        normalized_query
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def generate_query_embedding(query: str) -> List[float]:
+    """
+    Generate embedding for a search query, using the query embedding cache.
+    
+    Args:
+        query: Query text
+        
+    Returns:
+        Embedding vector
+    """
+    settings = get_settings()
+    normalized = normalize_query(query)
+    
+    if not settings.enable_caching:
+        return generate_embedding(settings.embedding_query_prefix + normalized)
+    
+    cache = get_query_embedding_cache()
+    key = _query_cache_key(normalized)
+    embedding = cache.get(key)
+    if embedding is None:
+        embedding = generate_embedding(settings.embedding_query_prefix + normalized)
+        cache.set(key, embedding)
+    return embedding
+
+
+async def generate_query_embedding_async(query: str) -> List[float]:
+    """
+    Generate embedding for a search query without blocking the event loop.
+    
+    Memory-tier hits return immediately, disk-tier reads and writes run in
+    a worker thread, and misses go through the micro-batcher.
+    
+    Args:
+        query: Query text
+        
+    Returns:
+        Embedding vector
+    """
+    settings = get_settings()
+    normalized = normalize_query(query)
+    
+    if not settings.enable_caching:
+        return await generate_embedding_async(settings.embedding_query_prefix + normalized)
+    
+    cache = get_query_embedding_cache()
+    key = _query_cache_key(normalized)
+    embedding = await cache.get_async(key)
+    if embedding is None:
+        embedding = await generate_embedding_async(settings.embedding_query_prefix + normalized)
+        await cache.set_async(key, embedding)
+    return embedding
+
+
 def get_embedding_dimension() -> int:
     """Get the dimension of the embedding vectors."""
     model = get_embedding_model()
@@ -0,0 +1,80 @@
+"""Rank fusion for combining retrieval result lists."""
+from typing import Any, Dict, List, Sequence
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    k: int = 60,
+    limit: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked search results with reciprocal-rank fusion.
+
+    Each result scores sum(1 / (k + rank)) over the lists it appears in, so
+    results ranked well by several retrievers rise to the top regardless of
+    how each retriever scales its own scores.
+
+    Args:
+        result_lists: Ranked result dicts from each retriever, keyed by "id"
+        k: Rank offset damping the weight of the top ranks
+        limit: Maximum number of results to return
+
+    Returns:
+        Fused results, best first, with "score" set to the fused score
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            result_id = result["id"]
+            fused.setdefault(result_id, result)
+            scores[result_id] = scores.get(result_id, 0.0) + 1.0 / (k + rank)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [{**fused[result_id], "score": scores[result_id]} for result_id in ranked]
+
+
+def normalized_score_fusion(
+    result_groups: Sequence[Sequence[List[Dict[str, Any]]]],
+    limit: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Merge results of searches over the same index, keeping each result once.
+
+    Each group holds the searches of one query phrasing, the first of them
+    unfiltered. Every list in a group is min-max normalized against the
+    unfiltered search's score range, so two phrasings of a query, which
+    score on different ranges, become comparable, while a filtered search's
+    weak hits stay weak instead of being stretched to the top. A result
+    found by several searches keeps its best normalized score.
+
+    Args:
+        result_groups: Per query phrasing, ranked result dicts from the
+            unfiltered search followed by the filtered ones, keyed by "id"
+        limit: Maximum number of results to return
+
+    Returns:
+        Merged results, best first, with "score" set to the normalized score
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+
+    for group in result_groups:
+        if not group or not group[0]:
+            continue
+        low = min(result["score"] for result in group[0])
+        high = max(result["score"] for result in group[0])
+        for results in group:
+            for result in results:
+                result_id = result["id"]
+                if high > low:
+                    score = (result["score"] - low) / (high - low)
+                else:
+                    score = 1.0 if result["score"] >= high else 0.0
+                if result_id not in scores or score > scores[result_id]:
+                    merged[result_id] = result
+                    scores[result_id] = score
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [{**merged[result_id], "score": scores[result_id]} for result_id in ranked]
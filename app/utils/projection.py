@@ -0,0 +1,168 @@
+"""PCA projection of embeddings to a smaller dimension."""
+from typing import Optional
+from functools import cached_property
+import hashlib
+import os
+import numpy as np
+from app.config import get_settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Global projection instance (None until loaded)
+_embedding_projection: Optional["EmbeddingProjection"] = None
+
+
+class EmbeddingProjection:
+    """
+    Linear projection of embeddings onto their top principal components.
+
+    Embeddings are scaled to unit length (as cosine search sees them),
+    centred on the corpus mean and multiplied by the component matrix, so
+    1024-dimensional vectors become e.g. 256-dimensional ones that keep most
+    of their variance.
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, model: str):
+        """
+        Initialize projection.
+
+        Args:
+            mean: Mean embedding of the fitting sample, shape (input_dim,)
+            components: Principal components as rows, shape (dimension, input_dim)
+            model: Embedding model the projection was fitted for
+        """
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)
+        self.model = model
+
+    @property
+    def dimension(self) -> int:
+        """Dimension of projected embeddings."""
+        return self.components.shape[0]
+
+    @property
+    def input_dimension(self) -> int:
+        """Dimension of the model's embeddings."""
+        return self.components.shape[1]
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Short hash identifying this projection, e.g. in cache keys; computed once."""
+        digest = hashlib.sha256(self.mean.tobytes() + self.components.tobytes())
+        return digest.hexdigest()[:16]
+
+    def project(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Project embeddings to the reduced dimension.
+
+        Args:
+            embeddings: Array of shape (n, input_dim)
+
+        Returns:
+            Array of shape (n, dimension)
+        """
+        return (_unit_length(embeddings) - self.mean) @ self.components.T
+
+    def save(self, path: str) -> None:
+        """Write the projection to an .npz file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, mean=self.mean, components=self.components, model=np.array(self.model))
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingProjection":
+        """Read a projection from an .npz file."""
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"], str(data["model"]))
+
+
+def _unit_length(embeddings: np.ndarray) -> np.ndarray:
+    """Scale each embedding to unit length."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def fit_projection(embeddings: np.ndarray, dimension: int, model: str) -> EmbeddingProjection:
+    """
+    Fit a PCA projection on a sample of corpus embeddings.
+
+    Args:
+        embeddings: Sample embeddings, shape (n, input_dim) with n >= dimension
+        dimension: Target dimension
+        model: Embedding model that produced the sample
+
+    Returns:
+        Fitted projection
+    """
+    embeddings = _unit_length(embeddings).astype(np.float64)
+    if embeddings.shape[0] < dimension:
+        raise ValueError(
+            f"Need at least {dimension} sample embeddings to fit a {dimension}-dimensional projection"
+        )
+
+    mean = embeddings.mean(axis=0)
+    # Rows of vt are the principal components, by decreasing variance
+    _, _, vt = np.linalg.svd(embeddings - mean, full_matrices=False)
+    return EmbeddingProjection(mean, vt[:dimension], model)
+
+
+def get_projection_path() -> str:
+    """
+    Get the configured projection file.
+
+    There is no default: the stored vectors are only usable with the exact
+    projection they were written with, so every replica must be pointed at
+    the same file rather than each falling back to its own local one.
+
+    Raises:
+        ValueError: If EMBEDDING_PROJECTION_PATH is not set
+    """
+    path = get_settings().embedding_projection_path
+    if not path:
+        raise ValueError("EMBEDDING_PROJECTION_PATH is not set")
+    return path
+
+
+def get_embedding_projection() -> Optional[EmbeddingProjection]:
+    """
+    Get the configured projection, or None when embeddings are not projected.
+
+    Raises:
+        ValueError: If the projection file is not configured or missing, or
+            does not match the embedding model or QDRANT_VECTOR_SIZE
+    """
+    global _embedding_projection
+
+    settings = get_settings()
+    if not settings.embedding_projection_dim:
+        return None
+
+    if _embedding_projection is None:
+        path = get_projection_path()
+        if not os.path.exists(path):
+            raise ValueError(
+                f"Embedding projection {path} does not exist; fit it with "
+                "scripts.fit_embedding_projection or mount the file the collection was ingested with"
+            )
+        logger.info(f"Loading embedding projection: {path}")
+        projection = EmbeddingProjection.load(path)
+
+        if projection.model != settings.embedding_model:
+            raise ValueError(
+                f"Projection {path} was fitted for {projection.model}, "
+                f"not EMBEDDING_MODEL {settings.embedding_model}"
+            )
+        if projection.dimension != settings.qdrant_vector_size:
+            raise ValueError(
+                f"Projection {path} has dimension {projection.dimension}, "
+                f"but QDRANT_VECTOR_SIZE is {settings.qdrant_vector_size}"
+            )
+
+        _embedding_projection = projection
+        logger.info(
+            f"Projecting embeddings from {projection.input_dimension} "
+            f"to {projection.dimension} dimensions"
+        )
+
+    return _embedding_projection
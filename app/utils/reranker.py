@@ -0,0 +1,107 @@
+"""Cross-encoder reranking of retrieved documents."""
+from typing import List, Dict, Any, Tuple
+import asyncio
+from sentence_transformers import CrossEncoder
+from app.config import get_settings
+from app.utils.embeddings import get_embedding_executor
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Global cross-encoder instance
+_reranker_model: CrossEncoder | None = None
+
+
+def get_reranker_model() -> CrossEncoder:
+    """Get or initialize the cross-encoder."""
+    global _reranker_model
+
+    if _reranker_model is None:
+        settings = get_settings()
+        logger.info(f"Loading reranker model: {settings.reranker_model}")
+        _reranker_model = CrossEncoder(
+            settings.reranker_model,
+            max_length=settings.reranker_max_length,
+            device=settings.embedding_device
+        )
+        logger.info("Reranker model loaded successfully")
+
+    return _reranker_model
+
+
+def score_documents(query: str, documents: List[str]) -> List[float]:
+    """
+    Score query-document pairs with the cross-encoder in one batched pass.
+
+    Args:
+        query: Query text
+        documents: Document texts
+
+    Returns:
+        Relevance score per document
+    """
+    if not documents:
+        return []
+
+    settings = get_settings()
+    model = get_reranker_model()
+
+    scores = model.predict(
+        [(query, document) for document in documents],
+        batch_size=settings.reranker_batch_size,
+        show_progress_bar=False
+    )
+    return [float(score) for score in scores]
+
+
+async def rerank_async(
+    query: str,
+    results: List[Dict[str, Any]],
+    top_k: int
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Rerank search results with the cross-encoder within the latency budget.
+
+    Scoring runs on the bounded embedding executor. If it fails or exceeds
+    RERANKER_TIMEOUT_MS, the results keep their retrieval order; an
+    abandoned pass still runs to completion on the executor. The model is
+    preloaded at startup; if it is not, it loads on the default executor
+    before the budget starts, so the load neither times out the first
+    queries nor holds an embedding worker.
+
+    Args:
+        query: Query text
+        results: Search results, best first
+        top_k: Number of results to keep
+
+    Returns:
+        Tuple of (top_k results, outcome), where outcome is "reranked",
+        "timeout" or "error"
+    """
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+
+    try:
+        if _reranker_model is None:
+            await loop.run_in_executor(None, get_reranker_model)
+        scores = await asyncio.wait_for(
+            loop.run_in_executor(
+                get_embedding_executor(),
+                score_documents,
+                query,
+                [result["content"] for result in results]
+            ),
+            timeout=settings.reranker_timeout_ms / 1000
+        )
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Reranking {len(results)} candidates exceeded {settings.reranker_timeout_ms}ms, "
+            "keeping retrieval order"
+        )
+        return results[:top_k], "timeout"
+    except Exception as e:
+        logger.error(f"Error reranking documents: {e}")
+        return results[:top_k], "error"
+
+    ranked = sorted(zip(scores, range(len(results))), key=lambda pair: pair[0], reverse=True)
+    return [{**results[i], "rerank_score": score} for score, i in ranked[:top_k]], "reranked"
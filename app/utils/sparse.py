@@ -0,0 +1,88 @@
+"""Sparse lexical vectors for hybrid retrieval."""
+from typing import Dict, List
+from collections import Counter
+import re
+import unicodedata
+import zlib
+
+# BM25 term-frequency saturation. Chunks are already bounded in length by
+# the chunker, so document length normalization (BM25's b) is left out;
+# inverse document frequency is applied by Qdrant at query time.
+BM25_K1 = 1.2
+
+# CJK runs, and words or identifiers such as ERR-404, v2.1 or SKU_1234
+_CJK = "\\u3040-\\u30ff\\u3400-\\u4dbf\\u4e00-\\u9fff\\uac00-\\ud7af\\uf900-\\ufaff"
+_TERM_PATTERN = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+(?:[-_./:#][^\W_{_CJK}]+)*")
+_CJK_CHARACTER = re.compile(rf"[{_CJK}]")
+_IDENTIFIER_SEPARATORS = re.compile(r"[-_./:#]")
+
+# Arabic letter variants folded to one form; tatweel is dropped
+_ARABIC_FOLDING = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي", "ة": "ه", "ـ": None})
+
+
+def _normalize(text: str) -> str:
+    """Case-fold and strip accents and Arabic diacritics."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    decomposed = unicodedata.normalize("NFD", text)
+    text = "".join(c for c in decomposed if unicodedata.category(c) != "Mn")
+    return unicodedata.normalize("NFC", text).translate(_ARABIC_FOLDING)
+
+
+def tokenize_terms(text: str) -> List[str]:
+    """
+    Split text into lexical terms for en/es/fr/zh/ar.
+
+    Words are case-folded with accents and Arabic diacritics removed.
+    Identifiers joined by - _ . / : or # are kept whole and also split into
+    their parts. CJK text, which has no spaces, becomes characters and
+    character bigrams.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms, with repeats
+    """
+    terms = []
+    for match in _TERM_PATTERN.finditer(_normalize(text)):
+        term = match.group()
+        if _CJK_CHARACTER.match(term):
+            terms.extend(term)
+            terms.extend(term[i:i + 2] for i in range(len(term) - 1))
+        else:
+            terms.append(term)
+            if _IDENTIFIER_SEPARATORS.search(term):
+                terms.extend(_IDENTIFIER_SEPARATORS.split(term))
+    return terms
+
+
+def _term_index(term: str) -> int:
+    """Map a term to a stable sparse vector dimension."""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def sparse_vector(text: str) -> Dict[int, float]:
+    """
+    Build the BM25 term-frequency vector of a document chunk.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Term weights keyed by dimension
+    """
+    counts = Counter(_term_index(term) for term in tokenize_terms(text))
+    return {index: tf * (BM25_K1 + 1) / (tf + BM25_K1) for index, tf in counts.items()}
+
+
+def query_sparse_vector(text: str) -> Dict[int, float]:
+    """
+    Build the sparse vector of a query, weighting each distinct term once.
+
+    Args:
+        text: Query text
+
+    Returns:
+        Term weights keyed by dimension
+    """
+    return {_term_index(term): 1.0 for term in tokenize_terms(text)}
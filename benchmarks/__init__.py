@@ -0,0 +1 @@
+"""Benchmarks for the ingest and query hot paths."""
@@ -0,0 +1,145 @@
+"""Local stand-in for the Ollama HTTP API with configurable latency."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import json
+import threading
+import time
+
+RESPONSE_TEXT = (
+    "Machine learning is a subset of artificial intelligence that learns "
+    "patterns from data. [Source 1]"
+)
+
+
+class FakeOllamaServer:
+    """
+    Serves /api/generate and /api/tags on a background thread.
+
+    Non-streaming requests sleep for the configured latency before
+    answering; streaming requests spread it evenly over the tokens.
+
+    Before generating, each request also spends prefill_ms_per_token on
+    every prompt token (whitespace-separated word) the model has not seen.
+    Like Ollama, a request that sends back the "context" of an earlier one
+    continues from it and prefills only its own prompt; responses carry the
+    context to continue from and Ollama's token counts and durations.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        prefill_ms_per_token: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Initialize server.
+
+        Args:
+            latency_ms: Simulated generation time per request
+            prefill_ms_per_token: Simulated prompt processing time per new token
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.latency_ms = latency_ms
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Start serving in the background."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": "fake"}]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+
+                prompt_tokens = len(body.get("prompt", "").split())
+                context = list(body.get("context") or [])
+                prefill_s = prompt_tokens * server.prefill_ms_per_token / 1000
+                time.sleep(prefill_s)
+                response_tokens = len(RESPONSE_TEXT.split())
+                final = {
+                    "done": True,
+                    "context": context + list(range(prompt_tokens + response_tokens)),
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int(prefill_s * 1e9),
+                    "eval_count": response_tokens,
+                    "eval_duration": int(server.latency_ms * 1e6),
+                }
+
+                if body.get("stream"):
+                    self._stream_response(final)
+                else:
+                    time.sleep(server.latency_ms / 1000)
+                    self._send_json({"response": RESPONSE_TEXT, **final})
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream_response(self, final):
+                tokens = [token + " " for token in RESPONSE_TEXT.split(" ")]
+                delay = server.latency_ms / 1000 / len(tokens)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for token in tokens:
+                    time.sleep(delay)
+                    self._write_chunk({"response": token, "done": False})
+                self._write_chunk({"response": "", **final})
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, payload):
+                data = json.dumps(payload).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+        return Handler
@@ -0,0 +1,126 @@
+"""Synthetic inputs for the benchmarks, built from the bundled sample data."""
+from typing import Dict, List
+from pathlib import Path
+import csv
+import io
+import json
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "sample_data"
+
+
+# Chinese and Arabic paragraphs to complement the bundled en/es/fr samples
+EXTRA_SAMPLES = {
+    "zh": (
+        "机器学习是人工智能的一个分支，专注于开发能够从经验中学习和改进的算法和统计模型。"
+        "监督学习使用带标签的数据进行训练。无监督学习在没有标签的数据中寻找模式！"
+        "强化学习通过与环境的交互和奖励来学习。机器学习已广泛应用于图像识别、自然语言处理和医疗诊断。"
+    ),
+    "ar": (
+        "التعلم الآلي هو فرع من فروع الذكاء الاصطناعي يركز على تطوير خوارزميات ونماذج إحصائية "
+        "تمكن الحواسيب من التعلم والتحسن من التجربة. يستخدم التعلم الخاضع للإشراف بيانات مصنفة. "
+        "هل يمكن للتعلم غير الخاضع للإشراف إيجاد أنماط في بيانات غير مصنفة؟ "
+        "يستخدم التعلم الآلي في التعرف على الصور ومعالجة اللغات الطبيعية والتشخيص الطبي."
+    ),
+}
+
+
+def sample_documents(target_chars: int) -> Dict[str, str]:
+    """One document per supported language, each repeated up to a size."""
+    documents = {}
+    for path in sorted(SAMPLE_DIR.glob("*.txt")):
+        language = path.stem.rsplit("_", 1)[-1]
+        documents[language] = path.read_text(encoding="utf-8")
+    documents.update(EXTRA_SAMPLES)
+
+    return {
+        language: "\n\n".join([text] * (target_chars // len(text) + 1))[:target_chars]
+        for language, text in documents.items()
+    }
+
+
+def sample_paragraphs() -> List[str]:
+    """Paragraphs from the multilingual sample documents."""
+    paragraphs = []
+    for path in sorted(SAMPLE_DIR.glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        paragraphs.extend(p.strip() for p in text.split("\n\n") if p.strip())
+    return paragraphs
+
+
+def make_text(target_chars: int) -> str:
+    """Repeat the sample paragraphs, numbered so chunks differ, up to a size."""
+    paragraphs = sample_paragraphs()
+    parts = []
+    size = 0
+    i = 0
+    while size < target_chars:
+        paragraph = f"[{i}] {paragraphs[i % len(paragraphs)]}"
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+        i += 1
+    return "\n\n".join(parts)
+
+
+def make_json(records: int) -> bytes:
+    """A JSON document with nested records."""
+    paragraphs = sample_paragraphs()
+    data = {
+        "documents": [
+            {"id": i, "title": f"Document {i}", "body": paragraphs[i % len(paragraphs)]}
+            for i in range(records)
+        ]
+    }
+    return json.dumps(data).encode("utf-8")
+
+
+def make_csv(rows: int) -> bytes:
+    """A CSV document with one paragraph per row."""
+    paragraphs = sample_paragraphs()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "title", "body"])
+    for i in range(rows):
+        writer.writerow([i, f"Row {i}", paragraphs[i % len(paragraphs)]])
+    return buffer.getvalue().encode("utf-8")
+
+
+def make_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """A text-only PDF with lines of sample text on each page."""
+    words = " ".join(sample_paragraphs()).encode("ascii", "ignore").decode("ascii").split()
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    position = 0
+
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            line = " ".join(words[(position + k) % len(words)] for k in range(12))
+            position += 12
+            line = line.replace("\\", "").replace("(", "").replace(")", "")
+            lines.append(f"({line}) Tj 0 -16 Td")
+        stream = "BT /F1 10 Tf 40 760 Td " + " ".join(lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("latin-1")
+    return pdf
@@ -0,0 +1,174 @@
+"""Timing and reporting helpers for the benchmarks."""
+from typing import Any, Awaitable, Callable, Counter, Dict, Iterable, List, Optional
+import asyncio
+import collections
+import resource
+import sys
+import time
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def count_calls(obj: Any, names: Iterable[str]) -> Counter[str]:
+    """
+    Count calls to the named methods of an object, e.g. a client's requests.
+
+    Args:
+        obj: Object whose methods are wrapped in place
+        names: Method names to count
+
+    Returns:
+        Counter updated as the methods are called
+    """
+    counts: Counter[str] = collections.Counter()
+    for name in names:
+        method = getattr(obj, name)
+        if asyncio.iscoroutinefunction(method):
+            async def counted(*args, _method=method, _name=name, **kwargs):
+                counts[_name] += 1
+                return await _method(*args, **kwargs)
+        else:
+            def counted(*args, _method=method, _name=name, **kwargs):
+                counts[_name] += 1
+                return _method(*args, **kwargs)
+        setattr(obj, name, counted)
+    return counts
+
+
+def summarize(latencies_s: List[float], wall_time_s: float, items_per_call: int = 1) -> Dict[str, Any]:
+    """Summarize per-call latencies into percentiles and throughput."""
+    latencies_ms = np.array(latencies_s) * 1000
+    return {
+        "calls": len(latencies_s),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "throughput_per_s": round(len(latencies_s) * items_per_call / wall_time_s, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def bench(
+    fn: Callable[[], Any],
+    iterations: int,
+    warmup: int = 1,
+    items_per_call: int = 1
+) -> Dict[str, Any]:
+    """
+    Time a synchronous callable.
+
+    Args:
+        fn: Callable to time
+        iterations: Number of timed calls
+        warmup: Number of untimed calls made first
+        items_per_call: Items processed per call, for throughput
+
+    Returns:
+        Latency percentiles, throughput and peak RSS
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    return summarize(latencies, time.perf_counter() - wall_start, items_per_call)
+
+
+async def bench_async(
+    fn: Callable[[], Awaitable[Any]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 1,
+    items_per_call: int = 1
+) -> Dict[str, Any]:
+    """
+    Time an async callable, optionally with concurrent callers.
+
+    Args:
+        fn: Coroutine function to time
+        iterations: Number of timed calls
+        concurrency: Number of calls in flight at once
+        warmup: Number of untimed calls made first
+        items_per_call: Items processed per call, for throughput
+
+    Returns:
+        Latency percentiles, throughput and peak RSS
+    """
+    for _ in range(warmup):
+        await fn()
+
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed_call():
+        async with semaphore:
+            start = time.perf_counter()
+            await fn()
+            latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[timed_call() for _ in range(iterations)])
+    result = summarize(latencies, time.perf_counter() - wall_start, items_per_call)
+    result["concurrency"] = concurrency
+    return result
+
+
+# Metrics compared exactly, and whether a higher value is better
+TRACKED_METRICS = {"qdrant_requests_per_call": False, "recall_at_k": True}
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = 0.1
+) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    Besides p50 latency, any increase in Qdrant requests per call and any
+    drop in recall@k is a regression; both are deterministic, so there is
+    no noise to allow for.
+
+    Args:
+        results: Benchmark results by name
+        baseline: Baseline results by name
+        threshold: Relative p50 slowdown reported as a regression
+
+    Returns:
+        One report line per metric present in both
+    """
+    lines = []
+    for name, result in results.items():
+        previous: Optional[Dict[str, Any]] = baseline.get(name)
+        if not previous:
+            continue
+
+        if previous.get("p50_ms") and "p50_ms" in result:
+            change = (result["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"]
+            flag = "REGRESSION" if change > threshold else "ok"
+            lines.append(
+                f"{name:<32} p50 {previous['p50_ms']:>10.3f} -> {result['p50_ms']:>10.3f} ms "
+                f"({change:+.1%}) {flag}"
+            )
+
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            if metric not in previous or metric not in result:
+                continue
+            worse = result[metric] < previous[metric] if higher_is_better else result[metric] > previous[metric]
+            lines.append(
+                f"{name:<32} {metric} {previous[metric]} -> {result[metric]} "
+                f"{'REGRESSION' if worse else 'ok'}"
+            )
+    return lines
@@ -0,0 +1,549 @@
+"""
+Benchmark the ingest and query hot paths.
+
+Runs without external services: Qdrant runs embedded in memory, Ollama is
+replaced by a local HTTP server with configurable latency, and embeddings
+come from a deterministic stub model unless --real-model is given.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --only chunk_text,search_documents
+    python -m benchmarks.run --save-baseline
+"""
+from typing import Any, Callable, Dict, List
+from datetime import datetime
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.fixtures import (
+    make_csv, make_json, make_pdf, make_text, sample_documents, sample_paragraphs
+)
+from benchmarks.harness import bench, bench_async, compare, count_calls, peak_rss_mb, summarize
+from benchmarks.stub_model import StubEmbeddingModel
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCHMARK_DIR / "results.json"
+
+# Qdrant client methods counted as per-call round trips
+QDRANT_REQUESTS = (
+    "get_collections", "collection_exists", "get_collection", "search", "query_points", "query_batch_points"
+)
+
+
+def configure_environment(ollama_url: str, qdrant_host: str = "", concurrency: int = 1) -> None:
+    """Point the app at the local stand-ins; must run before settings are loaded."""
+    if qdrant_host:
+        os.environ["QDRANT_LOCATION"] = ""
+        os.environ["QDRANT_HOST"] = qdrant_host
+    else:
+        os.environ["QDRANT_LOCATION"] = ":memory:"
+    os.environ["QDRANT_COLLECTION_NAME"] = "benchmark"
+    os.environ["OLLAMA_BASE_URL"] = ollama_url
+    # The fake server runs every request in parallel, like Ollama with
+    # OLLAMA_NUM_PARALLEL at least the number of concurrent callers
+    os.environ.setdefault("OLLAMA_MAX_PARALLEL_REQUESTS", str(concurrency))
+    # Measure the pipeline itself, not cache hits
+    os.environ["ENABLE_CACHING"] = "false"
+    os.environ["ENABLE_SEMANTIC_CACHE"] = "false"
+    # Keep per-call warnings (e.g. low language confidence) out of the report
+    logging.getLogger("app").setLevel(logging.ERROR)
+
+
+def make_chunks(count: int, file_name: str) -> List[Any]:
+    """Build embedded document chunks for the vector database benchmarks."""
+    from app.models import DocumentChunk, DocumentMetadata
+    from app.utils.embeddings import generate_embeddings
+
+    paragraphs = sample_paragraphs()
+    texts = [f"[{i}] {paragraphs[i % len(paragraphs)]}" for i in range(count)]
+    embeddings = generate_embeddings(texts)
+    timestamp = datetime.utcnow()
+
+    return [
+        DocumentChunk(
+            id=f"{file_name}_{i}",
+            content=text,
+            metadata=DocumentMetadata(
+                source=file_name,
+                file_type="txt",
+                language="en",
+                chunk_index=i,
+                total_chunks=count,
+                timestamp=timestamp,
+                original_filename=file_name
+            ),
+            embedding=embedding
+        )
+        for i, (text, embedding) in enumerate(zip(texts, embeddings))
+    ]
+
+
+def processing_benchmarks(iterations: int) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Benchmarks for extraction, chunking, language detection and embedding."""
+    from app.services.document_processor import (
+        chunk_text, extract_text_from_txt, extract_text_from_markdown,
+        extract_text_from_json, extract_text_from_csv, extract_text_from_pdf
+    )
+    from app.utils.embeddings import generate_embeddings
+    from app.utils.language import detect_language
+
+    text = make_text(200_000)
+    text_bytes = text.encode("utf-8")
+    json_bytes = make_json(1_000)
+    csv_bytes = make_csv(1_000)
+    pdf_bytes = make_pdf(10)
+    query = "What is machine learning?"
+    sample = text[:5_000]
+    batch = chunk_text(text)[:32]
+
+    return {
+        "chunk_text": lambda: bench(lambda: chunk_text(text), iterations),
+        "extract_text_from_txt": lambda: bench(lambda: extract_text_from_txt(text_bytes), iterations),
+        "extract_text_from_markdown": lambda: bench(
+            lambda: extract_text_from_markdown(text_bytes), iterations
+        ),
+        "extract_text_from_json": lambda: bench(lambda: extract_text_from_json(json_bytes), iterations),
+        "extract_text_from_csv": lambda: bench(lambda: extract_text_from_csv(csv_bytes), iterations),
+        "extract_text_from_pdf": lambda: bench(
+            lambda: extract_text_from_pdf(pdf_bytes), max(iterations // 10, 3), items_per_call=10
+        ),
+        "detect_language_query": lambda: bench(lambda: detect_language(query), iterations),
+        "detect_language_sample": lambda: bench(lambda: detect_language(sample), iterations),
+        "generate_embeddings": lambda: bench(
+            lambda: generate_embeddings(batch), iterations, items_per_call=len(batch)
+        ),
+    }
+
+
+def chunking_benchmarks(iterations: int) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """
+    Compare character-window and token-aware chunking.
+
+    Besides timings, each result reports per document the number of chunks
+    (embedding calls), the tokens sent to the model including overlap, and
+    how many chunks exceed the model's 512-token input and get truncated.
+    """
+    from app.config import get_settings
+    from app.services.document_processor import chunk_text
+    from app.utils.chunking import token_offsets
+
+    settings = get_settings()
+    documents = sample_documents(20_000)
+    model_max_tokens = 510  # 512 minus the special tokens
+
+    def run(strategy: str) -> Dict[str, Any]:
+        previous = settings.chunking_strategy
+        settings.chunking_strategy = strategy
+        try:
+            chunks = {language: chunk_text(text) for language, text in documents.items()}
+            total_chunks = sum(len(c) for c in chunks.values())
+            result = bench(
+                lambda: [chunk_text(text) for text in documents.values()],
+                max(iterations // 5, 3),
+                items_per_call=total_chunks
+            )
+        finally:
+            settings.chunking_strategy = previous
+
+        per_document = {}
+        for language, language_chunks in chunks.items():
+            token_counts = [len(token_offsets(chunk)) for chunk in language_chunks]
+            per_document[language] = {
+                "chunks": len(language_chunks),
+                "embedded_tokens": sum(min(n, model_max_tokens) for n in token_counts),
+                "truncated_chunks": sum(n > model_max_tokens for n in token_counts),
+                "truncated_tokens": sum(max(n - model_max_tokens, 0) for n in token_counts),
+            }
+        result["per_document"] = per_document
+        return result
+
+    return {
+        "chunk_text_characters": lambda: run("characters"),
+        "chunk_text_tokens": lambda: run("tokens"),
+    }
+
+
+def estimated_vector_ram_mb(points: int) -> float:
+    """Estimate the RAM held by dense vectors under the configured storage settings."""
+    from app.config import get_settings
+
+    settings = get_settings()
+    bytes_per_dimension = {"none": 0.0, "scalar": 1.0, "binary": 1 / 8}[settings.qdrant_quantization]
+    if not settings.qdrant_on_disk_vectors or settings.qdrant_quantization == "none":
+        bytes_per_dimension += 4.0
+    return round(points * settings.qdrant_vector_size * bytes_per_dimension / (1024 * 1024), 1)
+
+
+def vector_db_benchmarks(iterations: int, corpus_size: int) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Benchmarks for writes to and searches of the Qdrant collection."""
+    from app.config import get_settings
+    import numpy as np
+    from app.models import ChunkBatch
+    from app.services.vector_db import (
+        add_chunk_batch, add_documents, get_qdrant_client, search_documents
+    )
+    from app.utils.embeddings import generate_query_embedding
+
+    upsert_batch = make_chunks(256, "upsert.txt")
+    chunk_batch = ChunkBatch(
+        source="upsert.txt",
+        file_type="txt",
+        language="en",
+        timestamp=upsert_batch[0].metadata.timestamp,
+        chunk_indices=[chunk.metadata.chunk_index for chunk in upsert_batch],
+        contents=[chunk.content for chunk in upsert_batch],
+        embeddings=np.asarray([chunk.embedding for chunk in upsert_batch], dtype=np.float32)
+    )
+    query_embedding = generate_query_embedding("What is supervised learning?")
+
+    def search():
+        add_documents(make_chunks(corpus_size, "corpus.txt"))
+        requests = count_calls(get_qdrant_client(), QDRANT_REQUESTS)
+        result = bench(lambda: search_documents(query_embedding, top_k=5), iterations)
+        # bench makes one warm-up call
+        result["qdrant_requests_per_call"] = round(sum(requests.values()) / (iterations + 1), 2)
+        return result
+
+    def search_recall(k: int = 10):
+        """Time approximate search and measure its recall@k against exact search."""
+        add_documents(make_chunks(corpus_size, "corpus.txt"))
+        sentences = [s.strip() for p in sample_paragraphs() for s in p.split(".") if s.strip()]
+        queries = [generate_query_embedding(sentence) for sentence in sentences[:50]]
+
+        # Near-duplicate corpus chunks tie on score, so any result scoring at
+        # least the k-th exact score counts as a true neighbour
+        recalls = []
+        for query in queries:
+            approximate = search_documents(query, top_k=k)
+            exact = search_documents(query, top_k=k, exact=True)
+            threshold = exact[-1]["score"] - 1e-6
+            recalls.append(sum(r["score"] >= threshold for r in approximate) / len(exact))
+
+        counter = iter(range(sys.maxsize))
+        result = bench(
+            lambda: search_documents(queries[next(counter) % len(queries)], top_k=k), iterations
+        )
+        result["recall_at_k"] = round(sum(recalls) / len(recalls), 4)
+        result["k"] = k
+        result["quantization"] = get_settings().qdrant_quantization
+        result["estimated_vector_ram_mb"] = estimated_vector_ram_mb(corpus_size)
+        return result
+
+    return {
+        "add_documents": lambda: bench(
+            lambda: add_documents(upsert_batch), max(iterations // 10, 3),
+            items_per_call=len(upsert_batch)
+        ),
+        "add_chunk_batch": lambda: bench(
+            lambda: add_chunk_batch(chunk_batch), max(iterations // 10, 3),
+            items_per_call=len(chunk_batch)
+        ),
+        "search_documents": search,
+        "search_recall": search_recall,
+    }
+
+
+def projection_benchmarks(
+    iterations: int,
+    corpus_size: int,
+    dimension: int,
+    k: int = 10
+) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """
+    Measure what a PCA projection to a smaller dimension costs in recall.
+
+    The projection is fitted on the corpus embeddings, and recall@k compares
+    cosine top-k in the projected space with exact top-k at full dimension.
+    """
+    import numpy as np
+    from app.utils.embeddings import generate_embeddings
+    from app.utils.projection import fit_projection
+
+    def unit(vectors):
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def run() -> Dict[str, Any]:
+        paragraphs = sample_paragraphs()
+        texts = [f"[{i}] {paragraphs[i % len(paragraphs)]}" for i in range(corpus_size)]
+        sentences = [s.strip() for p in paragraphs for s in p.split(".") if s.strip()][:50]
+        corpus = np.asarray(generate_embeddings(texts, project=False), dtype=np.float32)
+        queries = np.asarray(generate_embeddings(sentences, project=False), dtype=np.float32)
+
+        projection = fit_projection(corpus, dimension, "benchmark")
+        full_scores = unit(queries) @ unit(corpus).T
+        projected_scores = unit(projection.project(queries)) @ unit(projection.project(corpus)).T
+
+        # Tie-aware, as in search_recall: any result scoring at least the
+        # k-th exact score at full dimension is a true neighbour
+        recalls = []
+        for full, projected in zip(full_scores, projected_scores):
+            threshold = np.sort(full)[-k] - 1e-6
+            recalls.append(float((full[np.argsort(projected)[-k:]] >= threshold).mean()))
+
+        batch = corpus[:32]
+        result = bench(lambda: projection.project(batch), iterations, items_per_call=len(batch))
+        result["recall_at_k"] = round(sum(recalls) / len(recalls), 4)
+        result["k"] = k
+        result["dimension"] = f"{projection.input_dimension} -> {dimension}"
+        result["bytes_per_vector"] = f"{projection.input_dimension * 4} -> {dimension * 4}"
+        return result
+
+    return {"project_embeddings": run}
+
+
+def query_benchmarks(
+    iterations: int,
+    corpus_size: int,
+    concurrency: int
+) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """
+    End-to-end process_query benchmarks against the fake Ollama server.
+
+    process_query_fan_out searches every supported language and the whole
+    corpus, dense and sparse, in one batched Qdrant request per query.
+    """
+    from app.agents.orchestrator import get_orchestrator
+    from app.config import get_settings
+    from app.services.llm import close_ollama_client
+    from app.services.vector_db import (
+        add_documents_async, close_async_qdrant_client, get_async_qdrant_client
+    )
+    from app.utils.embeddings import close_embedding_batcher
+
+    queries = [
+        "What is machine learning?",
+        "¿Qué es el aprendizaje automático?",
+        "Qu'est-ce que l'apprentissage automatique ?",
+    ]
+
+    async def run(calls: int, in_flight: int, fan_out: bool = False) -> Dict[str, Any]:
+        await add_documents_async(make_chunks(corpus_size, "corpus.txt"))
+        settings = get_settings()
+        settings.enable_multi_query_retrieval = fan_out
+        orchestrator = get_orchestrator()
+        counter = iter(range(sys.maxsize))
+
+        async def query():
+            result = await orchestrator.process_query(
+                query=queries[next(counter) % len(queries)], top_k=5
+            )
+            if not result.get("success"):
+                raise RuntimeError(result.get("error"))
+
+        requests = count_calls(get_async_qdrant_client(), QDRANT_REQUESTS)
+        try:
+            result = await bench_async(query, calls, concurrency=in_flight)
+            result["qdrant_requests_per_call"] = round(sum(requests.values()) / (calls + 1), 2)
+            return result
+        finally:
+            settings.enable_multi_query_retrieval = False
+            # Async clients are bound to this event loop
+            await close_ollama_client()
+            await close_async_qdrant_client()
+            await close_embedding_batcher()
+
+    return {
+        "process_query": lambda: asyncio.run(run(iterations, 1)),
+        "process_query_concurrent": lambda: asyncio.run(
+            run(iterations * concurrency, concurrency)
+        ),
+        "process_query_fan_out": lambda: asyncio.run(run(iterations, 1, fan_out=True)),
+    }
+
+
+def synthesis_benchmarks(
+    iterations: int,
+    ollama: FakeOllamaServer,
+    prefill_ms_per_token: float
+) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """
+    Context packing, and time to first token of a follow-up question with
+    and without a session.
+
+    Both turns are answered from the same five retrieved documents, as in a
+    conversation that stays on one topic. The fake server charges prefill
+    time for every prompt token it has not seen, so without a session the
+    follow-up prefills the instructions and documents again. Other
+    benchmarks run without prefill time, keeping them comparable with
+    older baselines.
+    """
+    from app.agents.synthesis import SynthesisAgent
+    from app.models import AgentMessage
+    from app.services.llm import close_ollama_client
+
+    content = " ".join(sample_paragraphs())
+    documents = [
+        {"id": f"corpus.txt_{i}", "content": content, "metadata": {"source": "corpus.txt"}}
+        for i in range(5)
+    ]
+    turns = ["What is machine learning?", "How is it different from deep learning?"]
+
+    async def ask(agent: SynthesisAgent, query: str, session_id: str | None) -> float:
+        message = AgentMessage(
+            sender="benchmark",
+            receiver="synthesis",
+            message_type="synthesize",
+            content={"query": query, "language": "en", "documents": documents, "session_id": session_id}
+        )
+        start = time.perf_counter()
+        first_token = 0.0
+        async for event in agent.stream(message):
+            if event["type"] == "token" and not first_token:
+                first_token = time.perf_counter() - start
+            elif event["type"] == "result" and not event["success"]:
+                raise RuntimeError(event["error"])
+        return first_token
+
+    async def run(use_session: bool) -> Dict[str, Any]:
+        agent = SynthesisAgent()
+        calls = max(iterations // 5, 3)
+        latencies = []
+        ollama.prefill_ms_per_token = prefill_ms_per_token
+        wall_start = time.perf_counter()
+        try:
+            # The first conversation warms up
+            for i in range(calls + 1):
+                session_id = f"benchmark-{use_session}-{i}" if use_session else None
+                await ask(agent, turns[0], session_id)
+                follow_up = await ask(agent, turns[1], session_id)
+                if i:
+                    latencies.append(follow_up)
+        finally:
+            ollama.prefill_ms_per_token = 0.0
+            await close_ollama_client()
+        result = summarize(latencies, time.perf_counter() - wall_start)
+        result["measures"] = "follow-up time to first token"
+        return result
+
+    def pack() -> Dict[str, Any]:
+        """Pack 50 overlapping chunks, as retrieved with top_k=50, into the default budget."""
+        from app.config import get_settings
+        from app.services.document_processor import chunk_text
+        from app.utils.chunking import token_offsets
+        from app.utils.context_packing import pack_context
+
+        settings = get_settings()
+        retrieved = [
+            {"id": f"corpus.txt_{i}", "content": chunk, "metadata": {"source": "corpus.txt"}}
+            for i, chunk in enumerate(chunk_text(make_text(200_000))[:50])
+        ]
+        query = turns[0]
+
+        result = bench(
+            lambda: pack_context(query, retrieved, settings.context_max_tokens), iterations,
+            items_per_call=len(retrieved)
+        )
+        packed = pack_context(query, retrieved, settings.context_max_tokens)
+        result["retrieved_tokens"] = sum(len(token_offsets(doc["content"])) for doc in retrieved)
+        result["packed"] = packed.get_stats()
+        return result
+
+    return {
+        "pack_context": pack,
+        "synthesis_followup_ttft": lambda: asyncio.run(run(False)),
+        "synthesis_followup_ttft_session": lambda: asyncio.run(run(True)),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Run the benchmarks and write the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per benchmark")
+    parser.add_argument("--only", default="", help="Comma-separated benchmark names to run")
+    parser.add_argument("--corpus-size", type=int, default=2_000, help="Points searched over")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Fake Ollama latency")
+    parser.add_argument(
+        "--llm-prefill-ms-per-token", type=float, default=0.5,
+        help="Fake Ollama prompt processing time in the synthesis benchmarks"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Callers for concurrent queries")
+    parser.add_argument("--real-model", action="store_true", help="Use the configured embedding model")
+    parser.add_argument("--projection-dim", type=int, default=256, help="Dimension for project_embeddings")
+    parser.add_argument(
+        "--qdrant-host", default="", help="Benchmark a Qdrant server instead of embedded in-memory Qdrant"
+    )
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline to compare")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="p50 slowdown flagged as regression")
+    args = parser.parse_args(argv)
+
+    with FakeOllamaServer(latency_ms=args.llm_latency_ms) as ollama:
+        configure_environment(ollama.url, args.qdrant_host, args.concurrency)
+
+        from app.config import get_settings
+        import app.utils.chunking as chunking_module
+        import app.utils.embeddings as embeddings_module
+
+        settings = get_settings()
+        if not args.real_model:
+            embeddings_module._embedding_model = StubEmbeddingModel(settings.qdrant_vector_size)
+            # Count tokens with the built-in approximation so chunking numbers
+            # do not depend on which tokenizers happen to be cached locally
+            chunking_module._tokenizer = False
+
+        benchmarks = {
+            **processing_benchmarks(args.iterations),
+            **chunking_benchmarks(args.iterations),
+            **vector_db_benchmarks(args.iterations, args.corpus_size),
+            **projection_benchmarks(args.iterations, args.corpus_size, args.projection_dim),
+            **query_benchmarks(args.iterations, args.corpus_size, args.concurrency),
+            **synthesis_benchmarks(args.iterations, ollama, args.llm_prefill_ms_per_token),
+        }
+        selected = [name for name in args.only.split(",") if name] or list(benchmarks)
+        unknown = set(selected) - set(benchmarks)
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        results = {}
+        for name in selected:
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = benchmarks[name]()
+            result = results[name]
+            print(
+                f"{name:<32} p50 {result['p50_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms  "
+                f"p99 {result['p99_ms']:>10.3f} ms  {result['throughput_per_s']:>10.1f}/s"
+            )
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "embedding_model": settings.embedding_model if args.real_model else "stub",
+            "iterations": args.iterations,
+            "corpus_size": args.corpus_size,
+            "qdrant": args.qdrant_host or ":memory:",
+            "quantization": settings.qdrant_quantization,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_prefill_ms_per_token": args.llm_prefill_ms_per_token,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "results": results,
+    }
+
+    output = args.baseline if args.save_baseline else args.output
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {output}", file=sys.stderr)
+
+    if not args.save_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+        lines = compare(results, baseline, args.threshold)
+        if lines:
+            print(f"\nCompared with {args.baseline}:")
+            print("\n".join(lines))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
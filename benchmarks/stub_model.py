@@ -0,0 +1,40 @@
+"""Deterministic stand-in for the sentence-transformers model."""
+from typing import List
+import hashlib
+import numpy as np
+
+
+class StubEmbeddingModel:
+    """
+    Hashes character trigrams into a fixed-size unit vector.
+
+    Cheap enough not to dominate timings of the code around it, yet texts
+    sharing words still land close together, so vector search returns
+    meaningful neighbours.
+    """
+
+    def __init__(self, dimension: int):
+        """
+        Initialize model.
+
+        Args:
+            dimension: Embedding dimension
+        """
+        self.dimension = dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Embed a batch of texts."""
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = text.lower()
+            for i in range(max(len(text) - 2, 1)):
+                digest = hashlib.blake2b(text[i:i + 3].encode("utf-8"), digest_size=4).digest()
+                embeddings[row, int.from_bytes(digest, "little") % self.dimension] += 1.0
+            norm = np.linalg.norm(embeddings[row])
+            if norm:
+                embeddings[row] /= norm
+        return embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get the embedding dimension."""
+        return self.dimension
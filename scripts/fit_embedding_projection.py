@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Fit the PCA projection used by EMBEDDING_PROJECTION_DIM.
+
+The sample comes from the full-dimension vectors already stored in the
+Qdrant collection, or from embedding the chunks of the given files.
+
+Usage:
+    python -m scripts.fit_embedding_projection --dim 256
+    python -m scripts.fit_embedding_projection --dim 256 --files sample_data/*.txt
+
+Afterwards set EMBEDDING_PROJECTION_DIM and QDRANT_VECTOR_SIZE to the new
+dimension, re-create the collection and re-ingest the documents. Every API
+replica must read the same EMBEDDING_PROJECTION_PATH, e.g. on a shared
+volume.
+"""
+from typing import List
+from pathlib import Path
+import argparse
+import sys
+import numpy as np
+
+
+def sample_from_collection(sample_size: int) -> np.ndarray:
+    """Read up to sample_size stored dense vectors from the collection."""
+    from app.config import get_settings
+    from app.services.vector_db import get_qdrant_client
+
+    settings = get_settings()
+    client = get_qdrant_client()
+
+    vectors: List[List[float]] = []
+    offset = None
+    while len(vectors) < sample_size:
+        points, offset = client.scroll(
+            collection_name=settings.qdrant_collection_name,
+            limit=min(1000, sample_size - len(vectors)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=[""]
+        )
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def sample_from_files(paths: List[Path], sample_size: int) -> np.ndarray:
+    """Embed up to sample_size chunks of the given files without projecting them."""
+    from app.services.document_processor import chunk_text, iter_document_pages
+    from app.utils.embeddings import generate_embeddings
+
+    chunks: List[str] = []
+    for path in paths:
+        file_type = path.suffix.lstrip(".").lower()
+        for _, page_text in iter_document_pages(path.read_bytes(), file_type):
+            chunks.extend(chunk_text(page_text))
+    return np.asarray(generate_embeddings(chunks[:sample_size], project=False), dtype=np.float32)
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Fit the projection and write it to --output or EMBEDDING_PROJECTION_PATH."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dim", type=int, required=True, help="Projected dimension, e.g. 256 or 384")
+    parser.add_argument("--sample", type=int, default=20_000, help="Maximum embeddings to fit on")
+    parser.add_argument("--files", type=Path, nargs="*", help="Embed these files instead of reading Qdrant")
+    parser.add_argument("--output", default="", help="Projection file (default: EMBEDDING_PROJECTION_PATH)")
+    args = parser.parse_args(argv)
+
+    from app.config import get_settings
+    from app.utils.projection import fit_projection
+
+    settings = get_settings()
+    if settings.embedding_projection_dim:
+        parser.error("unset EMBEDDING_PROJECTION_DIM so the sample has the model's full dimension")
+    output = args.output or settings.embedding_projection_path
+    if not output:
+        parser.error("pass --output or set EMBEDDING_PROJECTION_PATH")
+
+    sample = sample_from_files(args.files, args.sample) if args.files else sample_from_collection(args.sample)
+    print(f"Fitting on {len(sample)} embeddings of dimension {sample.shape[1] if sample.size else 0}")
+
+    projection = fit_projection(sample, args.dim, settings.embedding_model)
+
+    centred = projection.project(sample)
+    normalized = sample / np.maximum(np.linalg.norm(sample, axis=1, keepdims=True), 1e-12)
+    explained = centred.var(axis=0).sum() / normalized.var(axis=0).sum()
+    print(f"Explained variance at {args.dim} dimensions: {explained:.1%}")
+
+    projection.save(output)
+    print(f"Wrote {output} (fingerprint {projection.fingerprint})")
+    print(f"Set EMBEDDING_PROJECTION_PATH={output}, EMBEDDING_PROJECTION_DIM={args.dim} and "
+          f"QDRANT_VECTOR_SIZE={args.dim}, "
+          "then re-create the collection and re-ingest documents")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -149,7 +149,7 @@ with tab1:
             "Arabic": "ar"
         }
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         top_k = st.slider("Top K documents:", 1, 20, 5)
@@ -160,9 +160,93 @@ with tab1:
     with col3:
         include_reasoning = st.checkbox("Include reasoning", value=False)
     
+    with col4:
+        stream_response = st.checkbox("Stream response", value=True)
+    
     if st.button("🚀 Submit Query", use_container_width=True, type="primary"):
         if not query_text.strip():
             st.error("Please enter a query")
+        elif stream_response:
+            try:
+                payload = {
+                    "query": query_text,
+                    "language": language_map[language],
+                    "top_k": top_k,
+                    "include_sources": include_sources,
+                    "include_reasoning": include_reasoning
+                }
+                
+                st.markdown("### 📝 Response")
+                response_placeholder = st.empty()
+                response_placeholder.markdown("_Retrieving documents..._")
+                
+                response_text = ""
+                sources = []
+                result_language = language_map[language] or "auto"
+                validation = None
+                done = None
+                
+                with requests.post(
+                    f"{st.session_state.api_url}/api/v1/query/stream",
+                    json=payload,
+                    stream=True,
+                    timeout=120
+                ) as response:
+                    if response.status_code != 200:
+                        st.error(f"Error: {response.status_code} - {response.text}")
+                    else:
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            
+                            if event["event"] == "sources":
+                                sources = event.get("sources", [])
+                                result_language = event.get("language") or result_language
+                                response_placeholder.markdown("_Generating..._")
+                            elif event["event"] == "token":
+                                response_text += event["content"]
+                                response_placeholder.markdown(response_text + "▌")
+                            elif event["event"] == "validation":
+                                validation = event.get("validation")
+                            elif event["event"] == "done":
+                                done = event
+                            elif event["event"] == "error":
+                                st.error(f"❌ Error: {event.get('error')}")
+                
+                response_placeholder.markdown(response_text)
+                
+                if done:
+                    st.session_state.query_history.append(query_text)
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Language", str(result_language).upper())
+                    with col2:
+                        st.metric("Confidence", f"{done['confidence']:.2%}")
+                    with col3:
+                        st.metric("Processing Time", f"{done['processing_time_ms']:.0f}ms")
+                    with col4:
+                        st.metric("Sources", len(sources))
+                    
+                    if include_sources and sources:
+                        st.markdown("### 📚 Sources")
+                        for i, source in enumerate(sources, 1):
+                            with st.expander(f"Source {i}: {source.get('source', 'Unknown')[:50]}"):
+                                st.write(source)
+                    
+                    if validation:
+                        with st.expander("✅ Validation"):
+                            st.json(validation)
+                    
+                    if done.get("agent_states"):
+                        with st.expander("🤖 Agent States"):
+                            st.json(done["agent_states"])
+            
+            except requests.exceptions.Timeout:
+                st.error("⏱️ Request timeout. The query took too long to process.")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
         else:
             with st.spinner("Processing query..."):
                 try:
@@ -0,0 +1,114 @@
+"""Shared fixtures for the test suite."""
+import pytest
+import pytest_asyncio
+import asyncio
+from datetime import datetime
+from qdrant_client import AsyncQdrantClient
+import app.agents.orchestrator as orchestrator_module
+import app.agents.retrieval as retrieval_module
+import app.agents.synthesis as synthesis_module
+import app.services.response_cache as response_cache_module
+import app.services.vector_db as vector_db_module
+import app.utils.chunking as chunking_module
+from app.config import get_settings
+from app.models import DocumentChunk, DocumentMetadata
+
+
+SERVICE_LATENCY_S = 0.2
+
+
+@pytest.fixture(autouse=True)
+def fallback_tokenizer(monkeypatch):
+    """Chunk with the deterministic fallback tokenizer instead of downloading one."""
+    monkeypatch.setattr(chunking_module, "_tokenizer", False)
+
+
+async def fake_embedding(text):
+    await asyncio.sleep(SERVICE_LATENCY_S / 4)
+    return [0.1, 0.2, 0.3]
+
+
+async def fake_search(query_embedding, top_k=5, language_filter=None, filters=None):
+    await asyncio.sleep(SERVICE_LATENCY_S / 4)
+    return [
+        {
+            "id": "doc_0",
+            "content": "Machine learning is a subset of artificial intelligence.",
+            "score": 0.9,
+            "metadata": {"source": "doc.txt", "file_type": "txt", "language": "en"}
+        }
+    ]
+
+
+async def fake_sparse_search(query, top_k=5, language_filter=None, filters=None):
+    await asyncio.sleep(SERVICE_LATENCY_S / 4)
+    return []
+
+
+async def fake_generate(prompt, context=None):
+    await asyncio.sleep(SERVICE_LATENCY_S)
+    return {"response": "Machine learning is a subset of artificial intelligence.", "done": True}
+
+
+@pytest.fixture
+def fake_services(monkeypatch):
+    """Replace Qdrant, Ollama and the embedding model with slow async fakes."""
+    monkeypatch.setattr(response_cache_module, "_response_cache", None)
+    monkeypatch.setattr(orchestrator_module, "generate_query_embedding_async", fake_embedding)
+    monkeypatch.setattr(retrieval_module, "generate_query_embedding_async", fake_embedding)
+    monkeypatch.setattr(retrieval_module, "search_documents_async", fake_search)
+    monkeypatch.setattr(retrieval_module, "search_sparse_documents_async", fake_sparse_search)
+    monkeypatch.setattr(synthesis_module, "generate_result_async", fake_generate)
+
+
+def make_chunk(source, index, content, language="en", embedding=None):
+    """Build a document chunk with a constant embedding unless one is given."""
+    return DocumentChunk(
+        id=f"{source}_{index}",
+        content=content,
+        metadata=DocumentMetadata(
+            source=source,
+            file_type="txt",
+            language=language,
+            chunk_index=index,
+            total_chunks=0,
+            timestamp=datetime.utcnow()
+        ),
+        embedding=embedding or [0.1] * get_settings().qdrant_vector_size
+    )
+
+
+def batch_to_chunks(batch):
+    """Convert a chunk batch to the document chunks it stands for."""
+    return [
+        DocumentChunk(
+            id=f"{batch.source}_{chunk_index}",
+            content=content,
+            metadata=DocumentMetadata(
+                source=batch.source,
+                file_type=batch.file_type,
+                language=batch.language,
+                chunk_index=chunk_index,
+                total_chunks=0,
+                page_number=batch.page_numbers[i] if batch.page_numbers else None,
+                timestamp=batch.timestamp,
+                original_filename=batch.source,
+                content_hash=batch.content_hashes[i] if batch.content_hashes else None
+            ),
+            embedding=batch.embeddings[i].tolist(),
+            sparse_vector=batch.sparse_vectors[i] if batch.sparse_vectors else None
+        )
+        for i, (chunk_index, content) in enumerate(zip(batch.chunk_indices, batch.contents))
+    ]
+
+
+@pytest_asyncio.fixture
+async def qdrant(monkeypatch):
+    """Run the async client against an in-memory Qdrant."""
+    client = AsyncQdrantClient(location=":memory:")
+    monkeypatch.setattr(vector_db_module, "_async_qdrant_client", client)
+    monkeypatch.setattr(vector_db_module, "_sparse_vectors_enabled", None)
+    monkeypatch.setattr(vector_db_module, "_async_collection_ready", False)
+    monkeypatch.setattr(get_settings(), "qdrant_location", ":memory:")
+    yield client
+    await client.close()
@@ -0,0 +1,159 @@
+"""Tests for the non-blocking query pipeline."""
+import pytest
+import asyncio
+import time
+import httpx
+import app.agents.synthesis as synthesis_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.config import get_settings
+from app.services.llm import OllamaBusyError, OllamaClient
+from tests.conftest import SERVICE_LATENCY_S
+
+
+class TestConcurrentQueries:
+    """Test that concurrent queries do not serialize on the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_overlap(self, fake_services):
+        """Test that in-flight queries run concurrently."""
+        orchestrator = AgentOrchestrator()
+        concurrency = 8
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            orchestrator.process_query(f"What is machine learning? {i}", language="en")
+            for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+        assert all(result["success"] for result in results)
+        # Serialized execution would take concurrency * per-query latency
+        assert elapsed < concurrency * SERVICE_LATENCY_S / 2
+
+
+class TestAsyncOllamaClient:
+    """Test the async Ollama client."""
+
+    @pytest.mark.asyncio
+    async def test_generate_async_uses_pooled_client(self):
+        """Test that async generation reuses one pooled HTTP client."""
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json={"response": " generated text "})
+
+        client = OllamaClient()
+        client._async_client = httpx.AsyncClient(
+            base_url="http://ollama.test",
+            transport=httpx.MockTransport(handler)
+        )
+        pooled = client._get_async_client()
+
+        first = await client.generate_async("prompt one")
+        second = await client.generate_async("prompt two")
+
+        assert first == "generated text"
+        assert second == "generated text"
+        assert client._get_async_client() is pooled
+        assert len(requests_seen) == 2
+
+        await client.aclose()
+
+    def mock_client(self, handler):
+        """Build a client whose async requests go to handler."""
+        client = OllamaClient()
+        client._async_client = httpx.AsyncClient(
+            base_url="http://ollama.test",
+            transport=httpx.MockTransport(handler)
+        )
+        return client
+
+    @pytest.mark.asyncio
+    async def test_generations_are_limited_to_the_parallel_slots(self, monkeypatch):
+        """Test that no more than OLLAMA_MAX_PARALLEL_REQUESTS generations reach Ollama at once."""
+        monkeypatch.setattr(get_settings(), "ollama_max_parallel_requests", 2)
+        active, peak = 0, 0
+
+        async def handler(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return httpx.Response(200, json={"response": "text"})
+
+        client = self.mock_client(handler)
+        results = await asyncio.gather(*[client.generate_async(f"prompt {i}") for i in range(6)])
+
+        assert results == ["text"] * 6
+        assert peak == 2
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_queued_generation_fails_after_deadline(self, monkeypatch):
+        """Test that a request waiting longer than OLLAMA_QUEUE_TIMEOUT fails instead of piling up."""
+        monkeypatch.setattr(get_settings(), "ollama_max_parallel_requests", 1)
+        monkeypatch.setattr(get_settings(), "ollama_queue_timeout", 0.05)
+
+        async def handler(request):
+            await asyncio.sleep(0.3)
+            return httpx.Response(200, json={"response": "text"})
+
+        client = self.mock_client(handler)
+        results = await asyncio.gather(
+            client.generate_async("first"), client.generate_async("second"), return_exceptions=True
+        )
+
+        assert results[0] == "text"
+        assert isinstance(results[1], OllamaBusyError)
+        assert client.get_stats()["rejected"] == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_retries_follow_settings(self, monkeypatch):
+        """Test that server errors are retried OLLAMA_RETRY_ATTEMPTS times and client errors are not."""
+        monkeypatch.setattr(get_settings(), "ollama_retry_attempts", 2)
+        monkeypatch.setattr(get_settings(), "ollama_retry_delay", 0)
+        statuses = [503, 200, 400]
+        seen = []
+
+        def handler(request):
+            seen.append(statuses[len(seen)])
+            return httpx.Response(seen[-1], json={"response": "text"})
+
+        client = self.mock_client(handler)
+
+        assert await client.generate_async("prompt") == "text"
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.generate_async("prompt")
+        assert seen == [503, 200, 400]
+        await client.aclose()
+
+
+class TestStreamingQuery:
+    """Test the streaming query pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_stream_emits_sources_tokens_then_validation(self, fake_services, monkeypatch):
+        """Test event ordering for a streamed query."""
+        async def fake_stream(prompt, context=None):
+            for token in ["Machine", " learning", " is", " a", " subset", " of", " AI."]:
+                yield {"response": token, "done": False}
+            yield {"response": "", "done": True}
+
+        monkeypatch.setattr(synthesis_module, "stream_chunks_async", fake_stream)
+        orchestrator = AgentOrchestrator()
+
+        events = [
+            event async for event in
+            orchestrator.process_query_stream("What is machine learning?", language="en")
+        ]
+        kinds = [event["event"] for event in events]
+
+        assert kinds[0] == "sources"
+        assert kinds[-1] == "done"
+        assert "validation" in kinds
+        assert kinds.index("validation") > max(i for i, k in enumerate(kinds) if k == "token")
+        streamed = "".join(event["content"] for event in events if event["event"] == "token")
+        assert streamed == "Machine learning is a subset of AI."
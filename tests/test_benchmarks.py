@@ -0,0 +1,78 @@
+"""Tests for the benchmark harness and its local service stand-ins."""
+import pytest
+from benchmarks.fake_ollama import FakeOllamaServer, RESPONSE_TEXT
+from benchmarks.harness import bench, compare
+from benchmarks.stub_model import StubEmbeddingModel
+from app.services.llm import OllamaClient
+
+
+class TestBenchmarkHarness:
+    """Test the benchmark harness."""
+
+    @pytest.mark.asyncio
+    async def test_fake_ollama_serves_generate_and_stream(self):
+        """Test that the fake server answers like Ollama in both modes."""
+        with FakeOllamaServer(latency_ms=10) as server:
+            client = OllamaClient()
+            client.base_url = server.url
+
+            response = await client.generate_async("prompt")
+            chunks = [chunk async for chunk in client.generate_stream_async("prompt")]
+            await client.aclose()
+
+        assert response == RESPONSE_TEXT
+        assert "".join(chunk["response"] for chunk in chunks).strip() == RESPONSE_TEXT
+        assert server.requests == 2
+
+    def test_fake_ollama_serves_sync_client(self):
+        """Test that sync generation and health checks share one pooled session."""
+        with FakeOllamaServer(latency_ms=10) as server:
+            client = OllamaClient()
+            client.base_url = server.url
+
+            response = client.generate("prompt")
+            session = client._get_session()
+            healthy = client.check_health()
+
+        assert response == RESPONSE_TEXT
+        assert healthy
+        assert client._get_session() is session
+
+    def test_stub_model_is_deterministic_and_normalized(self):
+        """Test that the stub model returns stable unit vectors."""
+        model = StubEmbeddingModel(dimension=64)
+
+        first, second = model.encode(["machine learning", "machine learning"])
+
+        assert (first == second).all()
+        assert abs(float((first ** 2).sum()) - 1.0) < 1e-5
+
+    def test_report_flags_regressions(self):
+        """Test that percentiles are reported and slowdowns flagged."""
+        result = bench(lambda: None, iterations=20)
+        assert {"p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "peak_rss_mb"} <= set(result)
+
+        lines = compare(
+            {"fast": {"p50_ms": 1.05}, "slow": {"p50_ms": 2.0}},
+            {"fast": {"p50_ms": 1.0}, "slow": {"p50_ms": 1.0}}
+        )
+        assert lines[0].endswith("ok")
+        assert lines[1].endswith("REGRESSION")
+
+    def test_report_flags_extra_round_trips_and_lost_recall(self):
+        """Test that Qdrant requests per call and recall@k are guarded too."""
+        lines = compare(
+            {
+                "search": {"p50_ms": 1.0, "qdrant_requests_per_call": 2.0},
+                "recall": {"p50_ms": 1.0, "recall_at_k": 0.95},
+                "new": {"p50_ms": 1.0, "recall_at_k": 0.5},
+            },
+            {
+                "search": {"p50_ms": 1.0, "qdrant_requests_per_call": 1.0},
+                "recall": {"p50_ms": 1.0, "recall_at_k": 0.95},
+            }
+        )
+
+        assert len(lines) == 4
+        assert "qdrant_requests_per_call" in lines[1] and lines[1].endswith("REGRESSION")
+        assert "recall_at_k" in lines[3] and lines[3].endswith("ok")
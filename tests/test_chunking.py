@@ -0,0 +1,82 @@
+"""Tests for token-aware text chunking."""
+import pytest
+import re
+import app.utils.chunking as chunking_module
+from app.utils.chunking import iter_sentences, iter_token_chunks, token_offsets
+
+
+SAMPLES = {
+    "en": "Machine learning is a subset of artificial intelligence. It learns patterns from data! ",
+    "es": "¿Qué es el aprendizaje automático? Es una rama de la inteligencia artificial. ",
+    "fr": "L'apprentissage automatique est une branche de l'IA. Il apprend à partir des données. ",
+    "zh": "机器学习是人工智能的一个分支。它使计算机能够从数据中学习！",
+    "ar": "التعلم الآلي هو فرع من فروع الذكاء الاصطناعي. هل يمكن للحواسيب التعلم من البيانات؟ ",
+}
+
+SENTENCE_END = re.compile(r"[.!?。！？؟]$")
+
+
+class WhitespaceTokenizer:
+    """Stand-in for a fast tokenizer: one token per whitespace-separated word."""
+
+    def __call__(self, text, **kwargs):
+        return {"offset_mapping": [m.span() for m in re.finditer(r"\S+", text)]}
+
+
+class TestTokenChunking:
+    """Test the sentence-boundary token chunker."""
+
+    @pytest.mark.parametrize("language", sorted(SAMPLES))
+    def test_chunks_fit_budget_and_end_on_sentences(self, language):
+        """Test that every chunk fits the token budget and ends a sentence."""
+        text = SAMPLES[language] * 60
+
+        chunks = list(iter_token_chunks(text, max_tokens=64, overlap_tokens=16))
+
+        assert len(chunks) > 1
+        assert all(len(token_offsets(chunk)) <= 64 for chunk in chunks)
+        assert all(SENTENCE_END.search(chunk) for chunk in chunks)
+
+    def test_overlap_repeats_trailing_sentences(self):
+        """Test that consecutive chunks share whole trailing sentences."""
+        sentences = [f"Sentence number {i} is here." for i in range(40)]
+
+        chunks = list(iter_token_chunks(" ".join(sentences), max_tokens=40, overlap_tokens=10))
+
+        for previous, current in zip(chunks, chunks[1:]):
+            last_sentence = previous.rsplit(". ", 1)[-1]
+            assert current.startswith(last_sentence.rstrip("."))
+
+    def test_paragraphs_start_new_chunks(self):
+        """Test that a paragraph break ends a chunk that is at least half full."""
+        first = "Alpha beta gamma delta. " * 8
+        second = "Epsilon zeta eta theta. " * 3
+
+        chunks = list(iter_token_chunks(f"{first}\n\n{second}", max_tokens=100, overlap_tokens=10))
+
+        assert chunks == [first.strip(), second.strip()]
+
+    def test_oversized_sentence_is_split_on_tokens(self):
+        """Test that a sentence longer than the budget is split, not dropped."""
+        text = " ".join(["word"] * 50)
+
+        chunks = list(iter_token_chunks(text, max_tokens=20, overlap_tokens=5))
+
+        assert all(len(token_offsets(chunk)) <= 20 for chunk in chunks)
+        assert chunks[0].startswith("word") and chunks[-1].endswith("word")
+        assert sum(len(token_offsets(chunk)) for chunk in chunks) >= 50
+
+    def test_model_tokenizer_offsets_are_used(self, monkeypatch):
+        """Test that chunk budgets are counted in the model tokenizer's tokens."""
+        monkeypatch.setattr(chunking_module, "_tokenizer", WhitespaceTokenizer())
+        text = "one two three four five. " * 20
+
+        chunks = list(iter_token_chunks(text, max_tokens=10, overlap_tokens=0))
+
+        assert chunks == ["one two three four five. one two three four five."] * 10
+
+    def test_sentences_cover_all_scripts(self):
+        """Test that sentence ends are found in Latin, CJK and Arabic text."""
+        for language, sample in SAMPLES.items():
+            sentences = [sample[start:end] for start, end, _ in iter_sentences(sample)]
+            assert len(sentences) == 2, language
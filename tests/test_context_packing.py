@@ -0,0 +1,135 @@
+"""Tests for token-budgeted packing of the synthesis context."""
+import pytest
+import app.agents.synthesis as synthesis_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.agents.synthesis import SynthesisAgent
+from app.config import get_settings
+from app.models import AgentMessage
+from app.utils.chunking import token_offsets
+from app.utils.context_packing import DOCUMENT_HEADER_TOKENS, pack_context
+
+
+def document(doc_id, content):
+    """Build a retrieved document."""
+    return {"id": doc_id, "content": content, "metadata": {"source": f"{doc_id}.txt"}}
+
+
+FIRST = "Machine learning learns patterns from data. Models improve with more examples."
+# The next chunk of the same text, overlapping FIRST by one sentence
+OVERLAPPING = "Models improve with more examples. Deep learning stacks many neural network layers."
+
+
+class TestContextPacking:
+    """Test deduplication, trimming and the token budget."""
+
+    def test_overlapping_sentences_are_sent_once(self):
+        """Test that a chunk's overlap with a better-ranked chunk is left out."""
+        packed = pack_context("What is deep learning?", [
+            document("a", FIRST), document("b", OVERLAPPING)
+        ], max_tokens=1000)
+
+        assert [doc["content"] for doc in packed.documents] == [
+            FIRST, "Deep learning stacks many neural network layers."
+        ]
+        assert packed.duplicates_dropped == 0
+
+    def test_near_duplicate_is_dropped(self):
+        """Test that a chunk repeating a better-ranked one is dropped."""
+        packed = pack_context("What is machine learning?", [
+            document("a", FIRST), document("b", "machine learning learns  patterns from data.")
+        ], max_tokens=1000)
+
+        assert [doc["id"] for doc in packed.documents] == ["a"]
+        assert packed.duplicates_dropped == 1
+
+    def test_budget_is_filled_in_relevance_order(self):
+        """Test that a document past the budget is skipped for shorter ones after it."""
+        long_text = "Gradient descent updates the weights step by step. " * 20
+        short_text = "Overfitting memorizes noise."
+        budget = len(token_offsets(FIRST)) + len(token_offsets(short_text)) + 2 * DOCUMENT_HEADER_TOKENS
+
+        packed = pack_context("What is machine learning?", [
+            document("a", FIRST), document("b", long_text), document("c", short_text)
+        ], max_tokens=budget)
+
+        assert [doc["id"] for doc in packed.documents] == ["a", "c"]
+        assert packed.tokens <= budget
+        assert packed.over_budget_dropped == 1
+
+    def test_first_document_is_truncated_to_fit(self):
+        """Test that the best document is cut rather than dropped."""
+        packed = pack_context("q", [document("a", "word " * 500)], max_tokens=50)
+
+        assert len(packed.documents) == 1
+        assert len(token_offsets(packed.documents[0]["content"])) == 50 - DOCUMENT_HEADER_TOKENS
+
+    def test_trimming_keeps_query_relevant_sentences(self):
+        """Test that trimming drops sentences unrelated to the query."""
+        content = "Neural networks have layers. The weather was sunny. Deep neural networks learn features."
+
+        packed = pack_context("How do neural networks learn?", [document("a", content)],
+                              max_tokens=1000, trim_sentences=True)
+        untrimmed = pack_context("¿Qué es el clima?", [document("a", content)],
+                                 max_tokens=1000, trim_sentences=True)
+
+        assert packed.documents[0]["content"] == (
+            "Neural networks have layers. Deep neural networks learn features."
+        )
+        assert packed.sentences_trimmed == 1
+        # No sentence shares a term with the query, so nothing is trimmed
+        assert untrimmed.documents[0]["content"] == content
+
+
+class TestSynthesisContextStats:
+    """Test that each query reports its context packing and prefill."""
+
+    @pytest.mark.asyncio
+    async def test_stats_are_reported_in_agent_states(self, fake_services, monkeypatch):
+        """Test that packing stats and Ollama's prompt counts reach the response."""
+        prompts = []
+
+        async def fake_generate(prompt, context=None):
+            prompts.append(prompt)
+            return {
+                "response": "An answer.",
+                "prompt_eval_count": 120,
+                "prompt_eval_duration": 250_000_000,
+                "eval_count": 3,
+            }
+
+        monkeypatch.setattr(synthesis_module, "generate_result_async", fake_generate)
+        orchestrator = AgentOrchestrator()
+
+        result = await orchestrator.process_query("What is machine learning?", language="en")
+
+        state = result["agent_states"]["synthesis"]
+        assert state["context"]["documents"] == 1
+        assert 0 < state["context"]["tokens"] <= state["context"]["max_tokens"]
+        assert state["generation"]["prompt_tokens"] == 120
+        assert state["generation"]["prefill_ms"] == 250.0
+        assert "[Document 1]" in prompts[0]
+
+    @pytest.mark.asyncio
+    async def test_dropped_documents_are_not_cited(self, monkeypatch):
+        """Test that sources and confidence cover only the packed documents."""
+        async def fake_generate(prompt, context=None):
+            return {"response": "An answer."}
+
+        monkeypatch.setattr(synthesis_module, "generate_result_async", fake_generate)
+        monkeypatch.setattr(get_settings(), "context_max_tokens", 40)
+        message = AgentMessage(
+            sender="retrieval",
+            receiver="synthesis",
+            message_type="synthesize",
+            content={"query": "What is machine learning?", "language": "en", "documents": [
+                document("a", FIRST),
+                document("b", "machine learning learns  patterns from data."),
+                document("c", "Gradient descent updates the weights step by step. " * 20),
+            ]}
+        )
+
+        result = await SynthesisAgent().process(message)
+
+        synthesis_data = result["synthesis_result"]
+        assert synthesis_data["sources"] == ["a.txt"]
+        assert synthesis_data["confidence"] == pytest.approx(1 / 5)
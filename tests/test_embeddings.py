@@ -0,0 +1,238 @@
+"""Tests for embedding batching, caching and projection."""
+import pytest
+import asyncio
+import threading
+import time
+import numpy as np
+import app.utils.cache as cache_module
+import app.utils.embeddings as embeddings_module
+import app.utils.projection as projection_module
+from app.config import get_settings, validate_settings
+from app.utils.cache import TTLCache
+from app.utils.embeddings import EmbeddingBatcher, QueryEmbeddingCache, generate_embeddings
+from app.utils.projection import EmbeddingProjection, fit_projection, get_embedding_projection
+
+
+@pytest.fixture
+def recorded_batches(monkeypatch):
+    """Replace the encoder with a fake that records batch sizes."""
+    batches = []
+
+    def fake_generate_embeddings(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(embeddings_module, "generate_embeddings", fake_generate_embeddings)
+    return batches
+
+
+class TestEmbeddingBatcher:
+    """Test the embedding micro-batcher."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self, recorded_batches):
+        """Test that concurrent callers are coalesced and get their own result."""
+        batcher = EmbeddingBatcher(max_batch_size=8, max_wait_ms=20)
+        texts = ["a" * i for i in range(1, 9)]
+
+        results = await asyncio.gather(*[batcher.embed(text) for text in texts])
+
+        assert results == [[float(len(text))] for text in texts]
+        assert len(recorded_batches) == 1
+        metrics = batcher.get_metrics()
+        assert metrics["items"] == 8
+        assert metrics["avg_fill_ratio"] == 1.0
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_are_bounded_by_size(self, recorded_batches):
+        """Test that no batch exceeds the configured size."""
+        batcher = EmbeddingBatcher(max_batch_size=4, max_wait_ms=20)
+
+        await asyncio.gather(*[batcher.embed(f"text {i}") for i in range(10)])
+
+        assert all(len(batch) <= 4 for batch in recorded_batches)
+        assert sum(len(batch) for batch in recorded_batches) == 10
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_encoder_errors_propagate_to_callers(self, monkeypatch):
+        """Test that a failed forward pass fails every waiting caller."""
+        def failing_generate_embeddings(texts):
+            raise RuntimeError("model unavailable")
+
+        monkeypatch.setattr(embeddings_module, "generate_embeddings", failing_generate_embeddings)
+        batcher = EmbeddingBatcher(max_batch_size=4, max_wait_ms=5)
+
+        results = await asyncio.gather(
+            batcher.embed("one"), batcher.embed("two"), return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        await batcher.close()
+
+
+class TestQueryEmbeddingCache:
+    """Test the query embedding cache."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        """Start each test with an empty global cache."""
+        monkeypatch.setattr(embeddings_module, "_query_embedding_cache", None)
+
+    def test_near_identical_queries_hit_cache(self, recorded_batches):
+        """Test that whitespace and Unicode-form variants reuse one embedding."""
+        first = embeddings_module.generate_query_embedding("What is  machine learning?")
+        second = embeddings_module.generate_query_embedding("  What is machine\u00a0learning? ")
+
+        assert first == second
+        assert len(recorded_batches) == 1
+        stats = embeddings_module.get_query_embedding_cache().get_stats()["memory"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_case_variants_are_embedded_separately(self, recorded_batches):
+        """Test that the cache never returns the embedding of differently cased text."""
+        embeddings_module.generate_query_embedding("Apple stock")
+        embeddings_module.generate_query_embedding("apple stock")
+
+        assert len(recorded_batches) == 2
+        assert recorded_batches[1][0].endswith("apple stock")
+
+    def test_lru_eviction_and_ttl(self, monkeypatch):
+        """Test that the memory tier is bounded and entries expire."""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.evictions == 1
+
+        clock = [time.monotonic()]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: clock[0])
+        cache.set("d", 4)
+        clock[0] += 61
+        assert cache.get("d") is None
+        assert cache.expirations == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that embeddings persist in the on-disk tier."""
+        cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60, cache_dir=str(tmp_path))
+        cache.set("key", [0.5, 0.25])
+        cache.disk.close()
+
+        restarted = QueryEmbeddingCache(max_size=10, ttl_seconds=60, cache_dir=str(tmp_path))
+
+        assert restarted.get("key") == [0.5, 0.25]
+        assert restarted.memory.get("key") == [0.5, 0.25]
+
+    @pytest.mark.asyncio
+    async def test_async_disk_tier_runs_off_the_event_loop(self, tmp_path):
+        """Test that async lookups and stores do SQLite I/O in a worker thread."""
+        cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60, cache_dir=str(tmp_path))
+        threads = []
+        disk_get, disk_set = cache.disk.get, cache.disk.set
+        cache.disk.get = lambda key: threads.append(threading.get_ident()) or disk_get(key)
+        cache.disk.set = lambda key, value: threads.append(threading.get_ident()) or disk_set(key, value)
+
+        await cache.set_async("key", [0.5, 0.25])
+        cache.memory.clear()
+        embedding = await cache.get_async("key")
+
+        assert embedding == [0.5, 0.25]
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
+
+
+def low_rank_embeddings(count, rank=8, dimension=64, seed=0):
+    """Random embeddings lying close to a rank-dimensional subspace."""
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(rank, dimension))
+    return rng.normal(size=(count, rank)) @ basis + 0.01 * rng.normal(size=(count, dimension))
+
+
+class ArrayModel:
+    """Stand-in encoder returning fixed embeddings."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def encode(self, texts, **kwargs):
+        return self.embeddings[:len(texts)]
+
+
+class TestEmbeddingProjection:
+    """Test PCA projection of embeddings."""
+
+    def test_projection_preserves_nearest_neighbours(self):
+        """Test that a projection to the data's rank keeps cosine neighbours."""
+        embeddings = low_rank_embeddings(200)
+        projection = fit_projection(embeddings, 8, "model")
+
+        def nearest(vectors):
+            unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            scores = unit @ unit.T
+            np.fill_diagonal(scores, -np.inf)
+            return scores.argmax(axis=1)
+
+        assert projection.project(embeddings).shape == (200, 8)
+        assert (nearest(projection.project(embeddings)) == nearest(embeddings)).mean() > 0.95
+
+    def test_projection_is_applied_to_embeddings(self, monkeypatch):
+        """Test that generated embeddings are projected unless asked not to be."""
+        embeddings = low_rank_embeddings(20)
+        projection = fit_projection(embeddings, 8, "model")
+        monkeypatch.setattr(embeddings_module, "_embedding_model", ArrayModel(embeddings))
+        monkeypatch.setattr(embeddings_module, "get_embedding_projection", lambda: projection)
+
+        assert len(generate_embeddings(["a", "b"])[0]) == 8
+        assert len(generate_embeddings(["a", "b"], project=False)[0]) == 64
+
+    def test_projection_must_match_vector_size(self, tmp_path, monkeypatch):
+        """Test that a saved projection loads only when QDRANT_VECTOR_SIZE matches."""
+        settings = get_settings()
+        path = str(tmp_path / "projection.npz")
+        fit_projection(low_rank_embeddings(20), 8, settings.embedding_model).save(path)
+        monkeypatch.setattr(settings, "embedding_projection_dim", 8)
+        monkeypatch.setattr(settings, "embedding_projection_path", path)
+        monkeypatch.setattr(projection_module, "_embedding_projection", None)
+
+        with pytest.raises(ValueError):
+            get_embedding_projection()
+
+        monkeypatch.setattr(settings, "qdrant_vector_size", 8)
+        loaded = get_embedding_projection()
+        assert isinstance(loaded, EmbeddingProjection)
+        assert loaded.dimension == 8
+
+    def test_missing_projection_fails_loudly(self, tmp_path, monkeypatch):
+        """Test that an enabled projection needs an explicit, existing file."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "embedding_projection_dim", 8)
+        monkeypatch.setattr(settings, "qdrant_vector_size", 8)
+        monkeypatch.setattr(projection_module, "_embedding_projection", None)
+
+        monkeypatch.setattr(settings, "embedding_projection_path", "")
+        with pytest.raises(ValueError, match="EMBEDDING_PROJECTION_PATH"):
+            validate_settings()
+        with pytest.raises(ValueError, match="EMBEDDING_PROJECTION_PATH"):
+            get_embedding_projection()
+
+        monkeypatch.setattr(settings, "embedding_projection_path", str(tmp_path / "missing.npz"))
+        with pytest.raises(ValueError, match="does not exist"):
+            get_embedding_projection()
+
+    def test_fingerprint_is_hashed_once(self, monkeypatch):
+        """Test that query cache keys do not rehash the projection matrix."""
+        projection = fit_projection(low_rank_embeddings(20), 8, "model")
+        hashes = []
+        sha256 = projection_module.hashlib.sha256
+        monkeypatch.setattr(projection_module.hashlib, "sha256", lambda data: hashes.append(1) or sha256(data))
+
+        fingerprints = {projection.fingerprint for _ in range(3)}
+
+        assert len(fingerprints) == 1
+        assert len(hashes) == 1
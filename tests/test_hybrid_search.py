@@ -0,0 +1,95 @@
+"""Tests for hybrid dense and sparse retrieval."""
+import pytest
+from app.agents.retrieval import RetrievalAgent
+from app.config import get_settings
+from app.models import AgentMessage
+from app.services.vector_db import add_documents_async, search_sparse_documents_async
+from app.utils.fusion import reciprocal_rank_fusion
+from app.utils.sparse import query_sparse_vector, sparse_vector, tokenize_terms
+from tests.conftest import make_chunk
+
+
+def unit_vector(dimension):
+    vector = [0.0] * get_settings().qdrant_vector_size
+    vector[dimension] = 1.0
+    return vector
+
+
+class TestSparseTerms:
+    """Test language-aware lexical tokenization."""
+
+    def test_identifiers_are_kept_whole_and_split(self):
+        """Test that error codes and SKUs match both whole and by part."""
+        assert tokenize_terms("Error ERR-404 on SKU_12345") == [
+            "error", "err-404", "err", "404", "on", "sku_12345", "sku", "12345"
+        ]
+
+    def test_accents_and_arabic_diacritics_are_folded(self):
+        """Test that queries match documents regardless of accents and diacritics."""
+        assert tokenize_terms("Qué ÉTÉ") == tokenize_terms("que ete")
+        assert tokenize_terms("الذَّكَاءُ أحمد") == tokenize_terms("الذكاء احمد")
+
+    def test_cjk_text_becomes_characters_and_bigrams(self):
+        """Test that unsegmented Chinese text yields matchable terms."""
+        assert tokenize_terms("机器学习") == ["机", "器", "学", "习", "机器", "器学", "学习"]
+
+    def test_term_frequency_saturates(self):
+        """Test that repeated terms gain weight with diminishing returns."""
+        once = max(sparse_vector("cache").values())
+        many = max(sparse_vector("cache " * 50).values())
+
+        assert once < many < 2.2 * once
+        assert set(query_sparse_vector("cache cache miss").values()) == {1.0}
+
+
+class TestReciprocalRankFusion:
+    """Test fusion of ranked result lists."""
+
+    def test_results_ranked_by_several_lists_win(self):
+        """Test that agreement across lists outranks a single top rank."""
+        dense = [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.8}]
+        sparse = [{"id": "c", "score": 12.0}, {"id": "b", "score": 3.0}]
+
+        fused = reciprocal_rank_fusion([dense, sparse], k=60, limit=3)
+
+        assert [result["id"] for result in fused] == ["b", "a", "c"]
+        assert fused[0]["score"] == pytest.approx(1 / 62 + 1 / 62)
+
+
+class TestHybridRetrieval:
+    """Test hybrid retrieval against an in-memory Qdrant."""
+
+    @pytest.mark.asyncio
+    async def test_sparse_search_finds_exact_identifiers(self, qdrant):
+        """Test that sparse search matches an error code and respects the language filter."""
+        await add_documents_async([
+            make_chunk("manual.txt", 0, "ERR-4711 occurs when the disk cache is full."),
+            make_chunk("manual.txt", 1, "Restart the service to clear warnings."),
+            make_chunk("manual_es.txt", 0, "ERR-4711 ocurre cuando la caché está llena.", language="es"),
+        ])
+
+        results = await search_sparse_documents_async("What does err-4711 mean?", top_k=5, language_filter="en")
+
+        assert [result["id"] for result in results] == ["manual.txt_0"]
+
+    @pytest.mark.asyncio
+    async def test_agent_fuses_dense_and_sparse_results(self, qdrant, monkeypatch):
+        """Test that a lexical match ranks first even when dense search ranks it last."""
+        monkeypatch.setattr(get_settings(), "enable_hybrid_search", True)
+        query_embedding = unit_vector(0)
+        await add_documents_async([
+            make_chunk("manual.txt", 0, "Restart the service to clear warnings.", embedding=query_embedding),
+            make_chunk("manual.txt", 1, "Check the network cable.", embedding=query_embedding),
+            make_chunk("manual.txt", 2, "SKU-99812 ships with a spare fan.", embedding=unit_vector(1)),
+        ])
+        message = AgentMessage(
+            sender="test",
+            receiver="retrieval",
+            message_type="query",
+            content={"query": "SKU-99812", "language": "en", "top_k": 1, "query_embedding": query_embedding}
+        )
+
+        result = await RetrievalAgent().process(message)
+
+        documents = result["retrieval_result"]["documents"]
+        assert [document["id"] for document in documents] == ["manual.txt_2"]
@@ -0,0 +1,316 @@
+"""Tests for the ingestion pipeline and background ingestion jobs."""
+import pytest
+import asyncio
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber.page
+import app.services.ingestion_jobs as jobs_module
+import app.services.ingestion_pipeline as pipeline_module
+from app.config import get_settings
+from app.services.ingestion_jobs import IngestionJobManager, JobStore
+from app.services.document_processor import iter_pdf_pages
+from app.services.ingestion_pipeline import ingest_document_async
+from tests.conftest import batch_to_chunks
+
+
+DOCUMENT = ("Machine learning is a subset of artificial intelligence. " * 200).encode("utf-8")
+
+
+def make_pdf(pages):
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return pdf
+
+
+@pytest.fixture
+def pipeline_calls(monkeypatch):
+    """Replace embedding and vector store calls with recording fakes."""
+    calls = {"embedded": [], "upserted": [], "total_chunks": None, "hashes": {}}
+
+    async def fake_encode_embeddings_async(texts):
+        await asyncio.sleep(0.01)
+        calls["embedded"].append(len(texts))
+        return np.full((len(texts), 3), 0.1, dtype=np.float32)
+
+    async def fake_add_chunk_batch_async(batch):
+        await asyncio.sleep(0.01)
+        documents = batch_to_chunks(batch)
+        calls["upserted"].append(documents)
+        calls["hashes"].update({doc.metadata.chunk_index: doc.metadata.content_hash for doc in documents})
+        return len(documents)
+
+    async def fake_update_total_chunks_async(source, total_chunks):
+        calls["total_chunks"] = total_chunks
+
+    async def fake_get_chunk_hashes_async(source):
+        return dict(calls["hashes"])
+
+    async def fake_delete_stale_chunks_async(source, total_chunks):
+        calls["hashes"] = {i: h for i, h in calls["hashes"].items() if i < total_chunks}
+
+    monkeypatch.setattr(pipeline_module, "encode_embeddings_async", fake_encode_embeddings_async)
+    monkeypatch.setattr(pipeline_module, "add_chunk_batch_async", fake_add_chunk_batch_async)
+    monkeypatch.setattr(pipeline_module, "update_total_chunks_async", fake_update_total_chunks_async)
+    monkeypatch.setattr(pipeline_module, "get_chunk_hashes_async", fake_get_chunk_hashes_async)
+    monkeypatch.setattr(pipeline_module, "delete_stale_chunks_async", fake_delete_stale_chunks_async)
+    monkeypatch.setattr(get_settings(), "ingestion_batch_size", 4)
+    return calls
+
+
+class TestIngestionPipeline:
+    """Test the staged ingestion pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_chunks_flow_in_bounded_batches(self, pipeline_calls):
+        """Test that every chunk is embedded and upserted in batches of at most the batch size."""
+        progress = await ingest_document_async("doc.txt", "txt", DOCUMENT, language="en")
+
+        assert progress.chunks_created > 4
+        assert all(size <= 4 for size in pipeline_calls["embedded"])
+        assert progress.chunks_embedded == progress.chunks_created
+        assert progress.points_upserted == progress.chunks_created
+        assert pipeline_calls["total_chunks"] == progress.chunks_created
+
+    @pytest.mark.asyncio
+    async def test_chunk_indices_are_contiguous(self, pipeline_calls):
+        """Test that chunk indices and ids are preserved across batches."""
+        await ingest_document_async("doc.txt", "txt", DOCUMENT, language="en")
+
+        chunks = [chunk for batch in pipeline_calls["upserted"] for chunk in batch]
+        assert [chunk.metadata.chunk_index for chunk in chunks] == list(range(len(chunks)))
+        assert chunks[-1].id == f"doc.txt_{len(chunks) - 1}"
+
+    @pytest.mark.asyncio
+    async def test_reingestion_only_embeds_changed_chunks(self, pipeline_calls):
+        """Test that re-ingesting an edited document skips chunks whose content is unchanged."""
+        first = await ingest_document_async("doc.txt", "txt", DOCUMENT, language="en")
+        pipeline_calls["embedded"].clear()
+        pipeline_calls["upserted"].clear()
+
+        edited = DOCUMENT.replace(b"subset", b"branch", 1)
+        second = await ingest_document_async("doc.txt", "txt", edited, language="en")
+
+        upserted = [chunk for batch in pipeline_calls["upserted"] for chunk in batch]
+        assert second.chunks_created == first.chunks_created
+        assert [chunk.metadata.chunk_index for chunk in upserted] == [0]
+        assert second.chunks_unchanged == second.chunks_created - 1
+        assert sum(pipeline_calls["embedded"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_reingestion_drops_chunks_past_the_new_end(self, pipeline_calls):
+        """Test that shortening a document removes its trailing chunks."""
+        await ingest_document_async("doc.txt", "txt", DOCUMENT, language="en")
+
+        progress = await ingest_document_async("doc.txt", "txt", DOCUMENT[:len(DOCUMENT) // 2], language="en")
+
+        assert sorted(pipeline_calls["hashes"]) == list(range(progress.chunks_created))
+        assert pipeline_calls["total_chunks"] == progress.chunks_created
+
+    @pytest.mark.asyncio
+    async def test_stage_errors_propagate(self, pipeline_calls, monkeypatch):
+        """Test that a failing stage fails the ingestion instead of hanging."""
+        async def failing_add_chunk_batch_async(batch):
+            raise RuntimeError("qdrant unavailable")
+
+        monkeypatch.setattr(pipeline_module, "add_chunk_batch_async", failing_add_chunk_batch_async)
+
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(
+                ingest_document_async("doc.txt", "txt", DOCUMENT, language="en"), timeout=5
+            )
+        assert pipeline_calls["total_chunks"] is None
+
+
+@pytest.fixture
+def job_manager(tmp_path, monkeypatch):
+    """Job manager over a temporary store whose ingestion fails for names containing 'bad'."""
+    ingested = []
+
+    async def fake_ingest_document_async(file_name, file_type, file_content, progress):
+        ingested.append(file_name)
+        progress.chunks_created = 3
+        await asyncio.sleep(0.2 if "slow" in file_name else 0.01)
+        if "bad" in file_name:
+            raise ValueError("unreadable file")
+        progress.language = "en"
+        progress.chunks_embedded = progress.points_upserted = 3
+        progress.total_time_ms = 10.0
+        return progress
+
+    monkeypatch.setattr(jobs_module, "ingest_document_async", fake_ingest_document_async)
+    monkeypatch.setattr(jobs_module, "invalidate_response_cache", lambda: None)
+
+    def make_manager(**kwargs):
+        manager = IngestionJobManager(
+            store=JobStore(str(tmp_path / "jobs.db")),
+            upload_dir=str(tmp_path / "uploads"),
+            concurrency=2,
+            **kwargs
+        )
+        manager.ingested = ingested
+        return manager
+
+    return make_manager
+
+
+async def wait_for_job(manager, job_id):
+    for _ in range(200):
+        job = manager.get_job(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestIngestionJobs:
+    """Test background ingestion jobs."""
+
+    @pytest.mark.asyncio
+    async def test_bulk_job_reports_per_file_status(self, job_manager):
+        """Test that a bulk job finishes each file independently."""
+        manager = job_manager()
+        await manager.start()
+
+        job = await manager.submit([
+            ("a.txt", "txt", b"alpha"), ("bad.txt", "txt", b"beta"), ("c.txt", "txt", b"gamma")
+        ])
+        assert job["status"] == "queued"
+
+        job = await wait_for_job(manager, job["job_id"])
+        await manager.stop()
+
+        assert job["status"] == "completed_with_errors"
+        assert [file["status"] for file in job["files"]] == ["completed", "failed", "completed"]
+        assert job["files"][0]["progress"]["points_upserted"] == 3
+        assert job["files"][0]["document_id"]
+        assert job["files"][1]["error"] == "unreadable file"
+
+    @pytest.mark.asyncio
+    async def test_unfinished_jobs_resume_after_restart(self, job_manager):
+        """Test that queued files persisted before a restart are ingested on start."""
+        manager = job_manager()
+        job = await asyncio.to_thread(manager._persist, [("a.txt", "txt", b"alpha")])
+        manager.store.close()
+
+        restarted = job_manager()
+        await restarted.start()
+        job = await wait_for_job(restarted, job["job_id"])
+        await restarted.stop()
+
+        assert job["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_workers_sharing_a_store_ingest_each_file_once(self, job_manager):
+        """Test that API workers started together do not ingest the same files twice."""
+        first = job_manager()
+        job = await asyncio.to_thread(
+            first._persist, [(f"{name}.txt", "txt", b"text") for name in "abcd"]
+        )
+        managers = [first, job_manager(), job_manager()]
+        for manager in managers:
+            await manager.start()
+
+        job = await wait_for_job(managers[1], job["job_id"])
+        for manager in managers:
+            await manager.stop()
+
+        assert job["status"] == "completed"
+        assert sorted(first.ingested) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+
+    @pytest.mark.asyncio
+    async def test_progress_is_visible_from_every_worker(self, job_manager):
+        """Test that a worker not running the file reports its live progress."""
+        running = job_manager(progress_interval_s=0.01)
+        other = job_manager()
+        await running.start()
+
+        job = await running.submit([("slow.txt", "txt", b"text")])
+        for _ in range(50):
+            progress = other.get_job(job["job_id"])["files"][0]["progress"]
+            if progress:
+                break
+            await asyncio.sleep(0.01)
+        await running.stop()
+
+        assert progress["chunks_created"] == 3
+
+    def test_only_expired_leases_can_be_taken_over(self, tmp_path):
+        """Test that a running file is claimed by another worker only once its lease expires."""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        store.create("job", [{"status": "queued"}])
+
+        assert store.claim_file("job", 0, "worker-1", lease_seconds=30) is not None
+        assert store.claim_file("job", 0, "worker-2", lease_seconds=30) is None
+        assert store.claimable(lease_seconds=30) == []
+
+        taken = store.claim_file("job", 0, "worker-2", lease_seconds=0)
+        assert taken["files"][0]["owner"] == "worker-2"
+        assert not store.heartbeat("job", 0, "worker-1", {})
+
+        store.release("worker-2")
+        assert store.claimable(lease_seconds=30) == [("job", 0)]
+
+
+class TestPdfExtraction:
+    """Test page-streaming PDF extraction."""
+
+    def test_pages_are_yielded_in_order(self):
+        """Test that parallel page-range extraction matches sequential extraction."""
+        pdf = make_pdf([f"Page {i} text" for i in range(1, 8)])
+
+        sequential = list(iter_pdf_pages(pdf, pages_per_task=3))
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parallel = list(iter_pdf_pages(pdf, executor=executor, pages_per_task=2))
+
+        assert sequential == [(i, f"Page {i} text") for i in range(1, 8)]
+        assert parallel == sequential
+
+    def test_fallback_applies_per_page(self, monkeypatch):
+        """Test that a page pdfplumber cannot read falls back to PyPDF2 alone."""
+        original_extract_text = pdfplumber.page.Page.extract_text
+
+        def flaky_extract_text(page, *args, **kwargs):
+            if page.page_number == 2:
+                raise ValueError("broken content stream")
+            return "pdfplumber: " + original_extract_text(page, *args, **kwargs)
+
+        monkeypatch.setattr(pdfplumber.page.Page, "extract_text", flaky_extract_text)
+        pdf = make_pdf(["First", "Second", "Third"])
+
+        assert list(iter_pdf_pages(pdf)) == [
+            (1, "pdfplumber: First"), (2, "Second"), (3, "pdfplumber: Third")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_chunks_carry_page_numbers(self, pipeline_calls, monkeypatch):
+        """Test that ingested PDF chunks record the page they came from."""
+        monkeypatch.setattr(pipeline_module, "get_extraction_pool", lambda: None)
+        pdf = make_pdf(["Introduction", "", "Conclusion"])
+
+        progress = await ingest_document_async("doc.pdf", "pdf", pdf, language="en")
+
+        chunks = [chunk for batch in pipeline_calls["upserted"] for chunk in batch]
+        assert progress.pages_extracted == 3
+        assert [(chunk.metadata.page_number, chunk.content) for chunk in chunks] == [
+            (1, "Introduction"), (3, "Conclusion")
+        ]
@@ -0,0 +1,162 @@
+"""Tests for multi-query fan-out retrieval."""
+import pytest
+import app.agents.retrieval as retrieval_module
+import app.services.vector_db as vector_db_module
+from app.agents.retrieval import RetrievalAgent
+from app.config import get_settings
+from app.models import AgentMessage
+from app.services.vector_db import add_documents_async
+from app.utils.fusion import normalized_score_fusion
+from tests.conftest import make_chunk
+
+
+def unit_vector(*weights):
+    vector = [0.0] * get_settings().qdrant_vector_size
+    for dimension, weight in enumerate(weights):
+        vector[dimension] = weight
+    return vector
+
+
+def retrieval_message(query, language, query_embedding, top_k=3):
+    """Build a retrieval message with a precomputed query embedding."""
+    return AgentMessage(
+        sender="test",
+        receiver="retrieval",
+        message_type="retrieve",
+        content={"query": query, "language": language, "top_k": top_k, "query_embedding": query_embedding}
+    )
+
+
+@pytest.fixture
+def multi_query(monkeypatch):
+    """Enable fan-out retrieval over English and Spanish, without rewrites."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "enable_multi_query_retrieval", True)
+    monkeypatch.setattr(settings, "multi_query_languages", ["en", "es"])
+    monkeypatch.setattr(settings, "multi_query_rewrites", 0)
+    monkeypatch.setattr(settings, "enable_reranking", False)
+    monkeypatch.setattr(settings, "enable_hybrid_search", True)
+    return settings
+
+
+@pytest.fixture
+def batch_calls(qdrant, monkeypatch):
+    """Count the Qdrant round trips made by searches."""
+    calls = []
+    query_batch_points = qdrant.query_batch_points
+
+    async def counting_query_batch_points(**kwargs):
+        calls.append(len(kwargs["requests"]))
+        return await query_batch_points(**kwargs)
+
+    monkeypatch.setattr(qdrant, "query_batch_points", counting_query_batch_points)
+    return calls
+
+
+class TestNormalizedScoreFusion:
+    """Test merging of searches over the same index."""
+
+    def test_results_are_deduplicated_on_normalized_scores(self):
+        """Test that each chunk appears once, ranked by its best normalized score."""
+        unfiltered = [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.7}, {"id": "c", "score": 0.5}]
+        spanish = [{"id": "d", "score": 0.8}, {"id": "c", "score": 0.5}]
+        rewrite = [{"id": "e", "score": 0.3}, {"id": "b", "score": 0.2}]
+
+        merged = normalized_score_fusion([[unfiltered, spanish], [rewrite]], limit=5)
+
+        assert [result["id"] for result in merged] == ["a", "e", "d", "b", "c"]
+        assert [result["score"] for result in merged] == pytest.approx([1.0, 1.0, 0.75, 0.5, 0.0])
+
+    def test_weak_filtered_hits_do_not_displace_unfiltered_ones(self):
+        """Test that a language's best hit keeps its low score relative to the unfiltered search."""
+        unfiltered = [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.85}]
+        arabic = [{"id": "x", "score": 0.2}, {"id": "y", "score": 0.1}]
+
+        merged = normalized_score_fusion([[unfiltered, arabic]], limit=2)
+
+        assert [result["id"] for result in merged] == ["a", "b"]
+
+    def test_single_result_lists_score_one(self):
+        """Test that an unfiltered list with equal scores does not divide by zero."""
+        merged = normalized_score_fusion([[[{"id": "a", "score": 0.2}], []]], limit=5)
+
+        assert merged == [{"id": "a", "score": 1.0}]
+
+
+class TestFanOutRetrieval:
+    """Test fan-out retrieval against an in-memory Qdrant."""
+
+    @pytest.mark.asyncio
+    async def test_spanish_query_finds_english_documents(self, multi_query, batch_calls):
+        """Test that a Spanish query reaches English documents in a single round trip."""
+        await add_documents_async([
+            make_chunk("ml.txt", 0, "Machine learning learns from data.", embedding=unit_vector(1.0, 0.1)),
+            make_chunk("ml_es.txt", 0, "El aprendizaje automático aprende de datos.",
+                       language="es", embedding=unit_vector(0.8, 0.6)),
+            make_chunk("cooking.txt", 0, "Bake the bread for an hour.", embedding=unit_vector(0.0, 1.0)),
+        ])
+
+        result = await RetrievalAgent().process(
+            retrieval_message("¿Qué es el aprendizaje automático?", "es", unit_vector(1.0, 0.0), top_k=2)
+        )
+
+        documents = result["retrieval_result"]["documents"]
+        assert {document["id"] for document in documents} == {"ml.txt_0", "ml_es.txt_0"}
+        assert result["fan_out"]["language_filters"] == [None, "es", "en"]
+        assert len(batch_calls) == 1
+        assert batch_calls[0] == result["fan_out"]["searches"]
+
+    @pytest.mark.asyncio
+    async def test_rewrites_are_searched_in_the_same_batch(self, multi_query, batch_calls, monkeypatch):
+        """Test that LLM rewrites are cleaned up and searched alongside the query."""
+        monkeypatch.setattr(multi_query, "multi_query_rewrites", 2)
+        monkeypatch.setattr(multi_query, "enable_hybrid_search", False)
+        prompts = []
+
+        async def fake_generate(prompt, max_tokens=None):
+            prompts.append(prompt)
+            return "1. What is machine learning?\n- ¿Qué es el aprendizaje automático?\n\n3. Define ML"
+
+        async def fake_embedding(text):
+            return unit_vector(1.0, 0.0)
+
+        monkeypatch.setattr(retrieval_module, "generate_text_async", fake_generate)
+        monkeypatch.setattr(retrieval_module, "generate_query_embedding_async", fake_embedding)
+        await add_documents_async([make_chunk("ml.txt", 0, "Machine learning.", embedding=unit_vector(1.0))])
+
+        result = await RetrievalAgent().process(
+            retrieval_message("¿Qué es el aprendizaje automático?", "es", unit_vector(1.0, 0.0))
+        )
+
+        assert result["fan_out"]["queries"] == [
+            "¿Qué es el aprendizaje automático?", "What is machine learning?", "Define ML"
+        ]
+        assert "2 alternative search queries" in prompts[0]
+        assert batch_calls == [3 * 3]
+        assert [document["id"] for document in result["retrieval_result"]["documents"]] == ["ml.txt_0"]
+
+    @pytest.mark.asyncio
+    async def test_failed_rewrite_searches_the_query_only(self, multi_query, qdrant, monkeypatch):
+        """Test that an LLM failure does not fail retrieval."""
+        monkeypatch.setattr(multi_query, "multi_query_rewrites", 2)
+
+        async def failing_generate(prompt, max_tokens=None):
+            raise RuntimeError("Ollama unavailable")
+
+        monkeypatch.setattr(retrieval_module, "generate_text_async", failing_generate)
+        await add_documents_async([make_chunk("ml.txt", 0, "Machine learning.", embedding=unit_vector(1.0))])
+
+        result = await RetrievalAgent().process(retrieval_message("Machine learning", "en", unit_vector(1.0)))
+
+        assert result["success"]
+        assert result["fan_out"]["queries"] == ["Machine learning"]
+
+    @pytest.mark.asyncio
+    async def test_sparse_searches_are_skipped_without_sparse_vectors(self, multi_query, batch_calls, monkeypatch):
+        """Test that collections created before hybrid search only get dense searches."""
+        await add_documents_async([make_chunk("ml.txt", 0, "Machine learning.", embedding=unit_vector(1.0))])
+        monkeypatch.setattr(vector_db_module, "_sparse_vectors_enabled", False)
+
+        result = await RetrievalAgent().process(retrieval_message("Machine learning", "en", unit_vector(1.0)))
+
+        assert result["fan_out"]["searches"] == batch_calls[0] == 3
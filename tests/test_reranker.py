@@ -0,0 +1,109 @@
+"""Tests for cross-encoder reranking."""
+import pytest
+import time
+import app.agents.retrieval as retrieval_module
+import app.utils.reranker as reranker_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.config import get_settings
+
+
+class KeywordCrossEncoder:
+    """Stand-in cross-encoder scoring documents by occurrences of 'reranked'."""
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay_s)
+        self.calls.append(len(pairs))
+        return [document.count("reranked") for _, document in pairs]
+
+
+@pytest.fixture
+def reranking(fake_services, monkeypatch):
+    """Enable reranking over ten candidates, the last ones being the most relevant."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "enable_reranking", True)
+    monkeypatch.setattr(settings, "reranker_candidates", 10)
+    monkeypatch.setattr(settings, "enable_caching", False)
+    requested = []
+
+    async def fake_search(query_embedding, top_k=5, language_filter=None, filters=None):
+        requested.append(top_k)
+        return [
+            {
+                "id": f"doc_{i}",
+                "content": "Machine learning. " + "reranked " * i,
+                "score": 1.0 - i / 10,
+                "metadata": {"source": "doc.txt", "file_type": "txt", "language": "en"}
+            }
+            for i in range(top_k)
+        ]
+
+    monkeypatch.setattr(retrieval_module, "search_documents_async", fake_search)
+    return requested
+
+
+async def query_with_spy(top_k):
+    """Run a query and return its result and the document ids handed to synthesis."""
+    orchestrator = AgentOrchestrator()
+    synthesized = []
+    process = orchestrator.synthesis.process
+
+    async def spy(message):
+        synthesized.extend(document["id"] for document in message.content["documents"])
+        return await process(message)
+
+    orchestrator.synthesis.process = spy
+    result = await orchestrator.process_query("What is machine learning?", language="en", top_k=top_k)
+    return result, synthesized
+
+
+class TestReranking:
+    """Test the reranking stage between retrieval and synthesis."""
+
+    @pytest.mark.asyncio
+    async def test_best_candidates_reach_synthesis(self, reranking, monkeypatch):
+        """Test that N candidates are scored in one pass and only the best k are kept."""
+        model = KeywordCrossEncoder()
+        monkeypatch.setattr(reranker_module, "_reranker_model", model)
+
+        result, synthesized = await query_with_spy(top_k=3)
+
+        assert reranking[0] >= 10
+        assert model.calls == [10]
+        assert synthesized == ["doc_9", "doc_8", "doc_7"]
+        retrieval_state = result["agent_states"]["retrieval"]
+        assert retrieval_state["rerank"] == "reranked"
+        assert set(retrieval_state["timings_ms"]) == {"embedding_ms", "search_ms", "rerank_ms", "total_ms"}
+
+    @pytest.mark.asyncio
+    async def test_latency_budget_keeps_retrieval_order(self, reranking, monkeypatch):
+        """Test that a cross-encoder slower than the budget is skipped."""
+        monkeypatch.setattr(reranker_module, "_reranker_model", KeywordCrossEncoder(delay_s=0.5))
+        monkeypatch.setattr(get_settings(), "reranker_timeout_ms", 50)
+
+        result, synthesized = await query_with_spy(top_k=3)
+
+        assert synthesized == ["doc_0", "doc_1", "doc_2"]
+        assert result["agent_states"]["retrieval"]["rerank"] == "timeout"
+        assert result["agent_states"]["retrieval"]["timings_ms"]["rerank_ms"] < 400
+
+    @pytest.mark.asyncio
+    async def test_model_load_is_outside_the_latency_budget(self, reranking, monkeypatch):
+        """Test that a model loaded on first use does not time out the query."""
+        model = KeywordCrossEncoder()
+
+        def slow_load(*args, **kwargs):
+            time.sleep(0.2)
+            return model
+
+        monkeypatch.setattr(reranker_module, "_reranker_model", None)
+        monkeypatch.setattr(reranker_module, "CrossEncoder", slow_load)
+        monkeypatch.setattr(get_settings(), "reranker_timeout_ms", 50)
+
+        result, synthesized = await query_with_spy(top_k=3)
+
+        assert result["agent_states"]["retrieval"]["rerank"] == "reranked"
+        assert synthesized == ["doc_9", "doc_8", "doc_7"]
@@ -0,0 +1,208 @@
+"""Tests for the orchestrator response and semantic caches."""
+import pytest
+import time
+import app.agents.orchestrator as orchestrator_module
+import app.agents.synthesis as synthesis_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.models import QueryFilters
+from app.services.response_cache import (
+    ResponseCache, InMemoryCacheBackend, RedisCacheBackend
+)
+from app.services.semantic_cache import SemanticCache
+
+
+class FakeRedis:
+    """Minimal stand-in for the Redis get/set/incr commands."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.time() + ex if ex else None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value).encode("utf-8"), None)
+        return value
+
+
+@pytest.fixture(params=["memory", "redis"])
+def response_cache(request, monkeypatch):
+    """Install a fresh response cache for each backend."""
+    if request.param == "memory":
+        backend = InMemoryCacheBackend(max_size=100, ttl_seconds=60)
+    else:
+        backend = RedisCacheBackend(FakeRedis())
+    cache = ResponseCache(backend=backend, ttl_seconds=60)
+    monkeypatch.setattr(orchestrator_module, "get_response_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def generation_calls(fake_services, monkeypatch):
+    """Count LLM generations."""
+    calls = []
+
+    async def counting_generate(prompt, context=None):
+        calls.append(prompt)
+        return {"response": "Machine learning is a subset of artificial intelligence.", "done": True}
+
+    monkeypatch.setattr(synthesis_module, "generate_result_async", counting_generate)
+    return calls
+
+
+class TestResponseCache:
+    """Test response caching in the orchestrator."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_is_served_from_cache(self, response_cache, generation_calls):
+        """Test that an identical request skips the agent pipeline."""
+        orchestrator = AgentOrchestrator()
+
+        first = await orchestrator.process_query("What is machine learning?", language="en")
+        second = await orchestrator.process_query("what is  machine learning?", language="en")
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["response"] == first["response"]
+        assert len(generation_calls) == 1
+        assert response_cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_request_parameters_are_part_of_the_key(self, response_cache, generation_calls):
+        """Test that a different top_k is not served from cache."""
+        orchestrator = AgentOrchestrator()
+
+        await orchestrator.process_query("What is machine learning?", language="en", top_k=5)
+        result = await orchestrator.process_query("What is machine learning?", language="en", top_k=10)
+
+        assert result["cached"] is False
+        assert len(generation_calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_filters_are_part_of_the_key(self, response_cache, generation_calls):
+        """Test that a request with other document filters is not served from cache."""
+        orchestrator = AgentOrchestrator()
+
+        await orchestrator.process_query("What is machine learning?", language="en")
+        result = await orchestrator.process_query(
+            "What is machine learning?", language="en", filters=QueryFilters(sources=["ml.pdf"])
+        )
+
+        assert result["cached"] is False
+        assert len(generation_calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_bumps_generation(self, response_cache, generation_calls):
+        """Test that changing the corpus invalidates cached responses."""
+        orchestrator = AgentOrchestrator()
+
+        await orchestrator.process_query("What is machine learning?", language="en")
+        response_cache.invalidate()
+        result = await orchestrator.process_query("What is machine learning?", language="en")
+
+        assert result["cached"] is False
+        assert response_cache.get_generation() == 1
+        assert len(generation_calls) == 2
+
+
+class TestSemanticCache:
+    """Test the semantic answer cache."""
+
+    def test_lookup_respects_threshold_language_and_generation(self):
+        """Test that only close, same-language, current answers match."""
+        cache = SemanticCache(max_size=4, ttl_seconds=60, threshold=0.9)
+        cache.add([1.0, 0.0], "en", 0, "What is ML?", {"response": "ML is..."})
+
+        assert cache.lookup([0.99, 0.05], "en", 0)[0]["response"] == "ML is..."
+        assert cache.lookup([0.5, 0.5], "en", 0) is None
+        assert cache.lookup([0.99, 0.05], "es", 0) is None
+        assert cache.lookup([0.99, 0.05], "en", 1) is None
+        assert cache.lookup([0.99, 0.05], "en", 0, scope='{"sources": ["ml.pdf"]}') is None
+        assert cache.get_stats()["hit_rate"] == 0.2
+
+    def test_evicts_least_recently_used(self):
+        """Test that a full cache replaces the least recently used answer."""
+        cache = SemanticCache(max_size=2, ttl_seconds=60, threshold=0.9)
+        cache.add([1.0, 0.0], "en", 0, "a", {"response": "a"})
+        cache.add([0.0, 1.0], "en", 0, "b", {"response": "b"})
+        cache.lookup([1.0, 0.0], "en", 0)
+        cache.add([-1.0, 0.0], "en", 0, "c", {"response": "c"})
+
+        assert cache.lookup([1.0, 0.0], "en", 0) is not None
+        assert cache.lookup([0.0, 1.0], "en", 0) is None
+
+    @pytest.mark.asyncio
+    async def test_paraphrase_is_served_from_semantic_cache(
+        self, response_cache, generation_calls, monkeypatch
+    ):
+        """Test that a paraphrase reuses the earlier answer."""
+        async def shared_embedding(text):
+            return [0.6, 0.8]
+
+        semantic_cache = SemanticCache(max_size=10, ttl_seconds=60, threshold=0.95)
+        monkeypatch.setattr(orchestrator_module, "generate_query_embedding_async", shared_embedding)
+        monkeypatch.setattr(orchestrator_module, "get_semantic_cache", lambda: semantic_cache)
+        monkeypatch.setattr(orchestrator_module.get_settings(), "enable_semantic_cache", True)
+        orchestrator = AgentOrchestrator()
+
+        first = await orchestrator.process_query("What is machine learning?", language="en")
+        second = await orchestrator.process_query("Explain machine learning", language="en")
+
+        assert first["cache_type"] is None
+        assert second["cache_type"] == "semantic"
+        assert second["response"] == first["response"]
+        assert len(generation_calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_paraphrase_is_not_served_across_request_options(
+        self, response_cache, generation_calls, monkeypatch
+    ):
+        """Test that a paraphrase with a different top_k or validation is answered afresh."""
+        async def shared_embedding(text):
+            return [0.6, 0.8]
+
+        semantic_cache = SemanticCache(max_size=10, ttl_seconds=60, threshold=0.95)
+        monkeypatch.setattr(orchestrator_module, "generate_query_embedding_async", shared_embedding)
+        monkeypatch.setattr(orchestrator_module, "get_semantic_cache", lambda: semantic_cache)
+        monkeypatch.setattr(orchestrator_module.get_settings(), "enable_semantic_cache", True)
+        orchestrator = AgentOrchestrator()
+
+        await orchestrator.process_query("What is machine learning?", language="en", include_validation=False)
+        validated = await orchestrator.process_query("Explain machine learning", language="en")
+        wider = await orchestrator.process_query("Describe machine learning", language="en", top_k=10)
+
+        assert validated["cached"] is False
+        assert wider["cached"] is False
+        assert len(generation_calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_translation_is_not_served_across_detected_languages(
+        self, response_cache, generation_calls, monkeypatch
+    ):
+        """Test that queries without a language are scoped by the detected one."""
+        async def shared_embedding(text):
+            return [0.6, 0.8]
+
+        semantic_cache = SemanticCache(max_size=10, ttl_seconds=60, threshold=0.95)
+        monkeypatch.setattr(orchestrator_module, "generate_query_embedding_async", shared_embedding)
+        monkeypatch.setattr(orchestrator_module, "get_semantic_cache", lambda: semantic_cache)
+        monkeypatch.setattr(orchestrator_module.get_settings(), "enable_semantic_cache", True)
+        orchestrator = AgentOrchestrator()
+
+        english = await orchestrator.process_query("What is machine learning and how does it work?", language=None)
+        spanish = await orchestrator.process_query(
+            "¿Qué es el aprendizaje automático y cómo funciona?", language=None
+        )
+
+        assert english["language"] == "en"
+        assert spanish["language"] == "es"
+        assert spanish["cached"] is False
+        assert len(generation_calls) == 2
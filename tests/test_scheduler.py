@@ -0,0 +1,200 @@
+"""Tests for the DAG scheduling of pipeline stages."""
+import pytest
+import asyncio
+import time
+import app.agents.orchestrator as orchestrator_module
+import app.agents.router as router_module
+import app.agents.synthesis as synthesis_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.agents.scheduler import Stage, StageError, StageScheduler
+from app.services.response_cache import ResponseCache, InMemoryCacheBackend
+
+
+def sleeper(seconds, **outputs):
+    """Build a stage body that waits, then returns outputs."""
+    async def run(**_):
+        await asyncio.sleep(seconds)
+        return outputs
+    return run
+
+
+class TestStageScheduler:
+    """Test dependency-driven execution of stages."""
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_overlap(self):
+        """Test that stages without a dependency between them run concurrently."""
+        scheduler = StageScheduler([
+            Stage("a", sleeper(0.1, a=1), inputs=("query",), outputs=("a",)),
+            Stage("b", sleeper(0.1, b=2), inputs=("query",), outputs=("b",)),
+            Stage("c", sleeper(0.0, c=3), inputs=("a", "b"), outputs=("c",)),
+        ])
+        values = {"query": "q"}
+
+        start = time.perf_counter()
+        report = await scheduler.run(values)
+        elapsed = time.perf_counter() - start
+
+        assert values["c"] == 3
+        assert elapsed < 0.18
+        assert report["c"]["start_ms"] >= max(report["a"]["duration_ms"], report["b"]["duration_ms"])
+        assert all(stage["status"] == "completed" for stage in report.values())
+
+    @pytest.mark.asyncio
+    async def test_pruning_propagates_to_dependents(self):
+        """Test that a stage reading a pruned stage's output is pruned too."""
+        scheduler = StageScheduler([
+            Stage("a", sleeper(0.0, a=1), inputs=("query",), outputs=("a",), when=lambda query: False),
+            Stage("b", sleeper(0.0, b=2), inputs=("a",), outputs=("b",)),
+            Stage("c", sleeper(0.0, c=3), inputs=("query",), outputs=("c",)),
+        ])
+
+        report = await scheduler.run({"query": "q"})
+
+        assert report["a"] == {"status": "pruned"}
+        assert report["b"] == {"status": "pruned"}
+        assert report["c"]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_running_stages(self):
+        """Test that the stop condition cancels running stages and skips pending ones."""
+        scheduler = StageScheduler([
+            Stage("hit", sleeper(0.0, hit=True), inputs=("query",), outputs=("hit",)),
+            Stage("slow", sleeper(5.0, slow=1), inputs=("query",), outputs=("slow",)),
+            Stage("after", sleeper(0.0, after=1), inputs=("slow",), outputs=("after",)),
+        ])
+
+        report = await asyncio.wait_for(
+            scheduler.run({"query": "q"}, stop=lambda values: values.get("hit")), timeout=1.0
+        )
+
+        assert report["slow"]["status"] == "cancelled"
+        assert report["after"] == {"status": "skipped"}
+
+    @pytest.mark.asyncio
+    async def test_stage_error_cancels_the_run(self):
+        """Test that a failing stage stops the stages running alongside it."""
+        async def fail(**_):
+            raise StageError("a", "a failed")
+
+        scheduler = StageScheduler([
+            Stage("a", fail, inputs=("query",), outputs=("a",)),
+            Stage("b", sleeper(5.0, b=1), inputs=("query",), outputs=("b",)),
+        ])
+
+        with pytest.raises(StageError, match="a failed"):
+            await asyncio.wait_for(scheduler.run({"query": "q"}), timeout=1.0)
+
+    def test_unknown_and_duplicate_values_are_rejected(self):
+        """Test that the DAG must be well-formed."""
+        with pytest.raises(ValueError):
+            StageScheduler([
+                Stage("a", sleeper(0.0), outputs=("x",)),
+                Stage("b", sleeper(0.0), outputs=("x",)),
+            ])
+        with pytest.raises(ValueError):
+            asyncio.run(StageScheduler([Stage("a", sleeper(0.0), inputs=("missing",))]).run({}))
+
+
+class TestOrchestratorStages:
+    """Test the orchestrator's query pipeline as a DAG."""
+
+    @pytest.mark.asyncio
+    async def test_routing_overlaps_embedding_and_timings_are_reported(self, fake_services):
+        """Test that routing does not wait for the query embedding, and stages are timed."""
+        orchestrator = AgentOrchestrator()
+
+        result = await orchestrator.process_query("What is machine learning?", language="en")
+
+        stages = result["stages"]
+        assert result["success"]
+        assert stages["route"]["start_ms"] < stages["embed"]["start_ms"] + stages["embed"]["duration_ms"]
+        assert stages["retrieve"]["start_ms"] >= stages["embed"]["duration_ms"]
+        assert stages["validate"]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_router_target_agents_prune_validation(self, fake_services):
+        """Test that validation does not run for queries the router does not send to it."""
+        orchestrator = AgentOrchestrator()
+
+        result = await orchestrator.process_query("Tell me about machine learning", language="en")
+
+        assert result["success"]
+        assert result["stages"]["validate"] == {"status": "pruned"}
+        assert result["validation"] == {}
+        assert "validation" not in result["agent_states"]
+
+    @pytest.mark.asyncio
+    async def test_detected_language_reaches_the_response(self, fake_services):
+        """Test that a query without a language is answered in the detected one."""
+        orchestrator = AgentOrchestrator()
+
+        result = await orchestrator.process_query(
+            "¿Qué es el aprendizaje automático y cómo funciona?", language=None
+        )
+
+        assert result["success"]
+        assert result["language"] == "es"
+
+    @pytest.mark.asyncio
+    async def test_blocking_lookups_do_not_stall_the_event_loop(self, fake_services, monkeypatch):
+        """Test that language detection and a blocking cache backend run off the event loop."""
+        class SlowBackend(InMemoryCacheBackend):
+            def get(self, key):
+                time.sleep(0.1)
+                return super().get(key)
+
+        def slow_detect_language(text):
+            time.sleep(0.1)
+            return "en", 0.99
+
+        cache = ResponseCache(backend=SlowBackend(max_size=10, ttl_seconds=60), ttl_seconds=60)
+        monkeypatch.setattr(orchestrator_module, "get_response_cache", lambda: cache)
+        monkeypatch.setattr(router_module, "detect_language", slow_detect_language)
+        gaps = []
+
+        async def heartbeat():
+            for _ in range(20):
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                gaps.append(time.perf_counter() - start)
+
+        result, _ = await asyncio.gather(
+            AgentOrchestrator().process_query("What is machine learning?", language=None), heartbeat()
+        )
+
+        assert result["success"]
+        assert max(gaps) < 0.08
+
+    @pytest.mark.asyncio
+    async def test_exact_cache_hit_cancels_the_pipeline(self, fake_services, monkeypatch):
+        """Test that an exact cache hit stops the embedding and routing in flight."""
+        cache = ResponseCache(backend=InMemoryCacheBackend(max_size=10, ttl_seconds=60), ttl_seconds=60)
+        monkeypatch.setattr(orchestrator_module, "get_response_cache", lambda: cache)
+        orchestrator = AgentOrchestrator()
+
+        await orchestrator.process_query("What is machine learning?", language="en")
+        cached = await orchestrator.process_query("What is machine learning?", language="en")
+
+        assert cached["cached"] is True
+        assert cached["stages"]["exact_cache"]["status"] == "completed"
+        assert cached["stages"]["embed"]["status"] == "cancelled"
+        assert cached["stages"]["synthesize"] == {"status": "skipped"}
+
+    @pytest.mark.asyncio
+    async def test_stream_reports_stages(self, fake_services, monkeypatch):
+        """Test that the streamed done event carries the stage timings."""
+        async def fake_stream(prompt, context=None):
+            yield {"response": "Machine learning.", "done": False}
+            yield {"response": "", "done": True}
+
+        monkeypatch.setattr(synthesis_module, "stream_chunks_async", fake_stream)
+        orchestrator = AgentOrchestrator()
+
+        events = [
+            event async for event in orchestrator.process_query_stream("What is machine learning?", language="en")
+        ]
+
+        assert events[0]["event"] == "sources"
+        assert events[-1]["event"] == "done"
+        assert events[-1]["stages"]["synthesize"]["status"] == "completed"
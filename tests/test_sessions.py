@@ -0,0 +1,151 @@
+"""Tests for session-aware synthesis."""
+import pytest
+import json
+import httpx
+import app.agents.orchestrator as orchestrator_module
+import app.agents.synthesis as synthesis_module
+import app.services.session_store as session_store_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.agents.synthesis import SYSTEM_PROMPT, SynthesisAgent
+from app.config import get_settings
+from app.models import AgentMessage
+from app.services.llm import OllamaClient
+from app.services.session_store import SessionStore
+
+DOCUMENTS = [
+    {"id": "doc_0", "content": "Machine learning learns from data.", "metadata": {"source": "ml.txt"}},
+    {"id": "doc_1", "content": "Deep learning uses neural networks.", "metadata": {"source": "dl.txt"}},
+]
+
+
+@pytest.fixture
+def turns(monkeypatch):
+    """Record the prompts and contexts of session turns, and give each a fresh store."""
+    calls = []
+
+    async def fake_generate(prompt, context=None):
+        calls.append((prompt, context))
+        return {"response": "An answer.", "context": list(context or []) + [len(calls)] * 10}
+
+    async def fake_stream(prompt, context=None):
+        calls.append((prompt, context))
+        yield {"response": "An ", "done": False}
+        yield {"response": "answer.", "done": False}
+        yield {"response": "", "done": True, "context": list(context or []) + [len(calls)] * 10}
+
+    monkeypatch.setattr(session_store_module, "_session_store", SessionStore(max_size=10, ttl_seconds=60))
+    monkeypatch.setattr(synthesis_module, "generate_result_async", fake_generate)
+    monkeypatch.setattr(synthesis_module, "stream_chunks_async", fake_stream)
+    return calls
+
+
+def synthesis_message(query, documents, session_id="session-1", language="en"):
+    """Build a synthesis message for one turn."""
+    return AgentMessage(
+        sender="retrieval",
+        receiver="synthesis",
+        message_type="synthesize",
+        content={"query": query, "language": language, "documents": documents, "session_id": session_id}
+    )
+
+
+class TestSessionSynthesis:
+    """Test that conversation turns continue from the previous turn's context."""
+
+    @pytest.mark.asyncio
+    async def test_follow_up_continues_context_with_new_documents_only(self, turns):
+        """Test that a follow-up sends the stored context and only unseen documents."""
+        agent = SynthesisAgent()
+
+        await agent.process(synthesis_message("What is machine learning?", DOCUMENTS[:1]))
+        result = await agent.process(synthesis_message("And deep learning?", DOCUMENTS))
+
+        assert result["success"]
+        (first_prompt, first_context), (follow_up, follow_up_context) = turns
+        assert first_context is None
+        assert first_prompt.startswith(SYSTEM_PROMPT)
+        assert follow_up_context == [1] * 10
+        assert SYSTEM_PROMPT not in follow_up
+        assert "Machine learning learns from data." not in follow_up
+        assert "[Document 2]\nDeep learning uses neural networks." in follow_up
+
+    @pytest.mark.asyncio
+    async def test_streamed_turn_keeps_context(self, turns):
+        """Test that the context of a streamed turn is kept for the next one."""
+        agent = SynthesisAgent()
+
+        events = [event async for event in agent.stream(synthesis_message("What is ML?", DOCUMENTS))]
+        await agent.process(synthesis_message("Tell me more.", DOCUMENTS))
+
+        assert events[-1]["synthesis_result"]["response"] == "An answer."
+        assert turns[1][1] == [1] * 10
+        assert "Additional context" not in turns[1][0]
+
+    @pytest.mark.asyncio
+    async def test_oversized_context_starts_fresh_prompt(self, turns, monkeypatch):
+        """Test that a session past the context limit falls back to a full prompt."""
+        monkeypatch.setattr(get_settings(), "session_max_context_tokens", 15)
+        agent = SynthesisAgent()
+
+        for query in ["First?", "Second?", "Third?"]:
+            await agent.process(synthesis_message(query, DOCUMENTS))
+
+        contexts = [context for _, context in turns]
+        assert contexts == [None, [1] * 10, None]
+        assert turns[2][0].startswith(SYSTEM_PROMPT)
+
+    def test_prompt_prefix_is_shared_across_requests(self):
+        """Test that request-specific text comes after the shared instructions."""
+        agent = SynthesisAgent()
+
+        english = agent._build_prompt("What is ML?", "[Document 1]\nML.", "en")
+        spanish = agent._build_prompt("¿Qué es ML?", "[Document 1]\nML.", "es")
+
+        shared = len(SYSTEM_PROMPT + "\n\nContext:\n[Document 1]\nML.\n\nQuestion: ")
+        assert english[:shared] == spanish[:shared]
+        assert english.endswith("Answer in English.\n\nAnswer:")
+
+    @pytest.mark.asyncio
+    async def test_session_queries_bypass_response_cache(self, fake_services, turns, monkeypatch):
+        """Test that turns are generated every time and never cached."""
+        lookups = []
+        monkeypatch.setattr(
+            orchestrator_module, "get_response_cache", lambda: lookups.append(1)
+        )
+        orchestrator = AgentOrchestrator()
+
+        first = await orchestrator.process_query("What is ML?", language="en", session_id="s")
+        second = await orchestrator.process_query("What is ML?", language="en", session_id="s")
+
+        assert first["session_id"] == second["session_id"] == "s"
+        assert second["cached"] is False
+        assert len(turns) == 2
+        assert lookups == []
+
+
+class TestOllamaContext:
+    """Test the Ollama request fields used by sessions."""
+
+    @pytest.mark.asyncio
+    async def test_payload_keeps_model_alive_and_passes_context(self):
+        """Test that requests carry keep_alive and the context to continue."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"response": "text", "context": [1, 2, 3]})
+
+        client = OllamaClient()
+        client._async_client = httpx.AsyncClient(
+            base_url="http://ollama.test", transport=httpx.MockTransport(handler)
+        )
+
+        result = await client.generate_result_async("prompt", context=[7, 8])
+        await client.generate_async("prompt")
+        await client.aclose()
+
+        first, second = bodies
+        assert result["context"] == [1, 2, 3]
+        assert first["context"] == [7, 8]
+        assert first["keep_alive"] == get_settings().ollama_keep_alive
+        assert "context" not in second
@@ -0,0 +1,286 @@
+"""Tests for the Qdrant vector database service."""
+import pytest
+import pytest_asyncio
+import subprocess
+import sys
+from datetime import datetime
+import numpy as np
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, ScalarType, VectorParams
+import app.services.vector_db as vector_db_module
+from app.config import get_settings
+from app.services.vector_db import (
+    add_chunk_batch_async, add_documents_async, chunk_point_id, search_documents_async,
+    search_sparse_documents_async, validate_collection_schema, _missing_payload_indexes, delete_stale_chunks_async, get_chunk_hashes_async,
+    _client_kwargs, _collection_config, _search_params, update_total_chunks_async
+)
+from app.models import ChunkBatch, QueryFilters
+from tests.conftest import batch_to_chunks, make_chunk
+
+
+async def stored_points(client):
+    points, _ = await client.scroll(get_settings().qdrant_collection_name, limit=100)
+    return points
+
+
+class TestChunkPoints:
+    """Test point ids and content hashes of stored chunks."""
+
+    def test_point_ids_are_stable_across_processes(self):
+        """Test that a chunk maps to the same point id in every interpreter."""
+        code = "from app.services.vector_db import chunk_point_id; print(chunk_point_id('doc.txt', 3))"
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+        assert output == chunk_point_id("doc.txt", 3)
+        assert chunk_point_id("doc.txt", 3) != chunk_point_id("doc.txt", 4)
+
+    @pytest.mark.asyncio
+    async def test_reingestion_overwrites_points(self, qdrant):
+        """Test that upserting the same chunks twice does not duplicate them."""
+        chunks = [make_chunk("doc.txt", i, f"Chunk {i}") for i in range(3)]
+
+        await add_documents_async(chunks)
+        await add_documents_async(chunks)
+
+        assert len(await stored_points(qdrant)) == 3
+        assert len(await get_chunk_hashes_async("doc.txt")) == 3
+
+    @pytest.mark.asyncio
+    async def test_stale_and_legacy_points_are_deleted(self, qdrant):
+        """Test that chunks past the new end and points without a hash are removed."""
+        await add_documents_async([make_chunk("doc.txt", i, f"Chunk {i}") for i in range(4)])
+        await add_documents_async([make_chunk("other.txt", 0, "Other")])
+        await qdrant.upsert(get_settings().qdrant_collection_name, points=[PointStruct(
+            id=12345, vector=[0.1] * get_settings().qdrant_vector_size,
+            payload={"source": "doc.txt", "chunk_index": 0}
+        )])
+
+        await delete_stale_chunks_async("doc.txt", 2)
+
+        remaining = {(p.payload["source"], p.payload["chunk_index"]) for p in await stored_points(qdrant)}
+        assert remaining == {("doc.txt", 0), ("doc.txt", 1), ("other.txt", 0)}
+
+    @pytest.mark.asyncio
+    async def test_chunk_batch_matches_document_points(self, qdrant):
+        """Test that an array batch stores the same points as the equivalent chunks."""
+        size = get_settings().qdrant_vector_size
+        embeddings = np.random.default_rng(0).random((3, size), dtype=np.float32)
+        batch = ChunkBatch(
+            source="doc.txt", file_type="txt", language="en", timestamp=datetime.utcnow(),
+            chunk_indices=[0, 1, 2], contents=["Chunk 0", "Chunk 1", "Chunk 2"],
+            embeddings=embeddings, page_numbers=[1, 1, 2]
+        )
+
+        assert await add_chunk_batch_async(batch) == 3
+        from_batch = {p.id: p for p in await stored_points(qdrant)}
+        await add_documents_async(batch_to_chunks(batch))
+        from_documents = {p.id: p for p in await stored_points(qdrant)}
+
+        assert from_batch.keys() == from_documents.keys()
+        for point_id, point in from_batch.items():
+            expected = {**from_documents[point_id].payload, "timestamp": point.payload["timestamp"]}
+            assert point.payload == expected
+        assert [p.payload["page_number"] for p in from_batch.values()].count(2) == 1
+
+
+
+@pytest.fixture
+def flaky_upsert(qdrant, monkeypatch):
+    """Record upsert request sizes and fail requests with queued errors."""
+    calls = {"sizes": [], "errors": []}
+    upsert = qdrant.upsert
+
+    async def recording_upsert(collection_name, points, **kwargs):
+        calls["sizes"].append(len(points.ids) if hasattr(points, "ids") else len(points))
+        if calls["errors"]:
+            raise calls["errors"].pop(0)
+        return await upsert(collection_name, points, **kwargs)
+
+    monkeypatch.setattr(qdrant, "upsert", recording_upsert)
+    monkeypatch.setattr(get_settings(), "qdrant_upload_batch_size", 2)
+    monkeypatch.setattr(get_settings(), "qdrant_upload_retry_delay", 0)
+    return calls
+
+
+class TestUploads:
+    """Test batched, retried uploads."""
+
+    @pytest.mark.asyncio
+    async def test_upserts_are_split_into_batches(self, qdrant, flaky_upsert):
+        """Test that a document is uploaded in requests of at most the batch size."""
+        await add_documents_async([make_chunk("doc.txt", i, f"Chunk {i}") for i in range(5)])
+        await add_chunk_batch_async(ChunkBatch(
+            source="other.txt", file_type="txt", language="en", timestamp=datetime.utcnow(),
+            chunk_indices=[0, 1, 2], contents=["Other 0", "Other 1", "Other 2"],
+            embeddings=np.ones((3, get_settings().qdrant_vector_size), dtype=np.float32)
+        ))
+
+        assert sorted(flaky_upsert["sizes"]) == [1, 1, 2, 2, 2]
+        assert len(await stored_points(qdrant)) == 8
+
+    @pytest.mark.asyncio
+    async def test_transient_failures_are_retried(self, qdrant, flaky_upsert):
+        """Test that connection errors and 503s are retried until the upload succeeds."""
+        flaky_upsert["errors"] = [
+            ResponseHandlingException(ConnectionError("reset")),
+            UnexpectedResponse(503, "Service Unavailable", b"", {}),
+        ]
+
+        await add_documents_async([make_chunk("doc.txt", i, f"Chunk {i}") for i in range(2)])
+
+        assert flaky_upsert["sizes"] == [2, 2, 2]
+        assert len(await stored_points(qdrant)) == 2
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, qdrant, flaky_upsert):
+        """Test that a rejected request fails without retrying."""
+        flaky_upsert["errors"] = [UnexpectedResponse(400, "Bad Request", b"", {})]
+
+        with pytest.raises(UnexpectedResponse):
+            await add_documents_async([make_chunk("doc.txt", 0, "Chunk 0")])
+        assert flaky_upsert["sizes"] == [1]
+
+    def test_grpc_is_configurable(self, monkeypatch):
+        """Test that server connections can prefer gRPC."""
+        monkeypatch.setattr(get_settings(), "qdrant_location", "")
+        monkeypatch.setattr(get_settings(), "qdrant_prefer_grpc", True)
+
+        assert _client_kwargs()["prefer_grpc"] is True
+        assert _client_kwargs()["grpc_port"] == get_settings().qdrant_grpc_port
+
+
+class TestCollectionCache:
+    """Test that collection existence is checked once, not per request."""
+
+    @pytest.mark.asyncio
+    async def test_collection_is_checked_once(self, qdrant, monkeypatch):
+        """Test that repeated searches do not re-check the collection."""
+        checks = []
+        collection_exists = qdrant.collection_exists
+
+        async def counting_collection_exists(name):
+            checks.append(name)
+            return await collection_exists(name)
+
+        monkeypatch.setattr(qdrant, "collection_exists", counting_collection_exists)
+        await add_documents_async([make_chunk("doc.txt", 0, "Chunk 0")])
+        for _ in range(3):
+            await search_documents_async([0.1] * get_settings().qdrant_vector_size)
+
+        assert len(checks) == 1
+
+    @pytest.mark.asyncio
+    async def test_deleted_collection_is_recreated(self, qdrant):
+        """Test that a collection deleted behind the cache is re-created on the next request."""
+        await add_documents_async([make_chunk("doc.txt", 0, "Chunk 0")])
+        await qdrant.delete_collection(get_settings().qdrant_collection_name)
+
+        assert await search_documents_async([0.1] * get_settings().qdrant_vector_size) == []
+        await add_documents_async([make_chunk("doc.txt", 0, "Chunk 0")])
+        assert len(await stored_points(qdrant)) == 1
+
+    @pytest.mark.asyncio
+    async def test_finalizing_recreates_a_deleted_collection(self, qdrant):
+        """Test that the ingestion finalize calls re-create a collection deleted behind the cache."""
+        await add_documents_async([make_chunk("doc.txt", 0, "Chunk 0")])
+        await qdrant.delete_collection(get_settings().qdrant_collection_name)
+
+        await delete_stale_chunks_async("doc.txt", 1)
+        await qdrant.delete_collection(get_settings().qdrant_collection_name)
+        await update_total_chunks_async("doc.txt", 1)
+
+        assert await qdrant.collection_exists(get_settings().qdrant_collection_name)
+
+    def test_schema_mismatch_fails_validation(self, monkeypatch):
+        """Test that a collection with another vector size is rejected at startup."""
+        client = QdrantClient(location=":memory:")
+        client.create_collection(
+            get_settings().qdrant_collection_name,
+            vectors_config=VectorParams(size=8, distance=Distance.COSINE)
+        )
+        monkeypatch.setattr(vector_db_module, "_qdrant_client", client)
+
+        with pytest.raises(ValueError, match="8-dimensional"):
+            validate_collection_schema()
+
+
+class TestFilters:
+    """Test that document filters are evaluated by Qdrant."""
+
+    @pytest_asyncio.fixture
+    async def documents(self, qdrant):
+        chunks = [make_chunk("a.txt", i, f"Invoice ERR-{i} for account") for i in range(3)]
+        chunks += [make_chunk("b.pdf", i, f"Invoice ERR-{i} for account") for i in range(3)]
+        for chunk in chunks[3:]:
+            chunk.metadata.file_type = "pdf"
+        await add_documents_async(chunks)
+
+    @pytest.mark.asyncio
+    async def test_sources_and_file_types_are_filtered(self, documents):
+        """Test that filtered dense and sparse searches return only matching documents."""
+        query = [0.1] * get_settings().qdrant_vector_size
+
+        by_source = await search_documents_async(query, top_k=3, filters=QueryFilters(sources=["a.txt"]))
+        by_type = await search_sparse_documents_async("invoice", top_k=3, filters=QueryFilters(file_types=["PDF"]))
+
+        assert [r["metadata"]["source"] for r in by_source] == ["a.txt"] * 3
+        assert [r["metadata"]["source"] for r in by_type] == ["b.pdf"] * 3
+
+    @pytest.mark.asyncio
+    async def test_ingestion_time_range(self, documents):
+        """Test that chunks can be restricted to an ingestion time window."""
+        query = [0.1] * get_settings().qdrant_vector_size
+        now = datetime.utcnow()
+
+        assert len(await search_documents_async(
+            query, top_k=10, filters=QueryFilters(ingested_before=now)
+        )) == 6
+        assert await search_documents_async(query, top_k=10, filters=QueryFilters(ingested_after=now)) == []
+
+    def test_filtered_fields_are_indexed(self, monkeypatch):
+        """Test that server collections get payload indexes for the filtered fields."""
+        monkeypatch.setattr(get_settings(), "qdrant_location", "")
+
+        assert set(_missing_payload_indexes(None)) == {
+            "language", "source", "file_type", "original_filename", "timestamp"
+        }
+
+
+class TestCollectionConfig:
+    """Test quantization, HNSW and search parameter configuration."""
+
+    def test_collection_config_applies_storage_settings(self, monkeypatch):
+        """Test that the configured quantization, on-disk and HNSW settings are applied."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "qdrant_quantization", "scalar")
+        monkeypatch.setattr(settings, "qdrant_on_disk_vectors", True)
+        monkeypatch.setattr(settings, "qdrant_hnsw_m", 32)
+
+        config = _collection_config()
+
+        assert config["quantization_config"].scalar.type == ScalarType.INT8
+        assert config["vectors_config"].on_disk is True
+        assert config["hnsw_config"].m == 32
+
+    def test_binary_and_no_quantization(self, monkeypatch):
+        """Test that quantization can be binary or switched off."""
+        monkeypatch.setattr(get_settings(), "qdrant_quantization", "binary")
+        assert _collection_config()["quantization_config"].binary.always_ram
+
+        monkeypatch.setattr(get_settings(), "qdrant_quantization", "none")
+        assert _collection_config()["quantization_config"] is None
+
+    def test_search_params_default_to_settings(self, monkeypatch):
+        """Test that per-call search parameters override the configured defaults."""
+        monkeypatch.setattr(get_settings(), "qdrant_search_oversampling", 3.0)
+
+        defaults = _search_params()
+        tuned = _search_params(hnsw_ef=256, oversampling=4.0, rescore=False)
+        exact = _search_params(exact=True)
+
+        assert (defaults.quantization.oversampling, defaults.quantization.rescore) == (3.0, True)
+        assert (tuned.hnsw_ef, tuned.quantization.oversampling, tuned.quantization.rescore) == (256, 4.0, False)
+        assert exact.exact and exact.quantization.ignore